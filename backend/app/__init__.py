@@ -2,32 +2,44 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from .core.config import Config
 from .core.extensions import db, jwt, migrate, ma
+from .core.database import init_db, init_engine, engine_options
+from .core.metrics import init_metrics
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
 
     CORS(app, supports_credentials=True, origins=["http://localhost:3000"])  # Allow credentials and only from frontend
 
     db.init_app(app)
+    init_engine(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
     ma.init_app(app)
+    init_metrics(app)
 
     # Register blueprints from features
     from .features.user.routes import auth_bp
-    from .features.question.routes import questions_bp, refresh_trie
+    from .features.question.routes import questions_bp, configure_search_indexes, refresh_search_indexes
     from .features.question.recommendations import recommendations_bp
     from .features.submission.routes import submissions_bp
+    from .features.submission.leaderboard import leaderboard_bp
+    from .services.leaderboard_service import rebuild_leaderboards
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(questions_bp, url_prefix='/api/questions')
     app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
     app.register_blueprint(submissions_bp, url_prefix='/api/submissions')
-
-    # Refresh the Trie after app and DB are ready
-    with app.app_context():
-        refresh_trie()
+    app.register_blueprint(leaderboard_bp, url_prefix='/api/leaderboard')
+
+    # Refresh the search indexes and leaderboards after app and DB are ready
+    init_db(app)
+    configure_search_indexes(app.config)
+    if app.config['WARM_INDEXES']:
+        with app.app_context():
+            refresh_search_indexes()
+            rebuild_leaderboards()
 
     @app.errorhandler(404)
     def not_found(e):
@@ -4,4 +4,69 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'super-secret-key')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///iipp.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key') 
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
+
+    # Code execution: warm interpreter pool (one worker per core by default)
+    EXECUTION_POOL_SIZE = int(os.environ.get('EXECUTION_POOL_SIZE', os.cpu_count() or 2))
+    EXECUTION_PYTHON = os.environ.get('EXECUTION_PYTHON', 'python')
+    EXECUTION_TIMEOUT = float(os.environ.get('EXECUTION_TIMEOUT', 5))
+    EXECUTION_MAX_STDOUT = int(os.environ.get('EXECUTION_MAX_STDOUT', 2**20))  # Bytes kept before the run is killed
+    EXECUTION_MAX_STDERR = int(os.environ.get('EXECUTION_MAX_STDERR', 2**18))
+    EXECUTION_QUEUE_TIMEOUT = float(os.environ.get('EXECUTION_QUEUE_TIMEOUT', 10))  # Wait for a free worker, then 503
+    EXECUTION_START_TIMEOUT = float(os.environ.get('EXECUTION_START_TIMEOUT', 10))  # Interpreter startup, then killed
+    JUDGE_TIMEOUT = float(os.environ.get('JUDGE_TIMEOUT', 10))  # For a whole batch of test cases
+    JUDGE_MAX_CASES = int(os.environ.get('JUDGE_MAX_CASES', 100))
+    # Async execution jobs (POST /execute with "async": true)
+    EXECUTION_JOB_WORKERS = int(os.environ.get('EXECUTION_JOB_WORKERS', os.cpu_count() or 2))
+    EXECUTION_QUEUE_MAX = int(os.environ.get('EXECUTION_QUEUE_MAX', 100))
+    EXECUTION_USER_MAX_JOBS = int(os.environ.get('EXECUTION_USER_MAX_JOBS', 2))
+    EXECUTION_MAX_POLL_WAIT = float(os.environ.get('EXECUTION_MAX_POLL_WAIT', 30))
+    # Opt-in result cache for deterministic runs ("cache": true); 0 disables it
+    EXECUTION_CACHE_SIZE = int(os.environ.get('EXECUTION_CACHE_SIZE', 1024))
+    EXECUTION_CACHE_MAX_BYTES = int(os.environ.get('EXECUTION_CACHE_MAX_BYTES', 16 * 2**20))
+    EXECUTION_CACHE_TTL = float(os.environ.get('EXECUTION_CACHE_TTL', 3600))
+
+    # Collaborative filtering: `flask recommendations build-cf` writes this (relative to instance/)
+    CF_INDEX_PATH = os.environ.get('CF_INDEX_PATH', 'cf_index')
+    CF_REFRESH_INTERVAL = float(os.environ.get('CF_REFRESH_INTERVAL', 30))  # Seconds between catch-ups
+    CF_USER_HISTORY = int(os.environ.get('CF_USER_HISTORY', 20))  # Recent solves used as seeds
+
+    # Build the in-memory search indexes and leaderboards when the app starts. Servers need
+    # them; one-off CLI jobs over a large bank (e.g. `flask questions import`) can skip it
+    WARM_INDEXES = os.environ.get('WARM_INDEXES', 'true').lower() not in ('0', 'false', 'no')
+
+    # Near-duplicate detection: estimated Jaccard similarity of description shingles
+    DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.7))
+
+    # Users whose review queues are kept in memory (least recently used are dropped)
+    REVIEW_CACHE_USERS = int(os.environ.get('REVIEW_CACHE_USERS', 10000))
+
+    # Slow-request profiling: cProfile a sampled fraction of requests (0 disables) and
+    # dump those slower than PROFILE_SLOW_MS into instance/PROFILE_DIR, keeping the newest PROFILE_KEEP
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS', 500))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+
+    # SQLite: per-connection pragmas. WAL lets readers run alongside a writer, NORMAL
+    # syncs only at checkpoints, and reads are served from a memory map of this many bytes
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 2**20))
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))  # Seconds a writer waits for the lock
+    # Connection pool for server databases (PostgreSQL); sized per process
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Seconds; below typical server idle timeouts
+
+    # Bulk submission import (POST /api/submissions/bulk): rows validated and committed
+    # per transaction, and row errors listed in the response (all are counted)
+    BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 1000))
+    BULK_MAX_ERRORS = int(os.environ.get('BULK_MAX_ERRORS', 100))
+
+    # Question list/detail responses: strong ETags per catalog version, Cache-Control max-age
+    # (0: clients revalidate every time) and a bounded cache of serialized bodies (0 disables it)
+    RESPONSE_CACHE_MAX_AGE = int(os.environ.get('RESPONSE_CACHE_MAX_AGE', 0))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 2**20))
\ No newline at end of file
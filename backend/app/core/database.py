@@ -1,5 +1,41 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from .extensions import db
- 
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database (explicit settings win)."""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        connect_args = options.setdefault('connect_args', {})
+        connect_args.setdefault('timeout', config['SQLITE_BUSY_TIMEOUT'])
+        return options
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', True)
+    return options
+
+def init_engine(app):
+    """Apply the SQLite pragmas to every new connection."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = {
+        'journal_mode': app.config['SQLITE_JOURNAL_MODE'],
+        'synchronous': app.config['SQLITE_SYNCHRONOUS'],
+        'mmap_size': app.config['SQLITE_MMAP_SIZE']
+    }
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
 def init_db(app):
     with app.app_context():
-        db.create_all() 
\ No newline at end of file
+        db.create_all()
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, Response, make_response
+from sqlalchemy.exc import IntegrityError
+from app.core.extensions import db
+
+# Response headers replayed from the cache along with the body (pagination cursors)
+CACHED_HEADERS = ('Link', 'X-Next-After-Id')
+
+class CacheVersion(db.Model):
+    """Write counter for the data behind a cached set of responses, shared by every process."""
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+class ResponseCache:
+    """Serialized GET responses keyed by (version, URL), LRU-bounded by entries and bytes.
+
+    `version` is the newest shared version this process has seen (see
+    CacheVersion). Seeing a newer one drops every stored response, so a
+    write made by any worker or CLI job invalidates every process's cache.
+    """
+    def __init__(self, max_entries=256, max_bytes=32 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self._entries = OrderedDict()  # key -> (body, mimetype, headers)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0}
+
+    def observe(self, version):
+        """Note the shared version read for a request; a newer one drops every stored response."""
+        with self._lock:
+            if self.version is None or version > self.version:
+                self.version = version
+                self._entries.clear()
+                self._bytes = 0
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def put(self, key, body, mimetype, headers):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key[0] != self.version:
+                return  # built from data a write has since replaced
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, mimetype, headers)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes, version=self.version)
+
+    def _drop(self, key):
+        self._bytes -= len(self._entries.pop(key)[0])
+
+_caches_lock = threading.Lock()
+
+def get_response_cache(name):
+    """The app's response cache for `name` (one per app, like the review scheduler)."""
+    caches = current_app.extensions.setdefault('response_caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = caches.get(name)
+            if cache is None:
+                cache = caches[name] = ResponseCache(max_entries=current_app.config['RESPONSE_CACHE_SIZE'],
+                                                     max_bytes=current_app.config['RESPONSE_CACHE_MAX_BYTES'])
+    return cache
+
+def current_version(name):
+    version = db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+    return version if version is not None else 0
+
+def bump_version(name):
+    """Record a write to the data behind `name`'s responses; commits with the caller's transaction."""
+    table = CacheVersion.__table__
+    bump = table.update().where(table.c.name == name).values(version=table.c.version + 1)
+    if db.session.execute(bump).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            # Start from the clock, so ETags from before a database reset don't match
+            db.session.execute(table.insert(), {'name': name, 'version': time.time_ns() // 1000})
+    except IntegrityError:
+        db.session.execute(bump)  # Created concurrently
+
+def versioned(name):
+    """Serve a GET view with a strong ETag for `name`'s version, caching its 200 responses.
+
+    The shared version is read once per request, before the view runs. A
+    matching If-None-Match is answered 304 with no other query.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache(name)
+            # Read the version before the view reads any data
+            version = current_version(name)
+            cache.observe(version)
+            etag = f'{name}-{version}'
+            if request.if_none_match.contains(etag):
+                cache.count('not_modified')
+                return _conditional(Response(status=304), etag)
+            key = (version, request.base_url, tuple(sorted(request.args.items(multi=True))))
+            hit = cache.get(key)
+            if hit is not None:
+                body, mimetype, headers = hit
+                return _conditional(Response(body, mimetype=mimetype, headers=headers), etag)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            headers = {header: response.headers[header] for header in CACHED_HEADERS if header in response.headers}
+            store = lambda body: cache.put(key, body, response.mimetype, headers)
+            if response.is_streamed:
+                # Keep streaming; the body is stored only if it completes within the size bound
+                response.response = _tee(response.response, store, cache.max_bytes)
+            else:
+                store(response.get_data())
+            return _conditional(response, etag)
+        return wrapper
+    return decorator
+
+def _conditional(response, etag):
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['RESPONSE_CACHE_MAX_AGE']
+    response.cache_control.must_revalidate = True
+    return response
+
+def _tee(chunks, store, limit):
+    parts, size = [], 0
+    try:
+        for chunk in chunks:
+            if parts is not None:
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                size += len(data)
+                if size <= limit:
+                    parts.append(data)
+                else:
+                    parts = None
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+    if parts is not None:
+        store(b''.join(parts))
@@ -0,0 +1,253 @@
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+from flask import g, request, Response, current_app, has_request_context
+from sqlalchemy import event
+from .extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket (as histogram_quantile does)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+class Metrics:
+    """Labelled counters and histograms plus scrape-time collectors, rendered as Prometheus text."""
+    def __init__(self, prefix='iipp'):
+        self.prefix = prefix
+        self._counters = {}  # name -> {labels: value}
+        self._histograms = {}  # name -> {labels: Histogram}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def collector(self, fn):
+        """Register fn() -> iterable of (name, type, help, [(labels dict, value)]) read at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+
+        def header(name, kind):
+            full = f'{self.prefix}_{name}'
+            if name in self._help:
+                lines.append(f'# HELP {full} {self._help[name]}')
+            lines.append(f'# TYPE {full} {kind}')
+            return full
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = header(name, 'counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{full}{_format_labels(labels)} {value}')
+            quantiles = []
+            for name, series in sorted(self._histograms.items()):
+                full = header(name, 'histogram')
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{full}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+                    lines.append(f'{full}_sum{_format_labels(labels)} {histogram.sum}')
+                    lines.append(f'{full}_count{_format_labels(labels)} {histogram.count}')
+                    quantiles.append((name, labels, [round(histogram.quantile(q), 6) for q in QUANTILES]))
+        # Pre-computed p50/p95/p99 for dashboards without histogram_quantile
+        for name in dict.fromkeys(name for name, _, _ in quantiles):
+            full = header(f'{name}_quantile', 'gauge')
+            for series_name, labels, values in quantiles:
+                if series_name == name:
+                    for q, value in zip(QUANTILES, values):
+                        lines.append(f'{full}{_format_labels(labels + (("quantile", q),))} {value}')
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                self.describe(name, help_text)
+                full = header(name, kind)
+                for labels, value in samples:
+                    lines.append(f'{full}{_format_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+def _route_labels():
+    rule = request.url_rule
+    return {
+        'blueprint': request.blueprint or '',
+        # The rule, not the path, so ids do not create a series each
+        'route': rule.rule if rule is not None else '<unmatched>',
+        'method': request.method
+    }
+
+def _record(app, metrics, state, status):
+    elapsed = time.perf_counter() - state['started']
+    labels = state['labels']
+    metrics.inc('http_requests_total', status=status, **labels)
+    metrics.observe('http_request_duration_seconds', elapsed, **labels)
+    metrics.observe('blueprint_request_duration_seconds', elapsed, blueprint=labels['blueprint'])
+    metrics.observe('http_request_sql_statements', state['sql_count'], buckets=SQL_COUNT_BUCKETS, **labels)
+    metrics.observe('http_request_sql_seconds', state['sql_seconds'], **labels)
+    profiler = state.get('profiler')
+    if profiler is None:
+        return
+    profiler.disable()
+    if elapsed * 1000 >= app.config['PROFILE_SLOW_MS']:
+        _dump_profile(app, profiler, labels, elapsed)
+        metrics.inc('slow_request_profiles_total', **labels)
+
+def _dump_profile(app, profiler, labels, elapsed):
+    directory = os.path.join(app.instance_path, app.config['PROFILE_DIR'])
+    os.makedirs(directory, exist_ok=True)
+    route = ''.join(c if c.isalnum() else '_' for c in labels['route']).strip('_') or 'root'
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}_{labels['method']}_{route}_{int(elapsed * 1000)}ms.prof"
+    profiler.dump_stats(os.path.join(directory, name))
+    # Keep only the newest dumps
+    dumps = sorted((f for f in os.listdir(directory) if f.endswith('.prof')),
+                   key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+    for old in dumps[:-app.config['PROFILE_KEEP']]:
+        os.remove(os.path.join(directory, old))
+
+def init_metrics(app):
+    """Instrument requests and SQL, and serve everything on /api/metrics."""
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+    metrics.describe('http_requests_total', 'Requests by route and status.')
+    metrics.describe('http_request_duration_seconds', 'Request latency by route, including streamed bodies.')
+    metrics.describe('blueprint_request_duration_seconds', 'Request latency by blueprint.')
+    metrics.describe('http_request_sql_statements', 'SQL statements executed per request.')
+    metrics.describe('http_request_sql_seconds', 'Time spent in SQL per request.')
+    metrics.describe('sql_statements_total', 'SQL statements executed outside a request (startup, CLI, workers).')
+    metrics.describe('slow_request_profiles_total', 'cProfile dumps written for slow sampled requests.')
+
+    @app.before_request
+    def start_request_metrics():
+        state = g._metrics = {'started': time.perf_counter(), 'sql_count': 0, 'sql_seconds': 0.0,
+                              'labels': _route_labels()}
+        # Opt-in sampling: profile a fraction of requests and keep the slow ones
+        rate = app.config['PROFILE_SAMPLE_RATE']
+        if rate > 0 and random.random() < rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is already active in this thread
+                return
+            state['profiler'] = profiler
+
+    @app.after_request
+    def finish_request_metrics(response):
+        state = g.get('_metrics')
+        if state is None:
+            return response
+        if response.is_streamed:
+            # The body is still being produced, so record when the server closes the response
+            response.call_on_close(lambda: _record(app, metrics, state, response.status_code))
+        else:
+            _record(app, metrics, state, response.status_code)
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_metrics_started'].pop()
+        state = g.get('_metrics') if has_request_context() else None
+        if state is None:
+            metrics.inc('sql_statements_total')
+            return
+        state['sql_count'] += 1
+        state['sql_seconds'] += elapsed
+
+    metrics.collector(_service_metrics)
+
+    @app.route('/api/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
+
+def _service_metrics():
+    from app.features.question import routes as question_routes
+    from app.services.execution_service import current_pool, get_cache
+    lookups = question_routes.trie.lookups
+    yield ('trie_lookups_total', 'counter', 'Prefix searches by outcome since the last index rebuild.',
+           [({'result': result}, count) for result, count in sorted(lookups.items())])
+    pool = current_pool()
+    if pool is not None:
+        stats = pool.stats()
+        yield ('execution_pool_acquires_total', 'counter', 'Interpreter acquisitions by kind.',
+               [({'kind': 'warm'}, stats['warm_hits']), ({'kind': 'cold'}, stats['cold_starts'])])
+        yield ('execution_pool_rejections_total', 'counter', 'Jobs turned away because every slot stayed busy.',
+               [({}, stats['rejected'])])
+        yield ('execution_pool_wait_seconds_total', 'counter', 'Total time spent waiting for an interpreter.',
+               [({}, round(stats['wait_ms_avg'] * stats['jobs'] / 1000, 6))])
+        yield ('execution_pool_wait_seconds_max', 'gauge', 'Longest wait for an interpreter.',
+               [({}, stats['wait_ms_max'] / 1000)])
+        yield ('execution_pool_idle', 'gauge', 'Warm interpreters ready.', [({}, stats['idle'])])
+    cache = get_cache(current_app.config)
+    if cache is not None:
+        stats = cache.stats()
+        yield ('execution_cache_lookups_total', 'counter', 'Execution cache lookups by outcome.',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        yield ('execution_cache_hit_ratio', 'gauge', 'Execution cache hits / lookups.', [({}, stats['hit_rate'])])
+    caches = sorted(current_app.extensions.get('response_caches', {}).items())
+    if caches:
+        stats = [(name, cache.stats()) for name, cache in caches]
+        yield ('response_cache_requests_total', 'counter', 'Cached GET requests by outcome (not_modified: 304).',
+               [({'cache': name, 'result': result}, s[key]) for name, s in stats
+                for result, key in (('hit', 'hits'), ('miss', 'misses'), ('not_modified', 'not_modified'))])
+        yield ('response_cache_bytes', 'gauge', 'Serialized bytes held by each response cache.',
+               [({'cache': name}, s['bytes']) for name, s in stats])
@@ -0,0 +1,73 @@
+from itertools import islice
+from urllib.parse import urlencode
+from flask import request, current_app, Response, stream_with_context
+from .extensions import db
+
+# Rows serialized per streamed chunk
+STREAM_CHUNK_SIZE = 500
+MAX_PAGE_LIMIT = 1000
+
+def keyset_args(max_limit=MAX_PAGE_LIMIT):
+    """Parse ?after_id=&limit=; limit is None when the client wants everything."""
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), max_limit)
+    return after_id, limit
+
+def projection(allowed):
+    """Fields requested with ?fields=a,b (all of `allowed` when absent); id is always included."""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(allowed)
+    fields = list(dict.fromkeys(f.strip() for f in requested.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ['id'] + [f for f in fields if f != 'id']
+
+def page_bounds(id_query, id_column, after_id, limit):
+    """Narrow a query to one keyset page and return it with the next cursor (None on the last page).
+
+    Only ids are read to find the page's end, so the row query can then be
+    streamed without knowing up front whether another page follows.
+    """
+    if after_id is not None:
+        id_query = id_query.filter(id_column > after_id)
+    if limit is None:
+        return id_query, None
+    ids = [row[0] for row in id_query.with_entities(id_column).order_by(id_column).limit(limit + 1)]
+    if len(ids) <= limit:
+        return id_query, None
+    return id_query.filter(id_column <= ids[limit - 1]), ids[limit - 1]
+
+def next_page_headers(next_after_id):
+    if next_after_id is None:
+        return {}
+    query = urlencode(dict(request.args, after_id=next_after_id))
+    return {'X-Next-After-Id': str(next_after_id), 'Link': f'<{request.base_url}?{query}>; rel="next"'}
+
+def stream_json(rows, schema, headers=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Respond with a JSON array, serializing `rows` chunk_size at a time so memory stays bounded."""
+    # Schemas with a bulk path (SubmissionSchema.dump_many) skip marshmallow's per-row dispatch
+    dump_many = getattr(schema, 'dump_many', None) or (lambda chunk: schema.dump(chunk, many=True))
+    # Queries built in the view are bound to this session object
+    session = db.session()
+
+    def generate():
+        try:
+            iterator = iter(rows)
+            separator = '['
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                yield separator + ','.join(current_app.json.dumps(item) for item in dump_many(chunk))
+                separator = ','
+            yield '[]' if separator == '[' else ']'
+        finally:
+            # The request's teardown ran before the body was produced, so the
+            # connection the rows were read through is returned to the pool here
+            session.close()
+            db.session.remove()
+    return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
@@ -1,8 +1,30 @@
 from app.core.extensions import db
 
+def normalize_tags(tags):
+    """Split a comma-separated tag string into unique, lower-cased tag names (order kept)."""
+    return list(dict.fromkeys(t.strip().lower() for t in (tags or '').split(',') if t.strip()))
+
+question_tags = db.Table(
+    'question_tag',
+    db.Column('question_id', db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id', ondelete='CASCADE'), primary_key=True, index=True)
+)
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), unique=True, nullable=False)
+
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=False)
     difficulty = db.Column(db.String(20), nullable=False)
-    tags = db.Column(db.String(200)) 
\ No newline at end of file
+    tags = db.Column(db.String(200))
+
+    # Normalized copy of `tags`, kept in step by sync_tags(); the string stays the API format
+    tag_set = db.relationship('Tag', secondary=question_tags, backref='questions')
+
+    def sync_tags(self):
+        names = normalize_tags(self.tags)
+        existing = {t.name: t for t in Tag.query.filter(Tag.name.in_(names))} if names else {}
+        self.tag_set = [existing.get(name) or Tag(name=name) for name in names]
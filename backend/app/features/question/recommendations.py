@@ -1,22 +1,55 @@
-from flask import Blueprint, jsonify, request
-from .models import Question
-from app.features.submission.models import Submission
-import random
+from flask import Blueprint, jsonify, request, current_app
+import click
+from datetime import datetime
+from app.services.ml_service import recommend_questions as recommend, recommend_cf, build_cosolve_index, get_catalog
+from app.services.review_service import get_review_scheduler, rebuild_reviews
+import os
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
+REVIEW_DEFAULT_LIMIT = 10
+REVIEW_MAX_LIMIT = 100
+
 @recommendations_bp.route('/', methods=['GET'])
 def recommend_questions():
-    user_id = request.args.get('user_id')
-    if user_id:
-        # Get all solved question IDs for this user
-        solved_ids = {s.question_id for s in Submission.query.filter_by(user_id=user_id, status='solved').all()}
-        # Recommend questions not yet solved
-        questions = Question.query.filter(~Question.id.in_(solved_ids)).all()
-        if not questions:
-            # If all solved, fallback to random
-            questions = Question.query.all()
-    else:
-        questions = Question.query.all()
-    recommended = random.sample(questions, min(5, len(questions))) if questions else []
-    return jsonify([{'id': q.id, 'title': q.title, 'difficulty': q.difficulty} for q in recommended]) 
\ No newline at end of file
+    # Without a user_id every question scores the same, so the picks are random
+    user_id = request.args.get('user_id', type=int)
+    if request.args.get('strategy') == 'cf':
+        # "Users who solved X also solved Y", from the offline co-solve index
+        return jsonify(recommend_cf(user_id, current_app.config, current_app.instance_path))
+    return jsonify(recommend(user_id))
+
+@recommendations_bp.route('/review', methods=['GET'])
+def review_questions():
+    # Solved questions due for spaced-repetition review, most overdue first
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        return jsonify({'error': 'user_id required'}), 400
+    limit = min(max(request.args.get('limit', REVIEW_DEFAULT_LIMIT, type=int), 1), REVIEW_MAX_LIMIT)
+    scheduler = get_review_scheduler()
+    due = scheduler.due(user_id, datetime.utcnow(), limit)
+    catalog = get_catalog()
+    rows = catalog.rows_for([question_id for question_id, _ in due])
+    summaries = {catalog.summaries[i]['id']: catalog.summaries[i] for i in rows}
+    upcoming = scheduler.upcoming(user_id)
+    return jsonify({
+        'due': [dict(summaries[question_id], due_at=due_at.isoformat())
+                for question_id, due_at in due if question_id in summaries],
+        'next_due_at': upcoming[1].isoformat() if upcoming else None
+    })
+
+@recommendations_bp.cli.command('rebuild-reviews')
+def rebuild_reviews_command():
+    """Replay submission history into the spaced-repetition schedule."""
+    click.echo(f'Scheduled {rebuild_reviews()} review(s)')
+    current_app.extensions.pop('review_scheduler', None)
+
+@recommendations_bp.cli.command('build-cf')
+@click.option('--top-k', default=20, show_default=True, help='Neighbours kept per question.')
+def build_cf_command(top_k):
+    """Precompute the co-solve index used by ?strategy=cf."""
+    path = os.path.join(current_app.instance_path, current_app.config['CF_INDEX_PATH'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stats = build_cosolve_index(path, top_k=top_k)
+    click.echo(f"Indexed {stats['questions']} questions, {stats['pairs']} neighbour pairs "
+               f"(submissions up to id {stats['watermark']}) into {path}")
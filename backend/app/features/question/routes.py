@@ -1,27 +1,232 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from bisect import bisect_right
+from itertools import islice
+import json
+import threading
+import click
+from sqlalchemy import bindparam
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
-from .models import Question
+from .models import Question, Tag, question_tags, normalize_tags
 from .schemas import QuestionSchema
 from app.core.extensions import db
-from app.services.dsa_service import Trie
+from app.core.http_cache import versioned, bump_version
+from app.core.pagination import keyset_args, projection, page_bounds, next_page_headers, stream_json, \
+    STREAM_CHUNK_SIZE
+from app.features.submission.models import Submission
+from app.services.dsa_service import RadixTrie, Graph
+from app.services.dedup_service import NearDuplicateIndex
+from app.services.search_service import InvertedIndex, BitmapIndex
+from app.services.ml_service import invalidate_catalog, get_catalog, question_text, SimilarityIndex
 
 questions_bp = Blueprint('questions', __name__)
 question_schema = QuestionSchema()
 questions_schema = QuestionSchema(many=True)
 
 # In-memory Trie for demo (should be persisted in production)
-trie = Trie()
+trie = RadixTrie()
+# Full-text index over title, tags and description, weighted in that order
+QUESTION_FIELD_WEIGHTS = {'title': 3, 'tags': 2, 'description': 1}
+text_index = InvertedIndex(QUESTION_FIELD_WEIGHTS)
+# Precomputed TF-IDF nearest neighbours for /<id>/similar
+similar_index = SimilarityIndex()
+# Writes made while a background refit runs, as (question id, text or None for a delete);
+# None when no refit is running
+_similar_journal = None
+_similar_lock = threading.Lock()
+_similar_refit = None
+# MinHash/LSH over descriptions to reject reworded copies on POST/PUT (configured by create_app)
+duplicate_index = NearDuplicateIndex()
+# Per-tag and per-difficulty bitmaps for GET /?tags=&difficulty=
+filter_index = BitmapIndex()
 
-def refresh_trie():
-    trie.__init__()
-    for q in Question.query.all():
-        trie.insert(q.title.lower())
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 100
+QUESTION_FIELDS = ('id', 'title', 'description', 'difficulty', 'tags')
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+FILTER_FETCH_CHUNK = 500
+# Shared version bumped in the transaction of every question write (ETags, response cache)
+CATALOG = 'questions'
+
+def _summary(question):
+    return {
+        'id': question.id,
+        'title': question.title,
+        'difficulty': question.difficulty,
+        'tags': question.tags
+    }
+
+def _text_fields(question):
+    return {'title': question.title, 'tags': question.tags, 'description': question.description}
+
+def _filter_fields(question):
+    return {'tags': normalize_tags(question.tags), 'difficulty': [question.difficulty.lower()]}
+
+def configure_search_indexes(config):
+    """Apply config to the in-memory indexes, whether or not they are warmed at startup."""
+    global duplicate_index
+    duplicate_index = NearDuplicateIndex(threshold=config['DUPLICATE_THRESHOLD'])
+
+def refresh_search_indexes():
+    """Rebuild the Trie, full-text and similarity indexes from the database and swap them in atomically."""
+    global trie, text_index, duplicate_index, filter_index
+    solves = dict(db.session.query(Submission.question_id, db.func.count(Submission.id))
+                  .filter(Submission.status == 'solved')
+                  .group_by(Submission.question_id).all())
+    rows = db.session.query(Question.id, Question.title, Question.difficulty, Question.tags).all()
+    trie = RadixTrie.build(((row.title, row.id, _summary(row), solves.get(row.id, 0)) for row in rows),
+                           top_k=SEARCH_DEFAULT_LIMIT)
+    # Tag bitmaps come from the normalized question_tag table, not the strings
+    tags = {}
+    for question_id, name in db.session.query(question_tags.c.question_id, Tag.name) \
+            .join(Tag, Tag.id == question_tags.c.tag_id):
+        tags.setdefault(question_id, []).append(name)
+    filter_index = BitmapIndex.build((row.id, {'tags': tags.get(row.id, []), 'difficulty': [row.difficulty.lower()]})
+                                     for row in rows)
+    # Stream descriptions rather than holding every row at once
+    new_text_index = InvertedIndex(QUESTION_FIELD_WEIGHTS)
+    new_duplicate_index = NearDuplicateIndex(threshold=current_app.config['DUPLICATE_THRESHOLD'])
+    for q in db.session.query(Question).yield_per(1000):
+        new_text_index.add(q.id, _text_fields(q), _summary(q))
+        new_duplicate_index.add(q.id, q.description)
+    text_index, duplicate_index = new_text_index, new_duplicate_index
+    refresh_similar_index()
+
+def refresh_similar_index():
+    global similar_index
+    index = _build_similar_index()
+    with _similar_lock:
+        similar_index = index
+
+def _build_similar_index():
+    documents = db.session.query(Question).yield_per(1000)
+    return SimilarityIndex.build((q.id, question_text(q.title, q.tags, q.description)) for q in documents)
+
+def _update_similar_index(question_id, text=None):
+    """Apply one write (text None: a delete) to the similarity index, refitting it when due."""
+    with _similar_lock:
+        if text is None:
+            similar_index.remove(question_id)
+        else:
+            similar_index.add(question_id, text)
+        if _similar_journal is not None:
+            _similar_journal.append((question_id, text))
+        due, fitted = similar_index.needs_refit, similar_index.fitted
+    if not due:
+        return
+    if fitted:
+        _start_similar_refit()
+    else:
+        # Nothing is served until the first fit, and the bank is tiny at that point
+        refresh_similar_index()
+
+def _start_similar_refit():
+    """Refit the TF-IDF vocabulary in a background thread; the writing request doesn't wait for it."""
+    global _similar_journal, _similar_refit
+    with _similar_lock:
+        if _similar_journal is not None:
+            return  # Already running
+        _similar_journal = []
+    _similar_refit = threading.Thread(target=_refit_similar_index, args=(current_app._get_current_object(),),
+                                      daemon=True)
+    _similar_refit.start()
+
+def _refit_similar_index(app):
+    global similar_index, _similar_journal
+    index = None
+    try:
+        with app.app_context():
+            index = _build_similar_index()
+    except Exception:
+        app.logger.exception('Similarity index refit failed')
+    finally:
+        with _similar_lock:
+            if index is not None:
+                # Replay writes the build's snapshot may have missed, then swap
+                for question_id, text in _similar_journal:
+                    if text is None:
+                        index.remove(question_id)
+                    else:
+                        index.add(question_id, text)
+                similar_index = index
+            _similar_journal = None
+
+def _index_question(question, old_title=None):
+    """Apply a single question write to the in-memory indexes."""
+    if old_title is None:
+        trie.insert(question.title, item_id=question.id, data=_summary(question))
+    else:
+        trie.rename(old_title, question.title, item_id=question.id, data=_summary(question))
+    text_index.add(question.id, _text_fields(question), _summary(question))
+    filter_index.add(question.id, _filter_fields(question))
+    duplicate_index.add(question.id, question.description)
+    # The TF-IDF vocabulary is fixed at fit time; this refits once enough new questions arrived
+    _update_similar_index(question.id, question_text(question.title, question.tags, question.description))
+    invalidate_catalog()
+
+def _unindex_question(question_id, title):
+    trie.delete(title, item_id=question_id)
+    text_index.remove(question_id)
+    filter_index.remove(question_id)
+    duplicate_index.remove(question_id)
+    _update_similar_index(question_id)
+    invalidate_catalog()
+
+def _near_duplicates(description, exclude=None):
+    """Existing questions whose description is a near copy (LSH lookup, not a table scan)."""
+    if request.args.get('force') == 'true':
+        return []
+    matches = duplicate_index.query(description, exclude=exclude)
+    if not matches:
+        return []
+    titles = dict(db.session.query(Question.id, Question.title)
+                  .filter(Question.id.in_([doc_id for doc_id, _ in matches])).all())
+    return [{'id': doc_id, 'title': titles[doc_id], 'similarity': similarity}
+            for doc_id, similarity in matches if doc_id in titles]
+
+def adjust_solve_count(question_id, delta):
+    """Keep search ranking in step with solved submissions."""
+    trie.add_score(question_id, delta)
 
 @questions_bp.route('/', methods=['GET'])
+@versioned(CATALOG)
 def get_questions():
-    questions = Question.query.all()
-    return jsonify(questions_schema.dump(questions))
+    tags = normalize_tags(request.args.get('tags'))
+    difficulty = normalize_tags(request.args.get('difficulty'))
+    match = request.args.get('match', 'all')
+    if match not in ('all', 'any'):
+        return jsonify({'error': "match must be 'all' or 'any'"}), 400
+    try:
+        fields = projection(QUESTION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    after_id, limit = keyset_args()
+    # Only the projected columns are selected, so ?fields=id,title never reads descriptions
+    columns = [getattr(Question, field) for field in fields]
+    if not tags and not difficulty:
+        query, next_after_id = page_bounds(db.session.query(*columns), Question.id, after_id, limit)
+        rows = query.order_by(Question.id).yield_per(STREAM_CHUNK_SIZE)
+    else:
+        # Intersect the bitmaps first, then fetch only the matching rows
+        filters = {'tags': tags} if tags else {}
+        if difficulty:
+            filters['difficulty'] = difficulty
+        ids = filter_index.filter(filters, match_all={'tags'} if match == 'all' else None)
+        if after_id is not None:
+            ids = ids[bisect_right(ids, after_id):]
+        next_after_id = ids[limit - 1] if limit is not None and len(ids) > limit else None
+        rows = _rows_by_id(columns, ids[:limit])
+    return stream_json(rows, QuestionSchema(only=fields), next_page_headers(next_after_id))
+
+def _rows_by_id(columns, ids):
+    for chunk in _in_chunks(ids):
+        yield from db.session.query(*columns).filter(Question.id.in_(chunk)).order_by(Question.id)
+
+def _in_chunks(values):
+    """Slices of values short enough for one IN (...) list."""
+    values = list(values)
+    for start in range(0, len(values), FILTER_FETCH_CHUNK):
+        yield values[start:start + FILTER_FETCH_CHUNK]
 
 @questions_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -32,10 +237,15 @@ def add_question():
         return jsonify({'error': 'Validation failed', 'messages': err.messages}), 422
     if Question.query.filter_by(title=data['title']).first():
         return jsonify({'error': 'Question already exists'}), 409
+    duplicates = _near_duplicates(data['description'])
+    if duplicates:
+        return jsonify({'error': 'Possible duplicate question', 'candidates': duplicates}), 409
     question = Question(**data)
+    question.sync_tags()
     db.session.add(question)
+    bump_version(CATALOG)
     db.session.commit()
-    refresh_trie()
+    _index_question(question)
     return jsonify(question_schema.dump(question)), 201
 
 @questions_bp.route('/<int:question_id>', methods=['PUT'])
@@ -47,31 +257,58 @@ def update_question(question_id):
         validated = question_schema.load(data, partial=True)
     except ValidationError as err:
         return jsonify({'errors': err.messages}), 400
+    if 'description' in validated:
+        duplicates = _near_duplicates(validated['description'], exclude=question_id)
+        if duplicates:
+            return jsonify({'error': 'Possible duplicate question', 'candidates': duplicates}), 409
+    old_title = question.title
     for key, value in validated.items():
         setattr(question, key, value)
+    if 'tags' in validated:
+        question.sync_tags()
+    bump_version(CATALOG)
     db.session.commit()
-    refresh_trie()
+    _index_question(question, old_title=old_title)
     return jsonify(question_schema.dump(question))
 
 @questions_bp.route('/<int:question_id>', methods=['DELETE'])
 @jwt_required()
 def delete_question(question_id):
     question = Question.query.get_or_404(question_id)
+    title = question.title
     db.session.delete(question)
+    bump_version(CATALOG)
     db.session.commit()
-    refresh_trie()
+    _unindex_question(question_id, title)
     return jsonify({'message': 'Question deleted'})
 
 @questions_bp.route('/search', methods=['GET'])
 def search_questions():
-    prefix = request.args.get('q', '')
-    if not prefix:
+    query = request.args.get('q', '')
+    if not query:
         return jsonify([])
-    titles = trie.autocomplete(prefix)
-    questions = Question.query.filter(db.func.lower(Question.title).in_([t.lower() for t in titles])).all()
-    return jsonify(questions_schema.dump(questions))
+    limit = min(max(request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int), 1), SEARCH_MAX_LIMIT)
+    if request.args.get('mode') == 'text':
+        # Ranked multi-term search over title, tags and description (BM25)
+        results = text_index.search(query, limit)
+        return jsonify([dict(data, score=round(score, 4)) for data, score in results])
+    # Prefix search answered from the Trie's cached top-k lists, ranked by solve count
+    return jsonify(trie.top(query, limit))
+
+@questions_bp.route('/<int:question_id>/similar', methods=['GET'])
+def similar_questions(question_id):
+    if question_id not in similar_index:
+        Question.query.get_or_404(question_id)
+    limit = min(max(request.args.get('limit', similar_index.top_k, type=int), 1), similar_index.top_k)
+    neighbors = similar_index.similar(question_id, limit)
+    catalog = get_catalog()
+    rows = catalog.rows_for([neighbor_id for neighbor_id, _ in neighbors])
+    summaries = {catalog.summaries[i]['id']: catalog.summaries[i] for i in rows}
+    return jsonify([dict(summaries[neighbor_id], score=score)
+                    for neighbor_id, score in neighbors if neighbor_id in summaries])
 
 @questions_bp.route('/<int:question_id>', methods=['GET'])
+@versioned(CATALOG)
 def get_question(question_id):
     q = Question.query.get_or_404(question_id)
     return jsonify({
@@ -80,4 +317,125 @@ def get_question(question_id):
         'description': q.description,
         'difficulty': q.difficulty,
         'tags': q.tags
-    }) 
\ No newline at end of file
+    }) 
+
+@questions_bp.cli.command('find-duplicates')
+@click.option('--threshold', type=click.FloatRange(0, 1, min_open=True), default=None,
+              help='Jaccard threshold (default: DUPLICATE_THRESHOLD).')
+def find_duplicates_command(threshold):
+    """Print clusters of near-duplicate questions in the existing bank."""
+    index = NearDuplicateIndex(threshold=threshold or current_app.config['DUPLICATE_THRESHOLD'])
+    titles = {}
+    for q in db.session.query(Question.id, Question.title, Question.description).yield_per(1000):
+        index.add(q.id, q.description)
+        titles[q.id] = q.title
+    graph = Graph()
+    for a, b, _ in index.pairs():
+        graph.add_edge(a, b)
+    clusters = sorted((sorted(c) for c in graph.connected_components()), key=lambda c: (-len(c), c[0]))
+    for cluster in clusters:
+        click.echo(', '.join(f'{qid}: {titles[qid]}' for qid in cluster))
+    click.echo(f'{len(clusters)} duplicate cluster(s) among {len(titles)} questions')
+
+# Rows upserted per transaction by `flask questions import`
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_FIELDS = ('title', 'description', 'difficulty', 'tags')
+
+@questions_bp.cli.command('export')
+@click.argument('output', type=click.File('w'), default='-')
+def export_questions_command(output):
+    """Write the question bank as NDJSON (one question per line) to OUTPUT or stdout."""
+    count = 0
+    columns = [getattr(Question, field) for field in EXPORT_FIELDS]
+    for row in db.session.query(*columns).order_by(Question.id).yield_per(IMPORT_CHUNK_SIZE):
+        output.write(json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n')
+        count += 1
+    click.echo(f'Exported {count} question(s)', err=True)
+
+@questions_bp.cli.command('import')
+@click.argument('source', type=click.File('r'), default='-')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True, help='Rows per transaction.')
+@click.option('--skip-existing', is_flag=True, help='Leave questions whose title already exists untouched.')
+@click.option('--no-reindex', is_flag=True, help='Skip the final index rebuild (servers rebuild at startup).')
+def import_questions_command(source, chunk_size, skip_existing, no_reindex):
+    """Upsert NDJSON questions from SOURCE or stdin, keyed on title.
+
+    The search indexes are rebuilt once at the end rather than per row;
+    running servers load them at startup.
+    """
+    lines = ((number, line) for number, line in enumerate(source, start=1) if line.strip())
+    totals = {'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        rows = []
+        for number, line in chunk:
+            try:
+                rows.append((number, json.loads(line)))
+            except ValueError as e:
+                click.echo(f'line {number}: invalid JSON: {e}', err=True)
+                totals['failed'] += 1
+        try:
+            loaded = question_schema.load([row for _, row in rows], many=True)
+            invalid = {}
+        except ValidationError as err:
+            loaded, invalid = err.valid_data, err.messages
+        valid = []
+        for i, ((number, _), row) in enumerate(zip(rows, loaded)):
+            if i in invalid:
+                click.echo(f'line {number}: {invalid[i]}', err=True)
+                totals['failed'] += 1
+            else:
+                valid.append(row)
+        for outcome, count in upsert_questions(valid, skip_existing).items():
+            totals[outcome] += count
+    if not no_reindex:
+        refresh_search_indexes()
+        invalidate_catalog()
+    click.echo(', '.join(f'{count} {outcome}' for outcome, count in totals.items()))
+
+def upsert_questions(rows, skip_existing=False):
+    """Insert or update validated question dicts keyed on title, in one transaction.
+
+    A fixed number of statements per FILTER_FETCH_CHUNK rows: existence
+    checks, executemany inserts and updates, and the question_tag links
+    replaced in bulk. Later rows win when a title repeats.
+    """
+    by_title = {row['title']: dict(row, tags=row.get('tags')) for row in rows}
+    if not by_title:
+        return {'inserted': 0, 'updated': 0, 'skipped': 0}
+    existing = {}
+    for titles in _in_chunks(by_title):
+        existing.update(db.session.query(Question.title, Question.id).filter(Question.title.in_(titles)))
+    new = [row for title, row in by_title.items() if title not in existing]
+    changed = [] if skip_existing else \
+        [dict(row, question_id=existing[title]) for title, row in by_title.items() if title in existing]
+    table = Question.__table__
+    if new:
+        db.session.execute(table.insert(), new)
+        for titles in _in_chunks(row['title'] for row in new):
+            existing.update(db.session.query(Question.title, Question.id).filter(Question.title.in_(titles)))
+    if changed:
+        db.session.execute(table.update().where(table.c.id == bindparam('question_id')),
+                           [{field: row[field] for field in EXPORT_FIELDS + ('question_id',)} for row in changed])
+        for ids in _in_chunks(row['question_id'] for row in changed):
+            db.session.execute(question_tags.delete().where(question_tags.c.question_id.in_(ids)))
+    written = new + changed
+    names = {name for row in written for name in normalize_tags(row['tags'])}
+    tag_ids = {}
+    for chunk in _in_chunks(names):
+        tag_ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)))
+    missing = [{'name': name} for name in names if name not in tag_ids]
+    if missing:
+        db.session.execute(Tag.__table__.insert(), missing)
+        for chunk in _in_chunks(m['name'] for m in missing):
+            tag_ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)))
+    links = [{'question_id': existing[row['title']], 'tag_id': tag_ids[name]}
+             for row in written for name in normalize_tags(row['tags'])]
+    if links:
+        db.session.execute(question_tags.insert(), links)
+    if written:
+        bump_version(CATALOG)
+    db.session.commit()
+    return {'inserted': len(new), 'updated': len(changed), 'skipped': len(by_title) - len(written)}
@@ -0,0 +1,37 @@
+from flask import Blueprint, jsonify, request
+from app.core.extensions import db
+from app.features.user.models import User
+from app.services.leaderboard_service import get_leaderboards
+
+leaderboard_bp = Blueprint('leaderboard', __name__)
+
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+
+def _board():
+    tag = request.args.get('tag', '').strip().lower() or None
+    return tag, get_leaderboards().board(tag)
+
+@leaderboard_bp.route('/', methods=['GET'])
+def top_users():
+    # ?tag=<tag> ranks by distinct problems solved with that tag
+    tag, board = _board()
+    limit = min(max(request.args.get('limit', LEADERBOARD_DEFAULT_LIMIT, type=int), 1), LEADERBOARD_MAX_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    entries = board.top(limit, offset) if board is not None else []
+    names = dict(db.session.query(User.id, User.username)
+                 .filter(User.id.in_([user_id for _, user_id, _ in entries])).all()) if entries else {}
+    return jsonify({
+        'tag': tag,
+        'total': len(board) if board is not None else 0,
+        'entries': [{'rank': rank, 'user_id': user_id, 'username': names.get(user_id), 'solved': solved}
+                    for rank, user_id, solved in entries]
+    })
+
+@leaderboard_bp.route('/rank/<int:user_id>', methods=['GET'])
+def user_rank(user_id):
+    tag, board = _board()
+    ranked = board.rank(user_id) if board is not None else None
+    rank, solved = ranked if ranked is not None else (None, 0)
+    return jsonify({'tag': tag, 'user_id': user_id, 'rank': rank, 'solved': solved,
+                    'total': len(board) if board is not None else 0})
@@ -9,4 +9,47 @@ class Submission(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', backref='submissions')
-    question = db.relationship('Question', backref='submissions') 
\ No newline at end of file
+    question = db.relationship('Question', backref='submissions')
+
+    __table_args__ = (
+        # A user's solved questions (recommendations, stats, co-solve seeds) and history
+        db.Index('ix_submission_user_status', 'user_id', 'status'),
+        # Who solved a question (solve counts, co-solve index)
+        db.Index('ix_submission_question_status', 'question_id', 'status'),
+        # One (user, question) pair's history in order (review replay)
+        db.Index('ix_submission_user_question_time', 'user_id', 'question_id', 'timestamp'),
+    )
+
+class UserStats(db.Model):
+    """Per-user progress aggregates, kept in step with submission writes by stats_service."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    solved_submissions = db.Column(db.Integer, nullable=False, default=0)
+    attempted_questions = db.Column(db.Integer, nullable=False, default=0)
+    solved_questions = db.Column(db.Integer, nullable=False, default=0)
+    solved_by_difficulty = db.Column(db.JSON, nullable=False, default=dict)  # difficulty -> distinct solved
+    solved_by_tag = db.Column(db.JSON, nullable=False, default=dict)  # tag -> distinct solved
+    current_streak = db.Column(db.Integer, nullable=False, default=0)  # consecutive active days ending last_active_date
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_active_date = db.Column(db.Date)
+    last_activity = db.Column(db.DateTime)
+
+class UserQuestionProgress(db.Model):
+    """Submission counts per (user, question), so distinct solved counts survive deletes."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), primary_key=True)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    solves = db.Column(db.Integer, nullable=False, default=0)
+
+class UserActivityDay(db.Model):
+    """Submissions per user per UTC day, the input to streak calculation."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+
+class ReviewItem(db.Model):
+    """Spaced-repetition state of a solved question for one user (see review_service)."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), primary_key=True)
+    level = db.Column(db.Integer, nullable=False, default=1)  # index into REVIEW_INTERVALS, 1-based
+    due_at = db.Column(db.DateTime, nullable=False)
@@ -1,14 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
+import json
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from marshmallow import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 import subprocess
-import tempfile
-import os
-from .models import Submission
-from .schemas import SubmissionSchema
+import pytz
+import click
+from .models import Submission, ReviewItem
+from .schemas import SubmissionSchema, SubmissionImportSchema, DEFAULT_TIMEZONE
 from app.core.extensions import db
+from app.features.user.models import User
+from app.features.question.models import Question
+from app.core.pagination import keyset_args, projection, page_bounds, next_page_headers, stream_json, \
+    STREAM_CHUNK_SIZE
+from app.features.question.routes import adjust_solve_count
+from app.services.stats_service import record_submission_stats, record_batch_stats, remove_submission_stats, \
+    clear_user_stats, user_stats, rebuild_user_stats
+from app.services.leaderboard_service import sync_user, sync_users, get_leaderboards
+from app.services.review_service import record_review, record_batch_reviews, replay_review, get_review_scheduler
+from app.services.execution_service import get_pool, get_job_queue, get_cache, run_cached, QueueFull, \
+    PoolBusy
 
 submissions_bp = Blueprint('submissions', __name__)
 
 submission_schema = SubmissionSchema()
+import_schema = SubmissionImportSchema()
+SUBMISSION_FIELDS = ('id', 'user_id', 'question_id', 'status', 'timestamp')
 
 @submissions_bp.route('/execute', methods=['POST'])
 def execute_code():
@@ -20,28 +40,125 @@ def execute_code():
         return jsonify({'error': 'Only Python is supported for now.'}), 400
     if not code:
         return jsonify({'error': 'No code provided.'}), 400
+    pool = get_pool(current_app.config)
+    timeout = current_app.config['EXECUTION_TIMEOUT']
+    if data.get('stream'):
+        # NDJSON: one {"stream", "data"} line per output chunk, then a final exit line
+        def generate():
+            try:
+                for name, payload in pool.stream(code, stdin, timeout=timeout):
+                    line = dict(payload, stream='exit') if name == 'exit' else {'stream': name, 'data': payload}
+                    yield json.dumps(line) + '\n'
+            except PoolBusy as e:
+                # The response has already started, so the error goes in the stream
+                yield json.dumps({'stream': 'error', 'error': str(e)}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Clients opt in with "cache": true when their code is deterministic
+    cache = get_cache(current_app.config) if data.get('cache') else None
+    run, args = (run_cached, (pool, cache)) if cache is not None else (pool.run, ())
+    if data.get('async'):
+        # Queue the run and return immediately; the client polls /jobs/<job_id>
+        try:
+            job = get_job_queue(current_app.config).submit(_job_owner(), run, *args, code, stdin,
+                                                           timeout=timeout)
+        except QueueFull as e:
+            return jsonify({'error': e.reason}), 429, {'Retry-After': '1'}
+        return jsonify(dict(job.to_dict(), status_url=url_for('.get_job', job_id=job.id))), 202
     try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(code)
-            temp_path = f.name
-        result = subprocess.run(
-            ['python', temp_path],
-            input=stdin.encode(),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=5
-        )
-        os.remove(temp_path)
-        return jsonify({
-            'stdout': result.stdout.decode(),
-            'stderr': result.stderr.decode(),
-            'exit_code': result.returncode
-        })
+        result = run(*args, code, stdin, timeout=timeout)
+        return jsonify(result)
     except subprocess.TimeoutExpired:
         return jsonify({'error': 'Code execution timed out.'}), 400
+    except PoolBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _job_owner():
+    """Identify who a job counts against for per-user limits.
+
+    Only the JWT identity is trusted; anonymous jobs count against the
+    client address, never a user_id taken from the request body.
+    """
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    if identity:
+        return f'user:{identity}'
+    return f'ip:{request.remote_addr}'
+
+@submissions_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    # ?wait=<seconds> long-polls until the job finishes
+    wait = min(max(request.args.get('wait', 0, type=float), 0), current_app.config['EXECUTION_MAX_POLL_WAIT'])
+    job = get_job_queue(current_app.config).wait(job_id, wait)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@submissions_bp.route('/execute/stats', methods=['GET'])
+def execution_stats():
+    stats = get_pool(current_app.config).stats()
+    stats['async_jobs'] = get_job_queue(current_app.config).stats()
+    cache = get_cache(current_app.config)
+    stats['cache'] = cache.stats() if cache is not None else None
+    return jsonify(stats)
+
+@submissions_bp.route('/judge', methods=['POST'])
+def judge_code():
+    data = request.get_json()
+    code = data.get('code')
+    language = data.get('language', 'python')
+    cases = data.get('test_cases')
+    if language != 'python':
+        return jsonify({'error': 'Only Python is supported for now.'}), 400
+    if not code:
+        return jsonify({'error': 'No code provided.'}), 400
+    if not isinstance(cases, list) or not cases:
+        return jsonify({'error': 'test_cases must be a non-empty list.'}), 400
+    if len(cases) > current_app.config['JUDGE_MAX_CASES']:
+        return jsonify({'error': f"At most {current_app.config['JUDGE_MAX_CASES']} test cases allowed."}), 400
+    if not all(isinstance(c, dict) for c in cases):
+        return jsonify({'error': 'Each test case must be an object with input and expected_output.'}), 400
+    cases = [{'input': str(c.get('input', '')), 'expected_output': str(c.get('expected_output', ''))}
+             for c in cases]
+    try:
+        pool = get_pool(current_app.config)
+        results = pool.judge(code, cases, stop_on_failure=bool(data.get('stop_on_first_failure')),
+                             timeout=current_app.config['JUDGE_TIMEOUT'])
+    except PoolBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    passed = sum(1 for r in results if r['verdict'] == 'passed')
+    failed = next((r['verdict'] for r in results if r['verdict'] != 'passed'), None)
+    response = {
+        'verdict': 'accepted' if passed == len(cases) else failed,
+        'passed': passed,
+        'total': len(cases),
+        'cases': results
+    }
+    # Only the server decides whether the question counts as solved
+    user_id, question_id = data.get('user_id'), data.get('question_id')
+    if user_id and question_id:
+        status = 'solved' if response['verdict'] == 'accepted' else 'attempted'
+        response['submission'] = submission_schema.dump(_save_submission(user_id, question_id, status))
+    return jsonify(response)
+
+def _save_submission(user_id, question_id, status):
+    submission = Submission(user_id=user_id, question_id=question_id, status=status)
+    db.session.add(submission)
+    db.session.flush()
+    # Aggregates and the review schedule commit in the same transaction as the submission itself
+    record_submission_stats(submission)
+    review = record_review(submission)
+    db.session.commit()
+    if review is not None:
+        get_review_scheduler().update(user_id, question_id, review.due_at)
+    if status == 'solved':
+        adjust_solve_count(question_id, 1)
+        sync_user(user_id)
+    return submission
+
 @submissions_bp.route('/record', methods=['POST'])
 def record_submission():
     data = request.get_json()
@@ -50,25 +167,180 @@ def record_submission():
     status = data.get('status', 'attempted')
     if not user_id or not question_id:
         return jsonify({'error': 'user_id and question_id required'}), 400
-    submission = Submission(user_id=user_id, question_id=question_id, status=status)
-    db.session.add(submission)
-    db.session.commit()
+    submission = _save_submission(user_id, question_id, status)
     return jsonify(submission_schema.dump(submission)), 201
 
+@submissions_bp.route('/bulk', methods=['POST'])
+def bulk_record_submissions():
+    """Import many submissions from a JSON array or an NDJSON stream (one object per line).
+
+    Rows are validated, inserted and folded into the aggregates a chunk at a
+    time, each chunk in its own transaction. Invalid rows are reported by
+    their 0-based position and skipped; the rest are still imported.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        records = _ndjson_records(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({'error': 'Expected a JSON array, or application/x-ndjson'}), 400
+        records = iter(data)
+    chunk_size = current_app.config['BULK_CHUNK_SIZE']
+    max_errors = current_app.config['BULK_MAX_ERRORS']
+    received = inserted = failed = 0
+    errors = []  # Only the first max_errors are kept, so memory doesn't grow with the upload
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        count, chunk_errors = _import_chunk(chunk, received)
+        inserted += count
+        failed += len(chunk_errors)
+        errors.extend(sorted(chunk_errors.items())[:max_errors - len(errors)])
+        received += len(chunk)
+    return jsonify({
+        'received': received,
+        'inserted': inserted,
+        'failed': failed,
+        'errors': [{'index': index, 'messages': messages} for index, messages in errors]
+    })
+
+def _ndjson_records(stream, block_size=2**16):
+    # Read in blocks: iterating the request stream by line reads it a byte at a time
+    pending = b''
+    for block in iter(lambda: stream.read(block_size), b''):
+        *lines, pending = (pending + block).split(b'\n')
+        yield from _parse_lines(lines)
+    yield from _parse_lines([pending])
+
+def _parse_lines(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+def _import_chunk(chunk, offset):
+    """Insert the valid rows of one chunk in a single transaction.
+
+    Returns (rows inserted, {row index: messages} for the rows that were not).
+    """
+    errors = {}
+    positions, records = [], []
+    for i, record in enumerate(chunk, start=offset):
+        if isinstance(record, ValueError):
+            errors[i] = {'_schema': [f'Invalid JSON: {record}']}
+        else:
+            positions.append(i)
+            records.append(record)
+    try:
+        loaded = import_schema.load(records, many=True)
+        invalid = {}
+    except ValidationError as err:
+        loaded, invalid = err.valid_data, err.messages
+    rows = []
+    for j, (i, row) in enumerate(zip(positions, loaded)):
+        if j in invalid:
+            errors[i] = invalid[j]
+        else:
+            rows.append((i, row))
+    users = {user_id for (user_id,) in db.session.query(User.id)
+             .filter(User.id.in_({row['user_id'] for _, row in rows}))}
+    questions = {question_id for (question_id,) in db.session.query(Question.id)
+                 .filter(Question.id.in_({row['question_id'] for _, row in rows}))}
+    now = datetime.utcnow()
+    valid = []
+    for i, row in rows:
+        messages = {}
+        if row['user_id'] not in users:
+            messages['user_id'] = ['Unknown user.']
+        if row['question_id'] not in questions:
+            messages['question_id'] = ['Unknown question.']
+        if messages:
+            errors[i] = messages
+            continue
+        valid.append((i, {'user_id': row['user_id'], 'question_id': row['question_id'],
+                          'status': row['status'], 'timestamp': row['timestamp'] or now}))
+    if not valid:
+        return 0, errors
+    values = [row for _, row in valid]
+    try:
+        # One executemany for the rows, and one pass over the aggregates for the whole chunk
+        db.session.execute(Submission.__table__.insert(), values)
+        record_batch_stats(values)
+        # Read before the commit expires them, rather than reloading each row afterwards
+        reviews = [(key, review.due_at) for key, review in record_batch_reviews(values).items()]
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.exception('Bulk submission import failed for rows %d-%d', offset, offset + len(chunk) - 1)
+        for i, _ in valid:
+            errors[i] = {'_schema': [f'Not imported: {type(e).__name__}']}
+        return 0, errors
+    scheduler = get_review_scheduler()
+    for (user_id, question_id), due_at in reviews:
+        scheduler.update(user_id, question_id, due_at)
+    solves = Counter(row['question_id'] for row in values if row['status'] == 'solved')
+    for question_id, count in solves.items():
+        adjust_solve_count(question_id, count)
+    sync_users({row['user_id'] for row in values if row['status'] == 'solved'})
+    return len(values), errors
+
 @submissions_bp.route('/user/<int:user_id>', methods=['GET'])
 def get_user_submissions(user_id):
-    submissions = Submission.query.filter_by(user_id=user_id).all()
-    return jsonify(submission_schema.dump(submissions, many=True))
+    try:
+        fields = projection(SUBMISSION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        # ?tz=<tz database name> shows timestamps in the client's timezone
+        schema = SubmissionSchema(only=fields, timezone=request.args.get('tz', DEFAULT_TIMEZONE))
+    except pytz.UnknownTimeZoneError:
+        return jsonify({'error': 'Unknown timezone'}), 400
+    after_id, limit = keyset_args()
+    query = db.session.query(*[getattr(Submission, field) for field in fields]).filter(Submission.user_id == user_id)
+    query, next_after_id = page_bounds(query, Submission.id, after_id, limit)
+    rows = query.order_by(Submission.id).yield_per(STREAM_CHUNK_SIZE)
+    return stream_json(rows, schema, next_page_headers(next_after_id))
+
+@submissions_bp.route('/user/<int:user_id>/stats', methods=['GET'])
+def get_user_stats(user_id):
+    # Served from the aggregate row; never scans the submission history
+    return jsonify(user_stats(user_id))
 
 @submissions_bp.route('/user/<int:user_id>', methods=['DELETE'])
 def delete_user_submissions(user_id):
+    solves = db.session.query(Submission.question_id, db.func.count(Submission.id)) \
+        .filter_by(user_id=user_id, status='solved').group_by(Submission.question_id).all()
     deleted = Submission.query.filter_by(user_id=user_id).delete()
+    clear_user_stats(user_id)
+    ReviewItem.query.filter_by(user_id=user_id).delete()
     db.session.commit()
+    get_leaderboards().remove_user(user_id)
+    get_review_scheduler().forget(user_id)
+    for question_id, count in solves:
+        adjust_solve_count(question_id, -count)
     return jsonify({'message': f'Deleted {deleted} submissions.'}), 200
 
 @submissions_bp.route('/<int:submission_id>', methods=['DELETE'])
 def delete_submission(submission_id):
     sub = Submission.query.get_or_404(submission_id)
+    user_id, question_id, was_solved = sub.user_id, sub.question_id, sub.status == 'solved'
     db.session.delete(sub)
+    db.session.flush()
+    remove_submission_stats(sub)
+    review = replay_review(user_id, question_id)
     db.session.commit()
-    return jsonify({'message': 'Submission deleted.'}), 200 
\ No newline at end of file
+    get_review_scheduler().update(user_id, question_id, review.due_at if review is not None else None)
+    if was_solved:
+        adjust_solve_count(question_id, -1)
+        sync_user(user_id)
+    return jsonify({'message': 'Submission deleted.'}), 200
+
+@submissions_bp.cli.command('rebuild-stats')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_stats_command(user_id):
+    """Recompute per-user progress aggregates from submission history."""
+    click.echo(f'Rebuilt stats for {rebuild_user_stats(user_id)} user(s)')
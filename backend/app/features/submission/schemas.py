@@ -1,22 +1,86 @@
-from marshmallow import Schema, fields, post_dump
-from datetime import datetime
+from bisect import bisect_right
+from functools import lru_cache
+from marshmallow import Schema, fields, validate
 import pytz
 
+DEFAULT_TIMEZONE = 'Asia/Kolkata'
+SUBMISSION_STATUSES = ('attempted', 'solved')
+
+@lru_cache(maxsize=64)
+def display_timezone(name):
+    """Resolve a tz database name once; raises pytz.UnknownTimeZoneError for unknown names."""
+    return pytz.timezone(name)
+
+def to_display_time(value, tz):
+    # Stored timestamps are naive UTC
+    if value.tzinfo is None:
+        value = pytz.utc.localize(value)
+    return value.astimezone(tz).isoformat()
+
+def _fixed_offset(tz, first, last):
+    """(offset, tzinfo) valid for every naive UTC time in [first, last], or None if the offset changes."""
+    transitions = getattr(tz, '_utc_transition_times', None)
+    if transitions and bisect_right(transitions, first) != bisect_right(transitions, last):
+        return None
+    local = pytz.utc.localize(first).astimezone(tz)
+    return local.utcoffset(), local.tzinfo
+
+class DisplayDateTime(fields.DateTime):
+    """ISO datetime in the parent schema's display timezone."""
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+        return to_display_time(value, self.parent.timezone)
+
+class UTCDateTime(fields.DateTime):
+    """ISO datetime loaded as naive UTC, the way timestamps are stored.
+
+    Converting here rather than in a post_load hook also covers the valid
+    rows marshmallow hands back in ValidationError.valid_data.
+    """
+    def _deserialize(self, value, attr, data, **kwargs):
+        value = super()._deserialize(value, attr, data, **kwargs)
+        if value.tzinfo is not None:
+            value = value.astimezone(pytz.utc).replace(tzinfo=None)
+        return value
+
 class SubmissionSchema(Schema):
     id = fields.Int(dump_only=True)
     user_id = fields.Int(required=True)
     question_id = fields.Int(required=True)
     status = fields.Str(required=True)
-    timestamp = fields.DateTime(format='iso', dump_only=True)
-
-    @post_dump
-    def convert_to_ist(self, data, **kwargs):
-        if 'timestamp' in data and data['timestamp']:
-            utc = pytz.utc
-            ist = pytz.timezone('Asia/Kolkata')
-            dt = datetime.fromisoformat(data['timestamp'])
-            if dt.tzinfo is None:
-                dt = utc.localize(dt)
-            dt_ist = dt.astimezone(ist)
-            data['timestamp'] = dt_ist.isoformat()
-        return data 
\ No newline at end of file
+    timestamp = DisplayDateTime(dump_only=True)
+
+    def __init__(self, *args, timezone=DEFAULT_TIMEZONE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timezone = display_timezone(timezone)
+
+    def dump_many(self, rows):
+        """Bulk equivalent of dump(rows, many=True) without per-row field dispatch.
+
+        The timezone offset is looked up once per batch; only a batch that
+        straddles a DST change falls back to converting row by row.
+        """
+        names = list(self.dump_fields)
+        convert = None
+        if 'timestamp' in names:
+            stamps = [row.timestamp for row in rows if row.timestamp is not None]
+            naive = stamps and all(ts.tzinfo is None for ts in stamps)
+            fixed = _fixed_offset(self.timezone, min(stamps), max(stamps)) if naive else None
+            if fixed:
+                offset, tzinfo = fixed
+                convert = lambda ts: (ts + offset).replace(tzinfo=tzinfo).isoformat()
+            else:
+                convert = lambda ts, tz=self.timezone: to_display_time(ts, tz)
+        result = []
+        for row in rows:
+            item = {name: getattr(row, name) for name in names}
+            if convert is not None and item['timestamp'] is not None:
+                item['timestamp'] = convert(item['timestamp'])
+            result.append(item)
+        return result
+
+class SubmissionImportSchema(SubmissionSchema):
+    """Loads imported submissions, which unlike /record may carry their own (past) timestamp."""
+    status = fields.Str(required=True, validate=validate.OneOf(SUBMISSION_STATUSES))
+    timestamp = UTCDateTime(load_default=None)
@@ -0,0 +1,131 @@
+# Dedup Service: MinHash signatures + LSH for near-duplicate question detection
+
+import threading
+import zlib
+
+import numpy as np
+
+from .search_service import tokenize
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+def shingles(text, size=2):
+    """Word n-grams of the text with stop words dropped (the words themselves for very short text).
+
+    Dropping stop words first makes rewordings like "return indices" vs
+    "return the indices" produce the same shingles.
+    """
+    words = tokenize(text)
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def choose_bands(num_perm, threshold):
+    """Pick (bands, rows) so the LSH S-curve midpoint sits just below threshold.
+
+    A pair with Jaccard s becomes a candidate with probability 1 - (1 - s^r)^b;
+    the midpoint (1/b)^(1/r) is kept under the threshold to favour recall, and
+    candidates are then verified against the signature estimate. Thresholds
+    below 1/num_perm get the lowest midpoint there is: one row per band.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f'threshold must be in (0, 1], got {threshold}')
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint <= threshold and (best is None or midpoint > best[0]):
+            best = (midpoint, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+class NearDuplicateIndex:
+    """MinHash signatures bucketed by LSH bands.
+
+    `query` only compares against documents sharing at least one band bucket,
+    so a lookup touches a handful of candidates instead of the whole bank.
+    Texts with fewer than `min_shingles` shingles (placeholders like "TBD")
+    are too short to judge and are neither indexed nor matched.
+    """
+    def __init__(self, threshold=0.8, num_perm=128, seed=1, min_shingles=5):
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._signatures = {}  # doc id -> signature
+        self._buckets = [{} for _ in range(self.bands)]  # band -> {band bytes: {doc ids}}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, text):
+        hashed = np.fromiter((zlib.crc32(s.encode()) % MERSENNE_PRIME for s in shingles(text)),
+                             dtype=np.uint64)
+        if len(hashed) < max(self.min_shingles, 1):
+            return None
+        # (a * x + b) mod p for every permutation and shingle; a, x < 2^31 so no overflow
+        perms = (np.outer(hashed, self._a) + self._b) % MERSENNE_PRIME
+        return perms.min(axis=0)
+
+    def _bands(self, signature):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+    def add(self, doc_id, text):
+        signature = self.signature(text)
+        with self._lock:
+            self._remove(doc_id)
+            if signature is None:
+                return
+            self._signatures[doc_id] = signature
+            for band, key in self._bands(signature):
+                self._buckets[band].setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for band, key in self._bands(signature):
+            bucket = self._buckets[band][key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def query(self, text, exclude=None, threshold=None):
+        """Return [(doc id, estimated Jaccard)] at or above threshold, most similar first."""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        return self._query(signature, exclude, self.threshold if threshold is None else threshold)
+
+    def _query(self, signature, exclude, threshold):
+        with self._lock:
+            candidates = set()
+            for band, key in self._bands(signature):
+                candidates |= self._buckets[band].get(key, set())
+            candidates.discard(exclude)
+            matches = []
+            for doc_id in candidates:
+                similarity = float(np.mean(self._signatures[doc_id] == signature))
+                if similarity >= threshold:
+                    matches.append((doc_id, round(similarity, 4)))
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+    def pairs(self):
+        """Yield every (doc id, doc id, estimated Jaccard) pair at or above the threshold once."""
+        for doc_id, signature in list(self._signatures.items()):
+            for other, similarity in self._query(signature, doc_id, self.threshold):
+                if doc_id < other:
+                    yield doc_id, other, similarity
@@ -1,36 +1,304 @@
-# DSA Service: Trie, PriorityQueue, Graph
+# DSA Service: Trie, RadixTrie, PriorityQueue, Graph
+
+import bisect
+import heapq
+import random
+import threading
 
 class TrieNode:
     def __init__(self):
         self.children = {}
-        self.is_end = False
+        self.count = 0  # Number of stored titles ending at this node
+        self.items = ()  # Ranking keys of the items stored at this node
+        self.top = ()  # Best `top_k` ranking keys in this subtree, best first
+
+    @property
+    def is_end(self):
+        return self.count > 0
 
 class Trie:
-    def __init__(self):
-        self.root = TrieNode()
-    def insert(self, word):
+    """Lowercased title Trie with optional ranked top-k lookups.
+
+    Titles inserted with an `item_id` carry a score and a summary payload. Every
+    node caches the best `top_k` ranking keys of its subtree so `top(prefix, k)`
+    costs O(len(prefix) + k) instead of walking the whole subtree. Cached tuples
+    are replaced, never mutated, so readers need no lock.
+    """
+    node_class = TrieNode
+
+    def __init__(self, top_k=10):
+        self.root = self.node_class()
+        self.top_k = top_k
+        self._lock = threading.Lock()  # Serializes writers; readers never block
+        self._keys = {}  # item_id -> ranking key (-score, title, item_id)
+        self._data = {}  # item_id -> summary payload
+        # top() outcomes, for hit-rate metrics (racy increments are fine for counters)
+        self.lookups = {'cached': 0, 'walked': 0, 'empty': 0}
+    def insert(self, word, item_id=None, data=None, score=0):
         word = word.lower()  # Store in lowercase
-        node = self.root
-        for char in word:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
-        node.is_end = True
+        with self._lock:
+            path = self._path(word, create=True)
+            node = path[-1]
+            node.count += 1
+            if item_id is not None:
+                key = (-score, word, item_id)
+                self._keys[item_id] = key
+                self._data[item_id] = data if data is not None else {'id': item_id, 'title': word}
+                node.items = tuple(sorted(node.items + (key,)))
+                for n in path:
+                    n.top = self._merge(n.top, key)
+    def delete(self, word, item_id=None):
+        """Remove one occurrence of word, pruning branches left empty. Returns False if absent."""
+        key = None
+        if item_id is not None and item_id in self._keys:
+            key = self._keys.pop(item_id)
+            self._data.pop(item_id, None)
+        return self._delete(word.lower(), key)
+    def rename(self, old_word, new_word, item_id=None, data=None):
+        key = self._keys.get(item_id)
+        if old_word.lower() == new_word.lower():
+            if key is not None and data is not None:
+                self._data[item_id] = data
+            return
+        score = -key[0] if key is not None else 0
+        # Insert first so a concurrent search for either prefix never sees neither title
+        self.insert(new_word, item_id=item_id, data=data, score=score)
+        self._delete(old_word.lower(), key)
+    def _delete(self, word, key):
+        with self._lock:
+            path = self._path(word)
+            if path is None or path[-1].count == 0:
+                return False
+            node = path[-1]
+            node.count -= 1
+            if key is not None:
+                node.items = tuple(k for k in node.items if k != key)
+                self._recompute(path)
+            self._prune(path, word)
+            return True
+    def update(self, item_id, data=None, score=None):
+        """Replace an item's payload and/or score in place."""
+        if item_id not in self._keys:
+            return False
+        if data is not None:
+            self._data[item_id] = data
+        if score is None:
+            return True
+        with self._lock:
+            old_key = self._keys[item_id]
+            word = old_key[1]
+            path = self._path(word)
+            key = (-score, word, item_id)
+            self._keys[item_id] = key
+            node = path[-1]
+            node.items = tuple(sorted(key if k == old_key else k for k in node.items))
+            self._recompute(path)
+            return True
+    def add_score(self, item_id, delta):
+        key = self._keys.get(item_id)
+        if key is None:
+            return False
+        return self.update(item_id, score=-key[0] + delta)
     def autocomplete(self, prefix):
         prefix = prefix.lower()  # Search in lowercase
-        node = self.root
-        for char in prefix:
-            if char not in node.children:
-                return []
-            node = node.children[char]
+        found = self._find(prefix)
+        if found is None:
+            return []
         results = []
-        self._dfs(node, prefix, results)
+        self._dfs(found[0], found[1], results)
         return results
+    def top(self, prefix, k=None):
+        """Return payloads of the best k items under prefix, highest score first."""
+        k = self.top_k if k is None else k
+        found = self._find(prefix.lower())
+        if found is None or k <= 0:
+            self.lookups['empty'] += 1
+            return []
+        node = found[0]
+        if k <= self.top_k:
+            self.lookups['cached'] += 1
+            keys = node.top[:k]
+        else:
+            self.lookups['walked'] += 1
+            keys = heapq.nsmallest(k, self._subtree_keys(node))
+        data = self._data
+        return [data[key[2]] for key in keys if key[2] in data]
+    # Structural hooks, overridden by RadixTrie
+    def _path(self, word, create=False):
+        """Return the nodes from the root to word's node, or None if absent and not create."""
+        node = self.root
+        path = [node]
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = self.node_class()
+                node.children[char] = child
+            node = child
+            path.append(node)
+        return path
+    def _prune(self, path, word):
+        # Unlink empty nodes bottom-up; a reader already holding a detached node
+        # just finishes its walk on a stale (but consistent) subtree.
+        for i in range(len(word) - 1, -1, -1):
+            child = path[i + 1]
+            if child.count or child.children:
+                break
+            del path[i].children[word[i]]
+    def _find(self, prefix):
+        """Return (node, node_string) for the subtree holding every word starting with prefix."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node, prefix
     def _dfs(self, node, prefix, results):
         if node.is_end:
             results.append(prefix)
-        for char, child in node.children.items():
+        # Snapshot children so a concurrent insert/delete can't break iteration
+        for char, child in list(node.children.items()):
             self._dfs(child, prefix + char, results)
+    def _subtree_keys(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.items
+            stack.extend(list(node.children.values()))
+    def _merge(self, top, key):
+        if len(top) >= self.top_k and key >= top[-1]:
+            return top
+        merged = list(top)
+        bisect.insort(merged, key)
+        return tuple(merged[:self.top_k])
+    def _recompute(self, path):
+        """Rebuild cached tops bottom-up along path after a key was removed or demoted."""
+        for node in reversed(path):
+            candidates = list(node.items)
+            for child in node.children.values():
+                candidates.extend(child.top)
+            node.top = tuple(heapq.nsmallest(self.top_k, candidates))
+    @classmethod
+    def build(cls, words, top_k=10):
+        """Build a new, fully populated Trie off to the side (for atomic swaps).
+
+        `words` may yield plain titles or (title, item_id, data, score) tuples.
+        """
+        trie = cls(top_k=top_k)
+        for word in words:
+            if isinstance(word, tuple):
+                trie.insert(*word)
+            else:
+                trie.insert(word)
+        return trie
+
+class RadixNode:
+    """Compressed Trie node: `label` is the whole edge string leading to it."""
+    __slots__ = ('label', 'children', 'count', 'items', 'top')
+
+    def __init__(self, label=''):
+        self.label = label
+        self.children = {}  # first char of child label -> child
+        self.count = 0
+        self.items = ()
+        self.top = ()
+
+    @property
+    def is_end(self):
+        return self.count > 0
+
+    def copy(self, label):
+        node = RadixNode(label)
+        node.children = self.children
+        node.count = self.count
+        node.items = self.items
+        node.top = self.top
+        return node
+
+class RadixTrie(Trie):
+    """Drop-in Trie that stores runs of single-child nodes as one labelled edge.
+
+    Titles share few long prefixes, so collapsing chains cuts the node count
+    (and the per-node dicts and cached top-k tuples) by roughly an order of
+    magnitude. Nodes are never relabelled in place: splits and merges build
+    replacement nodes and swap them into the parent, so readers stay lock-free.
+    """
+    node_class = RadixNode
+
+    def _path(self, word, create=False):
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None:
+                if not create:
+                    return None
+                child = RadixNode(word[i:])
+                node.children[word[i]] = child
+                path.append(child)
+                return path
+            label = child.label
+            common = _common_prefix_length(label, word, i)
+            if common < len(label):
+                if not create:
+                    return None
+                # Split the edge: mid takes the shared part, a copy of child the rest
+                mid = RadixNode(label[:common])
+                rest = child.copy(label[common:])
+                mid.children[rest.label[0]] = rest
+                mid.top = rest.top
+                node.children[word[i]] = mid
+                child = mid
+            node = child
+            path.append(node)
+            i += common
+        return path
+    def _prune(self, path, word):
+        for i in range(len(path) - 1, 0, -1):
+            node, parent = path[i], path[i - 1]
+            if node.count or node.children:
+                break
+            del parent.children[node.label[0]]
+        # Re-merge a pass-through node left with a single child
+        for i in range(len(path) - 1, 0, -1):
+            node, parent = path[i], path[i - 1]
+            if parent.children.get(node.label[0]) is not node:
+                continue
+            if node.count == 0 and len(node.children) == 1:
+                (child,) = node.children.values()
+                parent.children[node.label[0]] = child.copy(node.label + child.label)
+            break
+    def _find(self, prefix):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            label = child.label
+            rest = prefix[i:]
+            if len(rest) <= len(label):
+                # Prefix ends on (or inside) this edge
+                return (child, prefix[:i] + label) if label.startswith(rest) else None
+            if not rest.startswith(label):
+                return None
+            node = child
+            i += len(label)
+        return node, prefix
+    def _dfs(self, node, prefix, results):
+        if node.is_end:
+            results.append(prefix)
+        for child in list(node.children.values()):
+            self._dfs(child, prefix + child.label, results)
+
+def _common_prefix_length(label, word, start):
+    n = min(len(label), len(word) - start)
+    i = 0
+    while i < n and label[i] == word[start + i]:
+        i += 1
+    return i
 
 class PriorityQueue:
     def __init__(self):
@@ -48,6 +316,212 @@ class PriorityQueue:
             return self.heap[0]
         return None
 
+class IndexedPriorityQueue:
+    """Binary min-heap of unique keys with O(log n) update and removal by key.
+
+    A position map from key to heap slot lets a key's priority be changed or
+    the key removed without searching the heap.
+    """
+    def __init__(self):
+        self._heap = []  # (priority, key)
+        self._index = {}  # key -> position in _heap
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def priority(self, key):
+        return self._heap[self._index[key]][0]
+
+    def push(self, key, priority):
+        """Insert key, or move it to a new priority if already queued."""
+        position = self._index.get(key)
+        if position is None:
+            self._heap.append((priority, key))
+            self._index[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            return
+        old = self._heap[position][0]
+        self._heap[position] = (priority, key)
+        if priority < old:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+
+    def remove(self, key):
+        position = self._index.pop(key)
+        priority = self._heap[position][0]
+        last = self._heap.pop()
+        if position < len(self._heap):
+            self._heap[position] = last
+            self._index[last[1]] = position
+            self._sift_up(position)
+            self._sift_down(self._index[last[1]])
+        return priority
+
+    def peek(self):
+        """(key, priority) with the smallest priority, or None if empty."""
+        if not self._heap:
+            return None
+        priority, key = self._heap[0]
+        return key, priority
+
+    def pop(self):
+        if not self._heap:
+            return None
+        key, priority = self.peek()
+        self.remove(key)
+        return key, priority
+
+    def smallest(self, k, max_priority=None):
+        """Up to k (key, priority) pairs in priority order, without modifying the queue.
+
+        Walks the heap with a frontier heap, so it costs O(k log k) rather
+        than O(n); `max_priority` stops at the first larger priority.
+        """
+        heap, result = self._heap, []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(result) < k:
+            (priority, key), position = heapq.heappop(frontier)
+            if max_priority is not None and priority > max_priority:
+                break
+            result.append((key, priority))
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+    def _sift_up(self, position):
+        heap, index = self._heap, self._index
+        item = heap[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            if heap[parent] <= item:
+                break
+            heap[position] = heap[parent]
+            index[heap[position][1]] = position
+            position = parent
+        heap[position] = item
+        index[item[1]] = position
+
+    def _sift_down(self, position):
+        heap, index = self._heap, self._index
+        item, size = heap[position], len(heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if item <= heap[child]:
+                break
+            heap[position] = heap[child]
+            index[heap[position][1]] = position
+            position = child
+        heap[position] = item
+        index[item[1]] = position
+
+class SkipListNode:
+    __slots__ = ('key', 'value', 'next', 'width')
+
+    def __init__(self, key, value, level):
+        self.key = key
+        self.value = value
+        self.next = [None] * level
+        self.width = [0] * level  # bottom-level steps covered by each forward link
+
+class SkipList:
+    """Sorted map with O(log n) insert, remove, rank and positional lookup.
+
+    An indexable skip list: every forward link records how many elements it
+    skips, so the position of a key (and the key at a position) is found on
+    the same descent as a search. Keys must be unique and mutually comparable.
+    """
+    MAX_LEVEL = 32
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+        self._tail = SkipListNode(None, None, 0)
+        self._head = SkipListNode(None, None, self.MAX_LEVEL)
+        self._head.next = [self._tail] * self.MAX_LEVEL
+        self._head.width = [1] * self.MAX_LEVEL
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _descend(self, key):
+        """Last node before key on every level, and the position of each."""
+        chain, positions = [None] * self.MAX_LEVEL, [0] * self.MAX_LEVEL
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._tail and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level], positions[level] = node, position
+        return chain, positions
+
+    def insert(self, key, value=None):
+        chain, positions = self._descend(key)
+        if chain[0].next[0] is not self._tail and chain[0].next[0].key == key:
+            raise KeyError(key)
+        level = 1
+        while level < self.MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        node = SkipListNode(key, value, level)
+        position = positions[0]
+        for i in range(level):
+            before = chain[i]
+            node.next[i] = before.next[i]
+            before.next[i] = node
+            node.width[i] = before.width[i] - (position - positions[i])
+            before.width[i] = position - positions[i] + 1
+        for i in range(level, self.MAX_LEVEL):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._descend(key)
+        node = chain[0].next[0]
+        if node is self._tail or node.key != key:
+            raise KeyError(key)
+        for i in range(len(node.next)):
+            chain[i].width[i] += node.width[i] - 1
+            chain[i].next[i] = node.next[i]
+        for i in range(len(node.next), self.MAX_LEVEL):
+            chain[i].width[i] -= 1
+        self._size -= 1
+        return node.value
+
+    def count_less(self, key):
+        """Number of keys strictly less than key (its 0-based rank if present)."""
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._tail and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def _node_at(self, index):
+        node, remaining = self._head, index + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def items(self, start=0, stop=None):
+        """Yield (key, value) pairs by position, from start up to (not including) stop."""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            yield node.key, node.value
+            node = node.next[0]
+
 class Graph:
     def __init__(self):
         self.adj = {}
@@ -56,4 +530,26 @@ class Graph:
             self.adj[u] = []
         self.adj[u].append(v)
     def get_neighbors(self, u):
-        return self.adj.get(u, []) 
\ No newline at end of file
+        return self.adj.get(u, [])
+    def connected_components(self):
+        """Treat edges as undirected and return the node sets of each component."""
+        undirected = {}
+        for u, vs in self.adj.items():
+            for v in vs:
+                undirected.setdefault(u, set()).add(v)
+                undirected.setdefault(v, set()).add(u)
+        seen, components = set(), []
+        for start in undirected:
+            if start in seen:
+                continue
+            seen.add(start)
+            component, stack = [], [start]
+            while stack:
+                node = stack.pop()
+                component.append(node)
+                for neighbor in undirected[node]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+            components.append(component)
+        return components
@@ -0,0 +1,735 @@
+# Execution Service: pool of warm, single-use interpreters for running submissions
+
+import codecs
+import hashlib
+import json
+import os
+import queue
+import selectors
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs inside each worker. It signals readiness once the interpreter is up,
+# then blocks until the job arrives on stdin. A 'run' job executes the code as
+# __main__ with the real stdout/stderr; a 'judge' job compiles the code once,
+# runs it against every test input with captured streams and writes one JSON
+# result line per case to the results pipe (the fd in argv[1]) as soon as the
+# case finishes. Expected outputs never reach the worker: a result carries a
+# digest of the output and the host decides the verdict.
+BOOTSTRAP = r'''
+import functools, hashlib, io, json, os, sys, time, traceback
+
+PREVIEW_CHARS = 1024  # Output echoed back for a failed judge case
+
+class OutputLimit(BaseException):
+    pass
+
+class CappedIO(io.StringIO):
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+    def write(self, s):
+        room = self.limit - self.tell()
+        if len(s) > room:
+            super().write(s[:max(room, 0)])
+            self.truncated = True
+            raise OutputLimit()
+        return super().write(s)
+
+def run_main(code, stdin):
+    sys.stdin = io.StringIO(stdin)
+    namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+    try:
+        exec(code, namespace)
+        return 0
+    except OutputLimit:
+        return 1
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        report = functools.partial(print, e.code, file=sys.stderr)
+    except BaseException as e:
+        report = functools.partial(traceback.print_exception, type(e), e, e.__traceback__.tb_next)
+    try:
+        report()
+    except OutputLimit:
+        pass
+    return 1
+
+def digest(text):
+    normalized = '\n'.join(line.rstrip() for line in text.rstrip().splitlines())
+    return hashlib.sha256(normalized.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def judge(job, out):
+    try:
+        code = compile(job['code'], 'main.py', 'exec')
+    except SyntaxError as e:
+        err = ''.join(traceback.format_exception_only(type(e), e))
+        out.write(json.dumps({'compile_error': err}) + '\n')
+        out.flush()
+        return 1
+    for stdin in job['inputs']:
+        sys.stdout, sys.stderr = CappedIO(job['max_output']), CappedIO(job['max_output'])
+        started = time.perf_counter()
+        exit_code = run_main(code, stdin)
+        elapsed = (time.perf_counter() - started) * 1000
+        stdout, stderr = sys.stdout.getvalue(), sys.stderr.getvalue()
+        out.write(json.dumps({
+            'exit_code': exit_code, 'truncated': sys.stdout.truncated or sys.stderr.truncated,
+            'time_ms': round(elapsed, 3), 'digest': digest(stdout),
+            'stdout': stdout[:PREVIEW_CHARS], 'stderr': stderr[:PREVIEW_CHARS]
+        }) + '\n')
+        out.flush()
+    return 0
+
+results = os.fdopen(int(sys.argv[1]), 'w')
+sys.stdout.write('R')
+sys.stdout.flush()
+raw = sys.stdin.read()
+if not raw:
+    os._exit(0)
+job = json.loads(raw)
+sys.argv = ['main.py']
+status = 1
+try:
+    if job.get('mode') == 'judge':
+        status = judge(job, results)
+    else:
+        results.close()
+        try:
+            code = compile(job['code'], 'main.py', 'exec')
+        except SyntaxError as e:
+            traceback.print_exception(type(e), e, None)
+        else:
+            status = run_main(code, job['stdin'])
+finally:
+    try:
+        sys.__stdout__.flush()
+        sys.__stderr__.flush()
+    finally:
+        # Skip interpreter finalization: the worker is discarded anyway
+        os._exit(status)
+'''
+READY = b'R'
+PREVIEW_CHARS = 1024  # Output echoed back for a failed judge case
+# Seconds between attempts to start a replacement worker after a failure, doubling up to the max
+REPLENISH_BACKOFF = 0.1
+REPLENISH_BACKOFF_MAX = 5.0
+RESULT_LINE_MAX = 32 * 1024  # Bytes of results pipe allowed per judged case
+
+def output_digest(text):
+    """Digest of text with trailing whitespace ignored, as the worker computes it for each case."""
+    normalized = '\n'.join(line.rstrip() for line in text.rstrip().splitlines())
+    return hashlib.sha256(normalized.encode('utf-8', 'surrogatepass')).hexdigest()
+
+class PoolBusy(Exception):
+    """Raised when every interpreter slot stayed busy for the whole queue timeout."""
+
+class InterpreterPool:
+    """Keeps `size` interpreters started and waiting for a job.
+
+    Each worker runs exactly one job and is then discarded, so no state leaks
+    between submissions; a replacement is spawned as soon as one is taken.
+    At most `size` jobs run at once: further callers wait up to
+    `queue_timeout` seconds for a slot and then get PoolBusy.
+    Code and stdin travel over the worker's stdin pipe, never through disk.
+    """
+    def __init__(self, size, python='python', acquire_timeout=1.0, queue_timeout=10.0, start_timeout=10.0,
+                 max_stdout=2**20, max_stderr=2**18):
+        self.size = size
+        self.python = python
+        self.acquire_timeout = acquire_timeout
+        self.queue_timeout = queue_timeout
+        self.start_timeout = start_timeout
+        self.max_stdout = max_stdout
+        self.max_stderr = max_stderr
+        self._ready = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.interpreter_version = None
+        self._stats = {
+            'jobs': 0, 'warm_hits': 0, 'cold_starts': 0, 'rejected': 0, 'timeouts': 0, 'truncated': 0,
+            'worker_failures': 0,
+            'waiting': 0, 'max_waiting': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+            'warmup_ms': None,
+        }
+
+    def start(self):
+        self.interpreter_version = subprocess.run(
+            [self.python, '-I', '-c', 'import sys; print(sys.version)'],
+            stdout=subprocess.PIPE, check=True
+        ).stdout.decode().strip()
+        started = time.perf_counter()
+        workers = [self._spawn() for _ in range(self.size)]
+        for proc in workers:
+            if self._await_ready(proc, self.start_timeout):
+                self._ready.put(proc)
+            else:
+                self._count('worker_failures')
+                self._replenish()
+        self._stats['warmup_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return self
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                proc = self._ready.get_nowait()
+            except queue.Empty:
+                return
+            _discard(proc)
+
+    def run(self, code, stdin='', timeout=5):
+        """Run code in a fresh worker. Raises subprocess.TimeoutExpired like subprocess.run.
+
+        Output beyond the stdout/stderr caps is dropped, the worker is killed
+        and the result is flagged `truncated`.
+        """
+        output = {'stdout': [], 'stderr': []}
+        for name, chunk in self._output({'code': code, 'stdin': stdin}, timeout):
+            if name == 'exit':
+                exit_code, timed_out, truncated = chunk
+            else:
+                output[name].append(chunk)
+        if timed_out:
+            raise subprocess.TimeoutExpired('main.py', timeout)
+        return {
+            'stdout': b''.join(output['stdout']).decode(errors='replace'),
+            'stderr': b''.join(output['stderr']).decode(errors='replace'),
+            'exit_code': exit_code,
+            'truncated': truncated
+        }
+
+    def stream(self, code, stdin='', timeout=5):
+        """Like run(), but yield ('stdout' | 'stderr', text) chunks as the program produces them.
+
+        The last item is ('exit', {'exit_code', 'timed_out', 'truncated'}).
+        """
+        decoders = {name: codecs.getincrementaldecoder('utf-8')(errors='replace')
+                    for name in ('stdout', 'stderr')}
+        for name, chunk in self._output({'code': code, 'stdin': stdin}, timeout):
+            if name == 'exit':
+                for stream_name, decoder in decoders.items():
+                    tail = decoder.decode(b'', final=True)
+                    if tail:
+                        yield stream_name, tail
+                exit_code, timed_out, truncated = chunk
+                yield 'exit', {'exit_code': exit_code, 'timed_out': timed_out, 'truncated': truncated}
+            else:
+                text = decoders[name].decode(chunk)
+                if text:
+                    yield name, text
+
+    def judge(self, code, cases, stop_on_failure=False, timeout=10):
+        """Compile code once and run it against every case in a single worker.
+
+        Returns one verdict dict per case that ran; if the batch hits the
+        timeout, the case in progress is reported as 'time_limit_exceeded'.
+        The worker only sees the inputs and reports an output digest per case
+        on its results pipe; verdicts are decided here, so nothing the
+        submitted code writes can turn into a 'passed'.
+        """
+        expected = [output_digest(case.get('expected_output', '')) for case in cases]
+        job = {'mode': 'judge', 'code': code, 'inputs': [case.get('input', '') for case in cases],
+               'max_output': self.max_stdout}
+        results, stderr, pending = [], [], b''
+        exit_code = timed_out = truncated = None
+        corrupt = stopped = False
+        output = self._output(job, timeout, results_limit=RESULT_LINE_MAX * len(cases))
+        try:
+            for name, chunk in output:
+                if name == 'exit':
+                    exit_code, timed_out, truncated = chunk
+                elif name == 'stderr':
+                    stderr.append(chunk)
+                elif name == 'results' and not corrupt:
+                    *lines, pending = (pending + chunk).split(b'\n')
+                    for line in lines:
+                        result = _case_result(line, len(results), expected)
+                        if result is None:
+                            corrupt = True  # Not a result line; stop trusting the pipe
+                            break
+                        results.append(result)
+                        if result['verdict'] == 'compile_error':
+                            return results
+                        stopped = stop_on_failure and result['verdict'] != 'passed'
+                        if stopped or len(results) == len(cases):
+                            return results  # Closing the generator kills the worker
+                # Output the submitted code wrote straight to fd 1 is ignored
+        finally:
+            output.close()
+        if len(results) < len(cases):
+            # The worker died mid-case (timeout, output cap, os._exit, crash)
+            if timed_out:
+                verdict = 'time_limit_exceeded'
+            elif truncated:
+                verdict = 'output_limit_exceeded'
+            else:
+                verdict = 'runtime_error'
+            results.append({'case': len(results), 'verdict': verdict,
+                            'stderr': b''.join(stderr).decode(errors='replace'), 'exit_code': exit_code})
+        return results
+
+    def _output(self, job, timeout, results_limit=0):
+        """Run job in a fresh worker, yielding (stream, bytes) as output arrives.
+
+        Each stream is read incrementally and capped; the results pipe is read
+        as a third stream when results_limit is set. The final item is
+        ('exit', (exit_code, timed_out, truncated)). Raises PoolBusy when no
+        slot frees up in time.
+        """
+        proc = self._acquire()
+        events = queue.Queue()
+        limits = {'stdout': self.max_stdout, 'stderr': self.max_stderr}
+        if results_limit:
+            limits['results'] = results_limit
+        else:
+            proc.results.close()
+        sizes = dict.fromkeys(limits, 0)
+        timed_out = truncated = False
+        try:
+            try:
+                proc.stdin.write(json.dumps(job).encode())
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass  # Worker died; its exit status is reported below
+            for name in limits:
+                threading.Thread(target=_pump, args=(getattr(proc, name), name, events), daemon=True).start()
+            deadline = time.monotonic() + timeout
+            open_streams = len(limits)
+            while open_streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                try:
+                    name, chunk = events.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    open_streams -= 1
+                    continue
+                room = limits[name] - sizes[name]
+                if len(chunk) > room:
+                    chunk, truncated = chunk[:room], True
+                sizes[name] += len(chunk)
+                if chunk:
+                    yield name, chunk
+                if truncated:
+                    break
+            if not (timed_out or truncated):
+                try:
+                    proc.wait(timeout=max(deadline - time.monotonic(), 0))
+                except subprocess.TimeoutExpired:
+                    timed_out = True  # Closed its pipes but kept running
+        finally:
+            # Also reached when a streaming client disconnects mid-run
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.results.close()
+            self._slots.release()
+        if timed_out:
+            self._count('timeouts')
+        if truncated:
+            self._count('truncated')
+        yield 'exit', (proc.returncode, timed_out, truncated)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        jobs = stats['jobs']
+        stats.update(
+            size=self.size,
+            idle=self._ready.qsize(),
+            wait_ms_avg=round(stats.pop('wait_ms_total') / jobs, 3) if jobs else 0.0,
+            wait_ms_max=round(stats['wait_ms_max'], 3),
+        )
+        return stats
+
+    def _acquire(self):
+        """Take a slot and a started worker; the caller releases the slot when the job ends."""
+        started = time.perf_counter()
+        with self._lock:
+            self._stats['waiting'] += 1
+            self._stats['max_waiting'] = max(self._stats['max_waiting'], self._stats['waiting'])
+        proc, warm = None, True
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                self._count('rejected')
+                raise PoolBusy('All interpreters are busy; try again shortly.')
+            try:
+                while proc is None:
+                    try:
+                        proc = self._ready.get(timeout=self.acquire_timeout)
+                    except queue.Empty:
+                        # The replacement is slow or failed to start: start one for this slot
+                        proc, warm = self._spawn(), False
+                        if not self._await_ready(proc, self.start_timeout):
+                            raise RuntimeError('Interpreter failed to start.')
+                        break
+                    if proc.poll() is not None:
+                        self._count('worker_failures')
+                        proc = None
+                        self._replenish()
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            with self._lock:
+                self._stats['waiting'] -= 1
+        waited = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['jobs'] += 1
+            self._stats['warm_hits' if warm else 'cold_starts'] += 1
+            self._stats['wait_ms_total'] += waited
+            self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], waited)
+        # A cold start also replaces a warm worker that never arrived, so the pool refills
+        self._replenish()
+        return proc
+
+    def _replenish(self):
+        if self._closed:
+            return
+        # Start the replacement in the background so its startup overlaps the current job
+        threading.Thread(target=self._add_worker, daemon=True).start()
+
+    def _add_worker(self):
+        """Start one warm worker, retrying with backoff until it starts or the pool is full again."""
+        delay = REPLENISH_BACKOFF
+        while not self._closed and self._ready.qsize() < self.size:
+            try:
+                proc = self._spawn()
+            except OSError:
+                proc = None
+            if proc is not None and self._await_ready(proc, self.start_timeout):
+                if self._closed or self._ready.qsize() >= self.size:
+                    _discard(proc)  # Refilled meanwhile (e.g. by a cold start's replacement)
+                else:
+                    self._ready.put(proc)
+                return
+            self._count('worker_failures')
+            time.sleep(delay)
+            delay = min(delay * 2, REPLENISH_BACKOFF_MAX)
+
+    def _spawn(self):
+        # Judge results travel on their own pipe, apart from the stdout the submitted code writes to
+        results, results_w = os.pipe()
+        try:
+            proc = subprocess.Popen(
+                [self.python, '-I', '-c', BOOTSTRAP, str(results_w)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(results_w,),
+                cwd=tempfile.gettempdir()
+            )
+        except BaseException:
+            os.close(results)
+            raise
+        finally:
+            os.close(results_w)
+        proc.results = os.fdopen(results, 'rb')
+        return proc
+
+    @staticmethod
+    def _await_ready(proc, timeout):
+        """Wait up to timeout seconds for the ready byte; a worker that hangs or dies is killed."""
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ)
+            # Nothing has been read from the pipe yet, so select() sees every byte
+            if selector.select(timeout) and proc.stdout.read(1) == READY:
+                return True
+        _discard(proc)
+        return False
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+def _discard(proc):
+    proc.kill()
+    proc.wait()
+    proc.results.close()
+
+def _case_result(line, index, expected):
+    """Verdict for one line of a judge worker's results pipe, or None if the line is malformed."""
+    try:
+        record = json.loads(line)
+        if 'compile_error' in record:
+            return {'case': 0, 'verdict': 'compile_error', 'stderr': str(record['compile_error'])}
+        exit_code, truncated = record['exit_code'], record['truncated']
+        result = {'case': index, 'time_ms': float(record['time_ms'])}
+        if truncated:
+            verdict = 'output_limit_exceeded'
+        elif exit_code:
+            verdict = 'runtime_error'
+        elif record['digest'] == expected[index]:
+            verdict = 'passed'
+        else:
+            verdict = 'wrong_answer'
+        result['verdict'] = verdict
+        if verdict != 'passed':
+            result.update(stdout=str(record['stdout'])[:PREVIEW_CHARS],
+                          stderr=str(record['stderr'])[:PREVIEW_CHARS], exit_code=exit_code)
+        return result
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
+
+def _pump(pipe, name, events):
+    """Forward a worker pipe to the events queue chunk by chunk; None marks EOF."""
+    try:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            events.put((name, chunk))
+    except (OSError, ValueError):
+        pass  # Pipe closed under us after the worker was killed
+    finally:
+        events.put((name, None))
+
+class QueueFull(Exception):
+    """Raised when a job can't be accepted; `reason` says which limit was hit."""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class Job:
+    __slots__ = ('id', 'owner', 'status', 'result', 'error', 'created_at', 'started_at',
+                 'finished_at', 'done')
+
+    def __init__(self, owner):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = 'queued'  # queued -> running -> done | failed
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        data = {'job_id': self.id, 'status': self.status}
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        if self.started_at:
+            data['queue_ms'] = round((self.started_at - self.created_at) * 1000, 2)
+        if self.finished_at:
+            data['run_ms'] = round((self.finished_at - self.started_at) * 1000, 2)
+        return data
+
+class JobQueue:
+    """Bounded background executor for code runs.
+
+    At most `workers` jobs run at once; `max_pending` caps queued plus running
+    jobs overall and `per_user_limit` per owner, so a burst is rejected up front
+    (QueueFull) instead of tying up request threads. Finished jobs are kept for
+    `retention` seconds so clients can poll for the result.
+    """
+    def __init__(self, workers, max_pending, per_user_limit, retention=300):
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='execution-job')
+        self._jobs = {}
+        self._active = Counter()  # owner -> queued + running jobs
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def submit(self, owner, fn, *args, **kwargs):
+        with self._lock:
+            self._evict_expired()
+            if sum(self._active.values()) >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise QueueFull('Execution queue is full.')
+            if self._active[owner] >= self.per_user_limit:
+                self._stats['rejected'] += 1
+                raise QueueFull(f'At most {self.per_user_limit} concurrent executions per user.')
+            job = Job(owner)
+            self._jobs[job.id] = job
+            self._active[owner] += 1
+            self._stats['submitted'] += 1
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """Long-poll: block up to timeout seconds for the job to finish."""
+        job = self._jobs.get(job_id)
+        if job is not None and timeout > 0:
+            job.done.wait(timeout)
+        return job
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = sum(1 for j in self._jobs.values() if j.status == 'queued')
+            stats['running'] = sum(1 for j in self._jobs.values() if j.status == 'running')
+        stats['max_pending'] = self.max_pending
+        return stats
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = 'done'
+        except subprocess.TimeoutExpired:
+            job.error = 'Code execution timed out.'
+            job.status = 'failed'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active[job.owner] -= 1
+                if not self._active[job.owner]:
+                    del self._active[job.owner]
+                self._stats['completed' if job.status == 'done' else 'failed'] += 1
+            job.done.set()
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+class ExecutionCache:
+    """LRU cache of run results keyed by a hash of everything that determines them.
+
+    Entries expire after `ttl` seconds; the cache holds at most `max_entries`
+    results and `max_bytes` of captured output, evicting least recently used
+    entries first.
+    """
+    def __init__(self, max_entries=1024, max_bytes=16 * 2**20, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    @staticmethod
+    def key(language, interpreter_version, code, stdin):
+        digest = hashlib.sha256()
+        for part in (language, interpreter_version, code, stdin):
+            encoded = (part or '').encode()
+            # Length-prefix each part so ('ab', 'c') and ('a', 'bc') differ
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[2]
+
+    def put(self, key, result):
+        size = len(result['stdout']) + len(result['stderr'])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+_pool = None
+_pool_lock = threading.Lock()
+_job_queue = None
+_cache = None
+
+def current_pool():
+    """The process-wide pool if it has been started, without starting it."""
+    return _pool
+
+def get_pool(config):
+    """Return the process-wide pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = InterpreterPool(
+                    size=config['EXECUTION_POOL_SIZE'],
+                    python=config['EXECUTION_PYTHON'],
+                    queue_timeout=config['EXECUTION_QUEUE_TIMEOUT'],
+                    start_timeout=config['EXECUTION_START_TIMEOUT'],
+                    max_stdout=config['EXECUTION_MAX_STDOUT'],
+                    max_stderr=config['EXECUTION_MAX_STDERR']
+                ).start()
+    return _pool
+
+def get_job_queue(config):
+    """Return the process-wide async job queue, creating it on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _pool_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    workers=config['EXECUTION_JOB_WORKERS'],
+                    max_pending=config['EXECUTION_QUEUE_MAX'],
+                    per_user_limit=config['EXECUTION_USER_MAX_JOBS']
+                )
+    return _job_queue
+
+def get_cache(config):
+    """Return the process-wide result cache, or None when it is disabled."""
+    global _cache
+    if _cache is None and config['EXECUTION_CACHE_SIZE'] > 0:
+        with _pool_lock:
+            if _cache is None:
+                _cache = ExecutionCache(
+                    max_entries=config['EXECUTION_CACHE_SIZE'],
+                    max_bytes=config['EXECUTION_CACHE_MAX_BYTES'],
+                    ttl=config['EXECUTION_CACHE_TTL']
+                )
+    return _cache
+
+def run_cached(pool, cache, code, stdin='', timeout=5):
+    """pool.run() through the result cache; hits never touch a subprocess."""
+    key = cache.key('python', pool.interpreter_version, code, stdin)
+    result = cache.get(key)
+    if result is not None:
+        return dict(result, cached=True)
+    result = pool.run(code, stdin, timeout=timeout)
+    cache.put(key, result)
+    return dict(result, cached=False)
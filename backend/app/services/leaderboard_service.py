@@ -0,0 +1,123 @@
+# Leaderboard Service: in-memory rankings by distinct problems solved, global and per tag
+
+import threading
+
+from app.core.extensions import db
+from app.features.submission.models import UserStats
+from app.services.dsa_service import SkipList
+
+class Leaderboard:
+    """Members ordered by score (highest first, ties by member id) in a SkipList.
+
+    Ranks use competition ranking: equal scores share a rank, and the rank is
+    one more than the number of members with a strictly higher score.
+    Members with a score of zero are not ranked.
+    """
+    def __init__(self, seed=None):
+        self._scores = {}
+        self._ranking = SkipList(seed=seed)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def set(self, member, score):
+        with self._lock:
+            old = self._scores.pop(member, None)
+            if old is not None:
+                self._ranking.remove((-old, member))
+            if score > 0:
+                self._scores[member] = score
+                self._ranking.insert((-score, member))
+
+    def remove(self, member):
+        self.set(member, 0)
+
+    def score(self, member):
+        return self._scores.get(member, 0)
+
+    def rank(self, member):
+        """(rank, score) for a ranked member, else None."""
+        with self._lock:
+            score = self._scores.get(member)
+            if score is None:
+                return None
+            return self._ranking.count_less((-score,)) + 1, score
+
+    def top(self, k, offset=0):
+        """[(rank, member, score)] for positions offset .. offset + k."""
+        with self._lock:
+            entries = list(self._ranking.items(offset, offset + k))
+            if not entries:
+                return []
+            # Only the first entry needs a search; ties share the rank of the first in their run
+            rank = self._ranking.count_less((entries[0][0][0],)) + 1
+            result, previous = [], None
+            for position, ((negated, member), _) in enumerate(entries, start=offset + 1):
+                if negated != previous:
+                    rank = rank if previous is None else position
+                    previous = negated
+                result.append((rank, member, -negated))
+            return result
+
+class Leaderboards:
+    """The global board plus one board per tag, fed from users' progress aggregates."""
+    def __init__(self):
+        self.overall = Leaderboard()
+        self.by_tag = {}
+        self._user_tags = {}  # user id -> tags the user is ranked under
+        self._lock = threading.Lock()
+
+    def board(self, tag=None):
+        if tag is None:
+            return self.overall
+        return self.by_tag.get(tag)
+
+    def update(self, user_id, solved, solved_by_tag):
+        with self._lock:
+            self.overall.set(user_id, solved)
+            tags = {tag for tag, count in solved_by_tag.items() if count > 0}
+            for tag in self._user_tags.pop(user_id, set()) | tags:
+                board = self.by_tag.get(tag)
+                if board is None:
+                    board = self.by_tag[tag] = Leaderboard()
+                board.set(user_id, solved_by_tag.get(tag, 0))
+                if not len(board):
+                    del self.by_tag[tag]
+            if tags:
+                self._user_tags[user_id] = tags
+
+    def remove_user(self, user_id):
+        self.update(user_id, 0, {})
+
+_leaderboards = Leaderboards()
+
+def get_leaderboards():
+    return _leaderboards
+
+def sync_user(user_id):
+    """Re-read one user's committed aggregates into the boards (O(tags * log n))."""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        _leaderboards.remove_user(user_id)
+    else:
+        _leaderboards.update(user_id, stats.solved_questions, stats.solved_by_tag or {})
+
+def sync_users(user_ids):
+    """sync_user for many users, reading their aggregates in one query."""
+    user_ids = set(user_ids)
+    for stats in db.session.query(UserStats.user_id, UserStats.solved_questions, UserStats.solved_by_tag) \
+            .filter(UserStats.user_id.in_(user_ids)):
+        _leaderboards.update(stats.user_id, stats.solved_questions, stats.solved_by_tag or {})
+        user_ids.discard(stats.user_id)
+    for user_id in user_ids:
+        _leaderboards.remove_user(user_id)
+
+def rebuild_leaderboards():
+    """Rebuild every board from the user_stats table and swap them in."""
+    global _leaderboards
+    boards = Leaderboards()
+    for stats in db.session.query(UserStats.user_id, UserStats.solved_questions, UserStats.solved_by_tag) \
+            .yield_per(1000):
+        boards.update(stats.user_id, stats.solved_questions, stats.solved_by_tag or {})
+    _leaderboards = boards
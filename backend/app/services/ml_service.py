@@ -1,43 +1,470 @@
 # ML Service: Recommendation logic
 
-from ..models.question import Question
-from ..models.submission import Submission
-from collections import Counter, defaultdict
-import random
-
-def recommend_questions(user_id):
-    # Get all solved submissions for this user
-    solved_subs = Submission.query.filter_by(user_id=user_id, status='solved').all()
-    solved_ids = {s.question_id for s in solved_subs}
-    # Count tags and difficulties solved
-    tag_counter = Counter()
-    diff_counter = Counter()
-    for sub in solved_subs:
-        q = Question.query.get(sub.question_id)
-        if q:
-            if q.tags:
-                for tag in q.tags.split(','):
-                    tag_counter[tag.strip().lower()] += 1
-            diff_counter[q.difficulty] += 1
-    # Get all unsolved questions
-    unsolved = Question.query.filter(~Question.id.in_(solved_ids)).all()
-    if not unsolved:
-        unsolved = Question.query.all()
-    # Score unsolved questions: prioritize tags practiced least, then adaptive difficulty
-    tag_min = min(tag_counter.values()) if tag_counter else 0
-    def score(q):
-        tags = [t.strip().lower() for t in (q.tags or '').split(',') if t.strip()]
-        tag_score = sum(tag_counter.get(t, tag_min) for t in tags) if tags else tag_min
-        # Lower tag_score = less practiced tags
-        diff_score = diff_counter.get(q.difficulty, 0)
-        # Lower diff_score = less practiced difficulty
-        return (tag_score, diff_score, random.random())
-    # Sort by least practiced tags, then least practiced difficulty, then random
-    unsolved_sorted = sorted(unsolved, key=score)
-    recommended = unsolved_sorted[:5]
-    return [{
-        'id': q.id,
-        'title': q.title,
-        'difficulty': q.difficulty,
-        'tags': q.tags
-    } for q in recommended] 
\ No newline at end of file
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from app.core.extensions import db
+from app.features.question.models import Question
+from app.features.submission.models import Submission
+
+def split_tags(tags):
+    return [t.strip().lower() for t in (tags or '').split(',') if t.strip()]
+
+class QuestionCatalog:
+    """Read-only, vectorized snapshot of the question bank.
+
+    Rows are questions sorted by id; `tag_matrix` is a sparse question x tag
+    incidence matrix and `difficulty` holds each row's difficulty code, so
+    per-user scoring is a couple of matrix-vector products.
+    """
+    def __init__(self, rows):
+        self.ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows))
+        self.summaries = [{'id': r.id, 'title': r.title, 'difficulty': r.difficulty, 'tags': r.tags}
+                          for r in rows]
+        self.tag_index = {}
+        self.difficulty_index = {}
+        row_ind, col_ind = [], []
+        difficulty = np.empty(len(rows), dtype=np.int64)
+        for i, r in enumerate(rows):
+            for tag in set(split_tags(r.tags)):
+                row_ind.append(i)
+                col_ind.append(self.tag_index.setdefault(tag, len(self.tag_index)))
+            difficulty[i] = self.difficulty_index.setdefault(r.difficulty, len(self.difficulty_index))
+        self.difficulty = difficulty
+        self.tag_matrix = sparse.csr_matrix(
+            (np.ones(len(row_ind), dtype=np.float64), (row_ind, col_ind)),
+            shape=(len(rows), len(self.tag_index))
+        )
+        self.untagged = np.asarray(self.tag_matrix.sum(axis=1)).ravel() == 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_for(self, question_ids):
+        """Map question ids to row positions, dropping ids not in the catalog."""
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids, question_ids)
+        rows = np.minimum(rows, max(len(self.ids) - 1, 0))
+        return rows[self.ids[rows] == question_ids] if len(self.ids) else rows[:0]
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Return the cached catalog, building it (one query, no descriptions) if needed."""
+    global _catalog
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                rows = db.session.query(Question.id, Question.title, Question.difficulty, Question.tags) \
+                    .order_by(Question.id).all()
+                _catalog = QuestionCatalog(rows)
+            catalog = _catalog
+    return catalog
+
+def invalidate_catalog():
+    """Drop the cached catalog; question writes call this so the next request rebuilds it."""
+    global _catalog
+    _catalog = None
+
+def recommend_questions(user_id, limit=5, rng=None):
+    catalog = get_catalog()
+    n = len(catalog)
+    if not n:
+        return []
+    rng = rng or np.random.default_rng()
+    # One query for the user's solved history; each solved submission counts once
+    solved_ids = [qid for (qid,) in db.session.query(Submission.question_id)
+                  .filter_by(user_id=user_id, status='solved')] if user_id is not None else []
+    solved_counts = np.bincount(catalog.rows_for(solved_ids), minlength=n).astype(np.float64)
+    # Tags and difficulties practiced so far
+    tag_counts = catalog.tag_matrix.T @ solved_counts
+    diff_counts = np.bincount(catalog.difficulty, weights=solved_counts,
+                              minlength=len(catalog.difficulty_index))
+    practiced = tag_counts > 0
+    tag_min = tag_counts[practiced].min() if practiced.any() else 0.0
+    # Unpracticed tags score as the least practiced one; untagged questions score tag_min
+    user_tags = np.where(practiced, tag_counts, tag_min)
+    tag_score = catalog.tag_matrix @ user_tags
+    tag_score[catalog.untagged] = tag_min
+    diff_score = diff_counts[catalog.difficulty]
+    # Least practiced tags first, then least practiced difficulty, then random.
+    # Scores are integral, so one float key orders all three at once.
+    key = tag_score * (diff_score.max() + 1) + diff_score + rng.random(n)
+    candidates = solved_counts == 0
+    if not candidates.any():
+        candidates[:] = True
+    key[~candidates] = np.inf
+    k = min(limit, int(candidates.sum()))
+    top = np.argpartition(key, k - 1)[:k] if k < n else np.arange(n)
+    top = top[np.argsort(key[top])][:k]
+    return [catalog.summaries[i] for i in top]
+
+# Item-to-item collaborative filtering ("users who solved X also solved Y")
+
+CF_FILES = ('ids', 'counts', 'indptr', 'neighbors', 'co_counts')
+
+def build_cosolve_index(path, top_k=20):
+    """Compute each question's top-k co-solved neighbours and write them under path.
+
+    Pairs are distinct (user, question) solves; neighbours are ranked by cosine
+    similarity co / sqrt(n_i * n_j). Arrays are stored as plain .npy files so
+    workers can memory-map them, and the directory is swapped in atomically.
+    """
+    pairs = db.session.query(Submission.user_id, Submission.question_id) \
+        .filter(Submission.status == 'solved').distinct().all()
+    watermark = db.session.query(db.func.max(Submission.id)).scalar() or 0
+    users = np.array([u for u, _ in pairs], dtype=np.int64)
+    items = np.array([q for _, q in pairs], dtype=np.int64)
+    ids, item_rows = np.unique(items, return_inverse=True)
+    _, user_rows = np.unique(users, return_inverse=True)
+    solves = sparse.csr_matrix((np.ones(len(pairs), dtype=np.int32), (user_rows, item_rows)),
+                               shape=(int(user_rows.max(initial=-1)) + 1, len(ids)))
+    counts = np.asarray(solves.sum(axis=0)).ravel().astype(np.int64)
+    co = (solves.T @ solves).tocsr()
+    co.setdiag(0)
+    co.eliminate_zeros()
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    neighbors, co_counts = [], []
+    for i in range(len(ids)):
+        start, end = co.indptr[i], co.indptr[i + 1]
+        cols, vals = co.indices[start:end], co.data[start:end]
+        if len(cols) > top_k:
+            sims = vals / np.sqrt(counts[i] * counts[cols])
+            keep = np.argpartition(-sims, top_k - 1)[:top_k]
+            cols, vals = cols[keep], vals[keep]
+        neighbors.append(cols.astype(np.int32))
+        co_counts.append(vals.astype(np.int32))
+        indptr[i + 1] = indptr[i] + len(cols)
+    arrays = {
+        'ids': ids,
+        'counts': counts,
+        'indptr': indptr,
+        'neighbors': np.concatenate(neighbors) if neighbors else np.zeros(0, dtype=np.int32),
+        'co_counts': np.concatenate(co_counts) if co_counts else np.zeros(0, dtype=np.int32),
+    }
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    os.makedirs(tmp_path, exist_ok=True)
+    for name in CF_FILES:
+        np.save(os.path.join(tmp_path, f'{name}.npy'), arrays[name])
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({'watermark': watermark, 'top_k': top_k, 'built_at': time.time()}, f)
+    old_path = f'{path}.old-{os.getpid()}'
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return {'questions': len(ids), 'pairs': int(indptr[-1]), 'watermark': watermark}
+
+class CoSolveIndex:
+    """Memory-mapped co-solve neighbours plus an in-memory overlay of newer solves.
+
+    The overlay is filled by replaying solved submissions past the build's
+    watermark (at load, then every `refresh_interval` seconds), so every
+    worker picks up new solves without rebuilding; rebuilding the files just
+    moves the watermark forward.
+    """
+    def __init__(self, path, refresh_interval=30):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._arrays = None
+        self._built_at = None
+        self._next_refresh = 0.0
+
+    @property
+    def available(self):
+        return self._arrays is not None
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() < self._next_refresh:
+            return
+        with self._lock:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            meta_path = os.path.join(self.path, 'meta.json')
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return
+            if meta['built_at'] != self._built_at:
+                self._arrays = {name: np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+                                for name in CF_FILES}
+                self._built_at = meta['built_at']
+                self._watermark = meta['watermark']
+                self._delta_co = {}  # question id -> {question id: extra co-solves}
+                self._delta_counts = {}  # question id -> extra solvers
+            self._catch_up()
+
+    def _catch_up(self):
+        solved = Submission.status == 'solved'
+        upper = db.session.query(db.func.max(Submission.id)) \
+            .filter(solved, Submission.id > self._watermark).scalar()
+        if upper is None:
+            return
+        users = [u for (u,) in db.session.query(Submission.user_id).distinct()
+                 .filter(solved, Submission.id > self._watermark, Submission.id <= upper)]
+        # First solve per (user, question) tells which solves are new since the watermark
+        first = db.session.query(Submission.user_id, Submission.question_id, db.func.min(Submission.id)) \
+            .filter(solved, Submission.id <= upper, Submission.user_id.in_(users)) \
+            .group_by(Submission.user_id, Submission.question_id).all()
+        by_user = {}
+        for user_id, question_id, first_id in first:
+            by_user.setdefault(user_id, []).append((first_id, question_id))
+        for history in by_user.values():
+            history.sort()
+            for i, (first_id, q) in enumerate(history):
+                if first_id <= self._watermark:
+                    continue
+                self._delta_counts[q] = self._delta_counts.get(q, 0) + 1
+                for _, p in history[:i]:  # Pair with everything solved earlier
+                    for a, b in ((q, p), (p, q)):
+                        row = self._delta_co.setdefault(a, {})
+                        row[b] = row.get(b, 0) + 1
+        self._watermark = upper
+
+    def _row(self, question_id):
+        ids = self._arrays['ids']
+        row = int(np.searchsorted(ids, question_id))
+        return row if row < len(ids) and ids[row] == question_id else None
+
+    def _count(self, question_id):
+        row = self._row(question_id)
+        base = int(self._arrays['counts'][row]) if row is not None else 0
+        return base + self._delta_counts.get(question_id, 0)
+
+    def neighbors(self, question_id):
+        """Return {neighbour id: cosine similarity}; O(k) plus the overlay for this question."""
+        co = {}
+        row = self._row(question_id)
+        if row is not None:
+            start, end = self._arrays['indptr'][row], self._arrays['indptr'][row + 1]
+            ids = self._arrays['ids']
+            for j, c in zip(self._arrays['neighbors'][start:end], self._arrays['co_counts'][start:end]):
+                co[int(ids[j])] = int(c)
+        for p, c in list(self._delta_co.get(question_id, {}).items()):
+            co[p] = co.get(p, 0) + c
+        n = self._count(question_id)
+        return {p: c / np.sqrt(n * max(self._count(p), 1)) for p, c in co.items() if n}
+
+    def recommend(self, solved_ids, limit=5, exclude=()):
+        """Rank questions by summed similarity to the given solved questions."""
+        solved = set(solved_ids) | set(exclude)
+        scores = {}
+        for q in solved_ids:
+            for p, sim in self.neighbors(q).items():
+                if p not in solved:
+                    scores[p] = scores.get(p, 0.0) + sim
+        return heapq.nlargest(limit, scores, key=lambda p: (scores[p], -p))
+
+_cf_index = None
+
+def get_cf_index(config, instance_path):
+    global _cf_index
+    if _cf_index is None:
+        path = os.path.join(instance_path, config['CF_INDEX_PATH'])
+        _cf_index = CoSolveIndex(path, refresh_interval=config['CF_REFRESH_INTERVAL'])
+    _cf_index.refresh()
+    return _cf_index
+
+def recommend_cf(user_id, config, instance_path, limit=5):
+    """Collaborative-filtering picks; falls back to the content-based engine."""
+    index = get_cf_index(config, instance_path)
+    # Distinct solved questions, most recently solved first
+    solved = [qid for (qid,) in db.session.query(Submission.question_id)
+              .filter_by(user_id=user_id, status='solved')
+              .group_by(Submission.question_id)
+              .order_by(db.func.max(Submission.id).desc())] if user_id is not None else []
+    picks = []
+    if index.available and solved:
+        picks = index.recommend(solved[:config['CF_USER_HISTORY']], limit, exclude=solved)
+    catalog = get_catalog()
+    rows = catalog.rows_for(picks)
+    results = [catalog.summaries[i] for i in rows]
+    if len(results) < limit:
+        seen = {r['id'] for r in results}
+        results += [q for q in recommend_questions(user_id, limit) if q['id'] not in seen][:limit - len(results)]
+    return results
+
+# Content-based "similar questions" (TF-IDF over title, tags and description)
+
+def question_text(title, tags, description):
+    # Repeat the title so it outweighs a long description
+    return ' '.join([title or '', title or '', (tags or '').replace(',', ' '), description or ''])
+
+class SimilarityIndex:
+    """Precomputed top-k cosine neighbours over TF-IDF question vectors.
+
+    Reads are a dict lookup. Adding a question scores it against the
+    catalog once (one sparse mat-vec) and splices it into any neighbour list
+    it now belongs to; removing one recomputes only the lists that held it.
+    The TF-IDF rows live in CSR buffers that grow geometrically, so an add
+    appends its row in place instead of copying the whole matrix.
+    The vocabulary is fixed at fit time, so `needs_refit` turns true once
+    enough questions were added since the last full build.
+    """
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self._vectorizer = None
+        self._columns = 0
+        self._data = np.zeros(0)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._nnz = 0
+        self._ids = []  # row -> question id
+        self._rows = {}  # question id -> row
+        self._neighbors = {}  # question id -> ((neighbor id, score), ...)
+        self._referrers = {}  # question id -> ids whose lists contain it
+        self._fitted_size = 0
+        self._added_since_fit = 0
+        self._lock = threading.Lock()
+
+    @property
+    def fitted(self):
+        return self._vectorizer is not None
+
+    @property
+    def needs_refit(self):
+        if self._vectorizer is None:
+            return self._added_since_fit > 0
+        return self._added_since_fit > max(50, self._fitted_size // 5)
+
+    def similar(self, question_id, k=None):
+        return list(self._neighbors.get(question_id, ()))[:k or self.top_k]
+
+    def __contains__(self, question_id):
+        return question_id in self._rows
+
+    @classmethod
+    def build(cls, documents, top_k=10, chunk_size=512):
+        """Fit TF-IDF on (id, text) pairs and precompute every neighbour list."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        index = cls(top_k=top_k)
+        documents = list(documents)
+        if not documents:
+            return index
+        index._vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True, ngram_range=(1, 2))
+        try:
+            matrix = index._vectorizer.fit_transform(text for _, text in documents).tocsr()
+        except ValueError:  # Only stop words: nothing to compare on
+            index._vectorizer = None
+            return index
+        index._columns = matrix.shape[1]
+        index._data, index._indices, index._indptr = matrix.data, matrix.indices, matrix.indptr
+        index._nnz = matrix.nnz
+        index._ids = [question_id for question_id, _ in documents]
+        index._rows = {question_id: row for row, question_id in enumerate(index._ids)}
+        index._fitted_size = len(documents)
+        # Row blocks keep the similarity product sparse and bounded in memory
+        for start in range(0, len(documents), chunk_size):
+            sims = (matrix[start:start + chunk_size] @ matrix.T).tocsr()
+            for offset in range(sims.shape[0]):
+                row = start + offset
+                lo, hi = sims.indptr[offset], sims.indptr[offset + 1]
+                cols, vals = sims.indices[lo:hi], sims.data[lo:hi]
+                keep = cols != row
+                index._set_neighbors(index._ids[row], index._top_of(cols[keep], vals[keep]))
+        return index
+
+    def add(self, question_id, text):
+        with self._lock:
+            self._remove(question_id)
+            if self._vectorizer is None:
+                self._added_since_fit += 1
+                return False  # Picked up by the next refit
+            vec = self._vectorizer.transform([text]).tocsr()
+            sims = (self._matrix @ vec.T).toarray().ravel() if self._ids else np.zeros(0)
+            row = len(self._ids)
+            self._append_row(vec)
+            self._ids.append(question_id)
+            self._rows[question_id] = row
+            self._added_since_fit += 1
+            self._set_neighbors(question_id, self._top(np.append(sims, 0.0)))
+            # Splice the new question into lists it now belongs to
+            for other_row in np.flatnonzero(sims):
+                other = self._ids[other_row]
+                if other is None:
+                    continue
+                current = self._neighbors.get(other, ())
+                score = round(float(sims[other_row]), 4)
+                if len(current) < self.top_k or score > current[-1][1]:
+                    merged = sorted(current + ((question_id, score),), key=lambda n: (-n[1], n[0]))
+                    self._set_neighbors(other, merged[:self.top_k])
+            return True
+
+    def remove(self, question_id):
+        with self._lock:
+            return self._remove(question_id)
+
+    def _remove(self, question_id):
+        row = self._rows.pop(question_id, None)
+        if row is None:
+            return False
+        self._ids[row] = None
+        # Explicit zeros score nothing, and leave the buffers the same size
+        self._data[self._indptr[row]:self._indptr[row + 1]] = 0
+        self._set_neighbors(question_id, ())
+        self._neighbors.pop(question_id, None)
+        # Lists that held the removed question lose an entry; recompute just those
+        for other in self._referrers.pop(question_id, set()):
+            other_row = self._rows.get(other)
+            if other_row is None:
+                continue
+            sims = (self._matrix @ self._matrix[other_row].T).toarray().ravel()
+            sims[other_row] = 0.0
+            self._set_neighbors(other, self._top(sims))
+        return True
+
+    @property
+    def _matrix(self):
+        """CSR view over the filled part of the buffers (no copy)."""
+        rows = len(self._ids)
+        return sparse.csr_matrix((self._data[:self._nnz], self._indices[:self._nnz], self._indptr[:rows + 1]),
+                                 shape=(rows, self._columns))
+
+    def _append_row(self, vec):
+        end = self._nnz + vec.nnz
+        if end > len(self._data):
+            capacity = max(end, 2 * len(self._data))
+            self._data, self._indices = _grow(self._data, capacity), _grow(self._indices, capacity)
+        row = len(self._ids)
+        if row + 2 > len(self._indptr):
+            self._indptr = _grow(self._indptr, max(row + 2, 2 * len(self._indptr)))
+        self._data[self._nnz:end] = vec.data
+        self._indices[self._nnz:end] = vec.indices
+        self._indptr[row + 1] = end
+        self._nnz = end
+
+    def _top(self, sims):
+        rows = np.flatnonzero(sims > 0)
+        return self._top_of(rows, sims[rows])
+
+    def _top_of(self, rows, sims):
+        """Best top_k (id, score) pairs from parallel row/score arrays."""
+        k = min(self.top_k, len(rows))
+        if not k:
+            return ()
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.lexsort((rows[best], -sims[best]))]
+        return tuple((self._ids[rows[i]], round(float(sims[i]), 4)) for i in best
+                     if self._ids[rows[i]] is not None)
+
+    def _set_neighbors(self, question_id, neighbors):
+        for other, _ in self._neighbors.get(question_id, ()):
+            self._referrers.get(other, set()).discard(question_id)
+        self._neighbors[question_id] = tuple(neighbors)
+        for other, _ in neighbors:
+            self._referrers.setdefault(other, set()).add(question_id)
+
+def _grow(array, capacity):
+    grown = np.zeros(capacity, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
@@ -0,0 +1,175 @@
+# Review Service: spaced-repetition scheduling of solved questions
+
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from flask import current_app
+
+from app.core.extensions import db
+from app.features.submission.models import Submission, ReviewItem
+from app.services.dsa_service import IndexedPriorityQueue
+
+# Days until the next review at each level; a review solved on time moves up a level
+REVIEW_INTERVALS = (1, 3, 7, 14, 30, 60, 120)
+
+def next_review(state, status, at):
+    """Fold one submission into a (level, due_at) review state; None means not scheduled.
+
+    The first solve schedules a review a day later. Solving again once the
+    review is due moves up a level (longer interval); solving early changes
+    nothing. A failed attempt on a solved question starts over at level 1.
+    """
+    if state is None:
+        if status != 'solved':
+            return None
+        return 1, at + timedelta(days=REVIEW_INTERVALS[0])
+    level, due_at = state
+    if status != 'solved':
+        return 1, at + timedelta(days=REVIEW_INTERVALS[0])
+    if at < due_at:
+        return state
+    level = min(level + 1, len(REVIEW_INTERVALS))
+    return level, at + timedelta(days=REVIEW_INTERVALS[level - 1])
+
+def record_review(submission):
+    """Advance the (user, question) review row for a new submission; the caller commits.
+
+    Returns the updated ReviewItem, or None when nothing is scheduled.
+    """
+    item = db.session.get(ReviewItem, (submission.user_id, submission.question_id))
+    state = next_review((item.level, item.due_at) if item else None, submission.status, submission.timestamp)
+    if state is None:
+        return None
+    if item is None:
+        item = ReviewItem(user_id=submission.user_id, question_id=submission.question_id)
+        db.session.add(item)
+    item.level, item.due_at = state
+    return item
+
+def record_batch_reviews(rows):
+    """Advance review rows for a batch of new submissions (dicts); the caller commits.
+
+    Returns {(user_id, question_id): ReviewItem} for every pair the batch scheduled.
+    """
+    if not rows:
+        return {}
+    pairs = {(row['user_id'], row['question_id']) for row in rows}
+    items = {(item.user_id, item.question_id): item for item in ReviewItem.query
+             .filter(db.tuple_(ReviewItem.user_id, ReviewItem.question_id).in_(pairs))}
+    scheduled = {}
+    for row in sorted(rows, key=lambda row: row['timestamp']):
+        key = (row['user_id'], row['question_id'])
+        item = items.get(key)
+        state = next_review((item.level, item.due_at) if item else None, row['status'], row['timestamp'])
+        if state is None:
+            continue
+        if item is None:
+            item = items[key] = ReviewItem(user_id=key[0], question_id=key[1])
+            db.session.add(item)
+        item.level, item.due_at = state
+        scheduled[key] = item
+    return scheduled
+
+def replay_review(user_id, question_id):
+    """Recompute one review row from that pair's remaining submissions (after a delete)."""
+    state = None
+    for status, at in db.session.query(Submission.status, Submission.timestamp) \
+            .filter_by(user_id=user_id, question_id=question_id) \
+            .order_by(Submission.timestamp, Submission.id):
+        state = next_review(state, status, at)
+    item = db.session.get(ReviewItem, (user_id, question_id))
+    if state is None:
+        if item is not None:
+            db.session.delete(item)
+        return None
+    if item is None:
+        item = ReviewItem(user_id=user_id, question_id=question_id)
+        db.session.add(item)
+    item.level, item.due_at = state
+    return item
+
+def rebuild_reviews():
+    """Replay all submission history into review_item; returns the number of rows written."""
+    ReviewItem.query.delete()
+    items, current, state = [], None, None
+    rows = db.session.query(Submission.user_id, Submission.question_id, Submission.status, Submission.timestamp) \
+        .filter(Submission.timestamp.isnot(None)) \
+        .order_by(Submission.user_id, Submission.question_id, Submission.timestamp, Submission.id) \
+        .yield_per(1000)
+    for user_id, question_id, status, at in rows:
+        if (user_id, question_id) != current:
+            if state is not None:
+                items.append({'user_id': current[0], 'question_id': current[1], 'level': state[0], 'due_at': state[1]})
+            current, state = (user_id, question_id), None
+        state = next_review(state, status, at)
+    if state is not None:
+        items.append({'user_id': current[0], 'question_id': current[1], 'level': state[0], 'due_at': state[1]})
+    if items:
+        db.session.bulk_insert_mappings(ReviewItem, items)
+    db.session.commit()
+    return len(items)
+
+class ReviewScheduler:
+    """Per-user IndexedPriorityQueues of question ids by due time.
+
+    A user's queue is loaded from review_item on first use and then kept in
+    step with writes, so "what is due" never touches submission history.
+    Only the `max_users` most recently used queues are kept.
+    """
+    def __init__(self, max_users=10000):
+        self.max_users = max_users
+        self._queues = OrderedDict()  # user id -> IndexedPriorityQueue
+        self._lock = threading.Lock()
+
+    def _queue(self, user_id):
+        queue = self._queues.get(user_id)
+        if queue is not None:
+            self._queues.move_to_end(user_id)
+            return queue
+        queue = IndexedPriorityQueue()
+        for question_id, due_at in db.session.query(ReviewItem.question_id, ReviewItem.due_at) \
+                .filter_by(user_id=user_id):
+            queue.push(question_id, due_at)
+        self._queues[user_id] = queue
+        while len(self._queues) > self.max_users:
+            self._queues.popitem(last=False)
+        return queue
+
+    def due(self, user_id, now, limit):
+        """Up to `limit` (question id, due_at) pairs due by `now`, most overdue first."""
+        with self._lock:
+            return self._queue(user_id).smallest(limit, max_priority=now)
+
+    def upcoming(self, user_id):
+        """(question id, due_at) of the earliest scheduled review, or None."""
+        with self._lock:
+            return self._queue(user_id).peek()
+
+    def update(self, user_id, question_id, due_at):
+        """Apply a committed review change; due_at None unschedules the question."""
+        with self._lock:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                return  # loaded fresh from the table on next use
+            if due_at is not None:
+                queue.push(question_id, due_at)
+            elif question_id in queue:
+                queue.remove(question_id)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._queues.pop(user_id, None)
+
+_scheduler_lock = threading.Lock()
+
+def get_review_scheduler():
+    """Return the app's review scheduler (one per app, so queues never outlive their database)."""
+    scheduler = current_app.extensions.get('review_scheduler')
+    if scheduler is None:
+        with _scheduler_lock:
+            scheduler = current_app.extensions.get('review_scheduler')
+            if scheduler is None:
+                scheduler = ReviewScheduler(max_users=current_app.config['REVIEW_CACHE_USERS'])
+                current_app.extensions['review_scheduler'] = scheduler
+    return scheduler
@@ -0,0 +1,189 @@
+# Search Service: in-memory inverted index with BM25 ranking, and bitmap filters
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from given how in into is it of on or return '
+    'such that the their then there these this to was what when which with you your'.split()
+)
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+class InvertedIndex:
+    """BM25 full-text index over weighted document fields.
+
+    Each field's term frequencies are scaled by its weight before scoring (a
+    simplified BM25F), so a match in the title outranks one in the description.
+    Documents are added, replaced and removed one at a time.
+    """
+    def __init__(self, field_weights, k1=1.2, b=0.75):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc_id: weighted term frequency}
+        self._doc_terms = {}  # doc_id -> {term: weighted term frequency}
+        self._doc_len = {}  # doc_id -> weighted length
+        self._total_len = 0.0
+        self._data = {}  # doc_id -> payload returned by search
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, doc_id, fields, data=None):
+        """Index (or re-index) a document given as {field: text}."""
+        terms = Counter()
+        for field, weight in self.field_weights.items():
+            for token in tokenize(fields.get(field)):
+                terms[token] += weight
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = dict(terms)
+            length = sum(terms.values())
+            self._doc_len[doc_id] = length
+            self._total_len += length
+            self._data[doc_id] = data if data is not None else {'id': doc_id}
+
+    def remove(self, doc_id):
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._data.pop(doc_id, None)
+        return True
+
+    def search(self, query, limit=10):
+        """Return (payload, score) pairs for the best `limit` documents, best first."""
+        terms = set(tokenize(query))
+        scores = Counter()
+        with self._lock:
+            n = len(self._doc_len)
+            if not n or not terms:
+                return []
+            avg_len = self._total_len / n or 1.0
+            k1, b, doc_len = self.k1, self.b, self._doc_len
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [(self._data[doc_id], score) for doc_id, score in best]
+
+    @classmethod
+    def build(cls, documents, **kwargs):
+        """Build a new index from (doc_id, fields, data) tuples (for atomic swaps)."""
+        index = cls(**kwargs)
+        for doc_id, fields, data in documents:
+            index.add(doc_id, fields, data)
+        return index
+
+def bitmap_ids(bits):
+    """Decode an int bitmap into the sorted list of set bit positions."""
+    if not bits:
+        return []
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder='little')).tolist()
+
+class BitmapIndex:
+    """Exact-match filter index: one bitmap per (field, value), bit i set for doc id i.
+
+    Bitmaps are Python ints, so filtering on several values is a handful of
+    big-int AND/OR operations over the whole id range instead of a scan.
+    """
+    def __init__(self):
+        self._bitmaps = {}  # (field, value) -> int bitmap
+        self._doc_keys = {}  # doc_id -> [(field, value)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_keys)
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) a document given as {field: iterable of values}."""
+        keys = [(field, value) for field, values in fields.items() for value in set(values)]
+        bit = 1 << doc_id
+        with self._lock:
+            self._remove(doc_id)
+            for key in keys:
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+            self._doc_keys[doc_id] = keys
+
+    def remove(self, doc_id):
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        keys = self._doc_keys.pop(doc_id, None)
+        if keys is None:
+            return False
+        mask = ~(1 << doc_id)
+        for key in keys:
+            bits = self._bitmaps[key] & mask
+            if bits:
+                self._bitmaps[key] = bits
+            else:
+                del self._bitmaps[key]
+        return True
+
+    def match(self, field, values, match_all=False):
+        """Bitmap of documents with all (or any) of the given values in field."""
+        bitmaps = [self._bitmaps.get((field, value), 0) for value in set(values)]
+        if not bitmaps:
+            return 0
+        result = bitmaps[0]
+        for bits in bitmaps[1:]:
+            result = result & bits if match_all else result | bits
+        return result
+
+    def filter(self, filters, match_all=None):
+        """Sorted ids matching every field in {field: values}; `match_all` names fields needing all values."""
+        match_all = match_all or set()
+        with self._lock:
+            result = None
+            for field, values in filters.items():
+                bits = self.match(field, values, field in match_all)
+                result = bits if result is None else result & bits
+                if not result:
+                    return []
+        return bitmap_ids(result or 0)
+
+    @classmethod
+    def build(cls, documents):
+        """Build a new index from (doc_id, {field: values}) pairs (for atomic swaps)."""
+        index = cls()
+        positions = {}
+        for doc_id, fields in documents:
+            keys = [(field, value) for field, values in fields.items() for value in set(values)]
+            index._doc_keys[doc_id] = keys
+            for key in keys:
+                positions.setdefault(key, []).append(doc_id)
+        # Set all bits of a bitmap at once rather than one big-int OR per document
+        for key, ids in positions.items():
+            flags = np.zeros(max(ids) + 1, dtype=np.uint8)
+            flags[ids] = 1
+            index._bitmaps[key] = int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+        return index
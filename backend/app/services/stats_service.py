@@ -0,0 +1,280 @@
+# Stats Service: per-user progress aggregates maintained alongside submission writes
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.core.extensions import db
+from app.features.question.models import Question, normalize_tags
+from app.features.submission.models import Submission, UserStats, UserQuestionProgress, UserActivityDay
+
+# INSERT ... ON CONFLICT DO NOTHING for the supported databases
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def _locked_stats(user_id):
+    """The user's aggregate row, locked for this transaction (created empty if missing)."""
+    _ensure_stats([user_id])
+    return db.session.query(UserStats).filter_by(user_id=user_id).with_for_update().one()
+
+def _ensure_stats(user_ids):
+    """Create empty aggregate rows for users that have none.
+
+    SELECT ... FOR UPDATE locks nothing when the row doesn't exist yet, so two
+    first submissions for a user would both insert it; ON CONFLICT DO NOTHING
+    lets the second one find the first one's row instead of failing.
+    """
+    insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        # Column defaults fill in the zeroed counters
+        db.session.execute(insert(UserStats.__table__).on_conflict_do_nothing(index_elements=['user_id']),
+                           [{'user_id': user_id} for user_id in user_ids])
+        return
+    # Other databases: insert each missing row in a savepoint and treat a duplicate key as created
+    existing = {user_id for (user_id,) in db.session.query(UserStats.user_id)
+                .filter(UserStats.user_id.in_(user_ids))}
+    for user_id in set(user_ids) - existing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(UserStats.__table__.insert(), {'user_id': user_id})
+        except IntegrityError:
+            pass
+
+def _bump(counts, keys, delta):
+    # JSON columns are only persisted on reassignment, so always return a new dict
+    counts = dict(counts or {})
+    for key in keys:
+        counts[key] = counts.get(key, 0) + delta
+        if counts[key] <= 0:
+            del counts[key]
+    return counts
+
+def _solved_buckets(question_id):
+    question = db.session.get(Question, question_id)
+    if question is None:
+        return [], []
+    return [question.difficulty], normalize_tags(question.tags)
+
+def streaks(days):
+    """(streak ending on the last day, longest streak) for sorted, distinct active days."""
+    current = longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day == previous + timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+def _recompute_streaks(stats):
+    days = [row.day for row in UserActivityDay.query.filter_by(user_id=stats.user_id).order_by(UserActivityDay.day)]
+    stats.current_streak, stats.longest_streak = streaks(days)
+    stats.last_active_date = days[-1] if days else None
+
+def _apply(submission, sign):
+    user_id, question_id = submission.user_id, submission.question_id
+    solved = int(submission.status == 'solved')
+    # Lock first, so the progress row read below can't be created concurrently
+    stats = _locked_stats(user_id)
+    progress = db.session.get(UserQuestionProgress, (user_id, question_id))
+    if progress is None and sign < 0:
+        # Never counted (aggregates not backfilled yet): nothing to undo
+        return
+    if progress is None:
+        progress = UserQuestionProgress(user_id=user_id, question_id=question_id, submissions=0, solves=0)
+        db.session.add(progress)
+    _count(stats, progress, solved, sign, lambda: _solved_buckets(question_id))
+    if progress.submissions <= 0:
+        db.session.delete(progress)
+    _apply_activity(stats, submission.timestamp, sign)
+
+def _count(stats, progress, solved, sign, buckets):
+    """Move one submission's counters; buckets() -> (difficulties, tags) is only called when needed."""
+    was_attempted, was_solved = progress.submissions > 0, progress.solves > 0
+    progress.submissions += sign
+    progress.solves += sign * solved
+    stats.submissions += sign
+    stats.solved_submissions += sign * solved
+    if (progress.submissions > 0) != was_attempted:
+        stats.attempted_questions += sign
+    if (progress.solves > 0) != was_solved:
+        # Distinct solved counts only move on a question's first solve or its last removal
+        stats.solved_questions += sign
+        difficulties, tags = buckets()
+        stats.solved_by_difficulty = _bump(stats.solved_by_difficulty, difficulties, sign)
+        stats.solved_by_tag = _bump(stats.solved_by_tag, tags, sign)
+
+def _advance_streak(stats, day):
+    """Extend the streak with a newly active day; False if the day is not after the last active one."""
+    last = stats.last_active_date
+    if last is not None and day <= last:
+        return False
+    stats.current_streak = stats.current_streak + 1 if last == day - timedelta(days=1) else 1
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+    stats.last_active_date = day
+    return True
+
+def _apply_activity(stats, timestamp, sign):
+    if timestamp is None:
+        return
+    day = timestamp.date()
+    activity = db.session.get(UserActivityDay, (stats.user_id, day))
+    if sign > 0:
+        stats.last_activity = max(stats.last_activity or timestamp, timestamp)
+        if activity is not None:
+            activity.submissions += 1
+            return
+        db.session.add(UserActivityDay(user_id=stats.user_id, day=day, submissions=1))
+        if not _advance_streak(stats, day):
+            # Backdated activity can join two streaks; only then walk the user's active days
+            db.session.flush()
+            _recompute_streaks(stats)
+        return
+    if activity is not None:
+        activity.submissions -= 1
+        if activity.submissions <= 0:
+            db.session.delete(activity)
+            db.session.flush()
+            _recompute_streaks(stats)
+    if stats.last_activity is not None and timestamp >= stats.last_activity:
+        stats.last_activity = db.session.query(db.func.max(Submission.timestamp)) \
+            .filter(Submission.user_id == stats.user_id).scalar()
+
+def record_submission_stats(submission):
+    """Fold a new (flushed) submission into its user's aggregates; the caller commits."""
+    _apply(submission, 1)
+
+def record_batch_stats(rows):
+    """Fold a batch of new submissions (dicts with user_id, question_id, status and timestamp)
+    into their users' aggregates; the caller commits.
+
+    Existing aggregate rows are read with one query per table for the whole
+    batch, and a user's active days are walked at most once per batch.
+    """
+    if not rows:
+        return
+    user_ids = {row['user_id'] for row in rows}
+    question_ids = {row['question_id'] for row in rows}
+    _ensure_stats(user_ids)
+    stats = {s.user_id: s for s in db.session.query(UserStats)
+             .filter(UserStats.user_id.in_(user_ids)).with_for_update()}
+    # Exact (user, question) and (user, day) keys; separate IN lists would match their cross product
+    pairs = {(row['user_id'], row['question_id']) for row in rows}
+    progress = {(p.user_id, p.question_id): p for p in UserQuestionProgress.query
+                .filter(db.tuple_(UserQuestionProgress.user_id, UserQuestionProgress.question_id).in_(pairs))}
+    user_days = {(row['user_id'], row['timestamp'].date()) for row in rows}
+    activity = {(a.user_id, a.day): a for a in UserActivityDay.query
+                .filter(db.tuple_(UserActivityDay.user_id, UserActivityDay.day).in_(user_days))}
+    buckets = {q.id: ([q.difficulty], normalize_tags(q.tags)) for q in
+               db.session.query(Question.id, Question.difficulty, Question.tags).filter(Question.id.in_(question_ids))}
+    backdated = set()
+    for row in sorted(rows, key=lambda row: row['timestamp']):
+        user_id, question_id, timestamp = row['user_id'], row['question_id'], row['timestamp']
+        user = stats[user_id]
+        pair = progress.get((user_id, question_id))
+        if pair is None:
+            pair = progress[user_id, question_id] = UserQuestionProgress(user_id=user_id, question_id=question_id,
+                                                                         submissions=0, solves=0)
+            db.session.add(pair)
+        _count(user, pair, int(row['status'] == 'solved'), 1, lambda: buckets.get(question_id, ([], [])))
+        user.last_activity = max(user.last_activity or timestamp, timestamp)
+        day = timestamp.date()
+        if (user_id, day) in activity:
+            activity[user_id, day].submissions += 1
+            continue
+        activity[user_id, day] = UserActivityDay(user_id=user_id, day=day, submissions=1)
+        db.session.add(activity[user_id, day])
+        if user_id not in backdated and not _advance_streak(user, day):
+            backdated.add(user_id)
+    if backdated:
+        db.session.flush()
+        for user_id in backdated:
+            _recompute_streaks(stats[user_id])
+
+def remove_submission_stats(submission):
+    """Undo a submission that was deleted (and flushed) in the current transaction; the caller commits."""
+    _apply(submission, -1)
+
+def clear_user_stats(user_id):
+    for model in (UserStats, UserQuestionProgress, UserActivityDay):
+        model.query.filter_by(user_id=user_id).delete()
+
+def user_stats(user_id, today=None):
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        return {'user_id': user_id, 'submissions': 0, 'solved_submissions': 0, 'attempted_questions': 0,
+                'solved_questions': 0, 'solved_by_difficulty': {}, 'solved_by_tag': {},
+                'current_streak': 0, 'longest_streak': 0, 'last_active_date': None, 'last_activity': None}
+    today = today or datetime.utcnow().date()
+    # A streak is still alive until a full day passes without activity
+    alive = stats.last_active_date is not None and stats.last_active_date >= today - timedelta(days=1)
+    return {
+        'user_id': user_id,
+        'submissions': stats.submissions,
+        'solved_submissions': stats.solved_submissions,
+        'attempted_questions': stats.attempted_questions,
+        'solved_questions': stats.solved_questions,
+        'solved_by_difficulty': stats.solved_by_difficulty,
+        'solved_by_tag': stats.solved_by_tag,
+        'current_streak': stats.current_streak if alive else 0,
+        'longest_streak': stats.longest_streak,
+        'last_active_date': stats.last_active_date.isoformat() if stats.last_active_date else None,
+        'last_activity': stats.last_activity.isoformat() if stats.last_activity else None
+    }
+
+def _as_date(value):
+    # func.date() comes back as a string on SQLite and as a date elsewhere
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def rebuild_user_stats(user_id=None):
+    """Recompute aggregates from submission history (all users, or one); returns the users rebuilt."""
+    def scoped(query):
+        return query.filter(Submission.user_id == user_id) if user_id is not None else query
+
+    if user_id is None:
+        for model in (UserStats, UserQuestionProgress, UserActivityDay):
+            model.query.delete()
+    else:
+        clear_user_stats(user_id)
+
+    solved = db.func.sum(db.case((Submission.status == 'solved', 1), else_=0))
+    progress = scoped(db.session.query(Submission.user_id, Submission.question_id,
+                                       db.func.count(Submission.id), solved)
+                      .group_by(Submission.user_id, Submission.question_id)).all()
+    day = db.func.date(Submission.timestamp)
+    days = scoped(db.session.query(Submission.user_id, day, db.func.count(Submission.id))
+                  .filter(Submission.timestamp.isnot(None))
+                  .group_by(Submission.user_id, day).order_by(Submission.user_id, day)).all()
+    last_activity = dict(scoped(db.session.query(Submission.user_id, db.func.max(Submission.timestamp))
+                                .group_by(Submission.user_id)).all())
+    questions = {q.id: (q.difficulty, normalize_tags(q.tags))
+                 for q in db.session.query(Question.id, Question.difficulty, Question.tags)}
+
+    stats = {}
+    for uid, question_id, submissions, solves in progress:
+        s = stats.setdefault(uid, UserStats(user_id=uid, submissions=0, solved_submissions=0,
+                                            attempted_questions=0, solved_questions=0, solved_by_difficulty={},
+                                            solved_by_tag={}, current_streak=0, longest_streak=0,
+                                            last_activity=last_activity.get(uid)))
+        solves = int(solves or 0)
+        s.submissions += submissions
+        s.solved_submissions += solves
+        s.attempted_questions += 1
+        if solves:
+            s.solved_questions += 1
+            difficulty, tags = questions.get(question_id, (None, []))
+            s.solved_by_difficulty = _bump(s.solved_by_difficulty, [difficulty] if difficulty else [], 1)
+            s.solved_by_tag = _bump(s.solved_by_tag, tags, 1)
+        db.session.add(UserQuestionProgress(user_id=uid, question_id=question_id,
+                                            submissions=submissions, solves=solves))
+    active_days = {}
+    for uid, active_day, submissions in days:
+        active_day = _as_date(active_day)
+        active_days.setdefault(uid, []).append(active_day)
+        db.session.add(UserActivityDay(user_id=uid, day=active_day, submissions=submissions))
+    for uid, s in stats.items():
+        user_days = active_days.get(uid, [])
+        s.current_streak, s.longest_streak = streaks(user_days)
+        s.last_active_date = user_days[-1] if user_days else None
+        db.session.add(s)
+    db.session.commit()
+    return len(stats)
@@ -0,0 +1,126 @@
+"""Read and write concurrency of the database layer, before and after tuning.
+
+Runs the same workload against two copies of a benchmark dataset: one in
+the old profile (rollback journal, synchronous=FULL, no memory map, and
+without the composite submission indexes) and one with the current
+defaults (WAL, synchronous=NORMAL, mmap, indexes). Each copy is measured
+with readers alone (submission history and recommendations) and then with
+readers running alongside writers recording submissions. Reported are
+requests per second, read p95 latency and failed requests (for example
+"database is locked").
+
+Usage (from backend/):
+    python -m benchmarks.database_benchmark --scale 100k --readers 4 --writers 2 --seconds 10
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+
+from app import create_app
+from app.core.extensions import db
+from app.features.submission.models import Submission
+from benchmarks.datasets import SCALES, bench_config, generate
+from benchmarks.load import percentile
+
+SUBMISSION_INDEXES = {index.name: [column.name for column in index.columns]
+                      for index in Submission.__table__.indexes}
+PROFILES = {
+    'before': dict(SQLITE_JOURNAL_MODE='DELETE', SQLITE_SYNCHRONOUS='FULL', SQLITE_MMAP_SIZE=0),
+    'after': {},
+}
+
+
+def prepare(source, profile):
+    path = source.replace('.db', f'-{profile}{os.getpid()}.db')
+    shutil.copyfile(source, path)
+    conn = sqlite3.connect(path)
+    for name, columns in SUBMISSION_INDEXES.items():
+        if profile == 'before':
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+        else:  # datasets cached before the indexes existed
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON submission ({', '.join(columns)})")
+    if profile == 'before':
+        conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+    return path
+
+
+def worker(app, deadline, kind, users, questions, seed, results):
+    client = app.test_client()
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, users)
+        if kind == 'write':
+            body = {'user_id': user_id, 'question_id': rng.randint(1, questions),
+                    'status': rng.choice(['solved', 'attempted'])}
+            started = time.perf_counter()
+            response = client.post('/api/submissions/record', json=body)
+        else:
+            path = rng.choice((f'/api/submissions/user/{user_id}?limit=50', f'/api/recommendations/?user_id={user_id}'))
+            started = time.perf_counter()
+            response = client.get(path)
+        response.get_data()
+        response.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+        errors += response.status_code >= 500
+    results.append((kind, latencies, errors))
+
+
+def run_phase(app, readers, writers, seconds, users, questions):
+    results = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(app, deadline, kind, users, questions, i, results))
+               for i, kind in enumerate(['read'] * readers + ['write'] * writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = {}
+    for kind in ('read', 'write'):
+        latencies = sorted(ms for k, samples, _ in results if k == kind for ms in samples)
+        summary[kind] = {
+            'rps': len(latencies) / seconds,
+            'p95_ms': percentile(latencies, 0.95),
+            'errors': sum(errors for k, _, errors in results if k == kind)
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='100k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    source = generate(args.scale, args.seed)
+    _, (questions, users) = SCALES[args.scale]
+    print(f'{"profile":<8} {"phase":<14} {"read/s":>8} {"read p95":>9} {"write/s":>8} {"write p95":>10} {"errors":>7}')
+    for profile, overrides in PROFILES.items():
+        path = prepare(source, profile)
+        try:
+            app = create_app(bench_config(f'sqlite:///{path}', EXECUTION_CACHE_SIZE=0,
+                                          CF_REFRESH_INTERVAL=0, **overrides))
+            for phase, writers in (('readers only', 0), ('with writers', args.writers)):
+                stats = run_phase(app, args.readers, writers, args.seconds, users, questions)
+                read, write = stats['read'], stats['write']
+                print(f"{profile:<8} {phase:<14} {read['rps']:>8.1f} {read['p95_ms']:>7.1f}ms "
+                      f"{write['rps']:>8.1f} {write['p95_ms']:>8.1f}ms {read['errors'] + write['errors']:>7}")
+            with app.app_context():
+                db.engine.dispose()
+        finally:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Synthetic, reproducible question banks and submission histories for benchmarks.
+
+A scale names the number of submissions; questions and users grow with it.
+Databases are written with bulk inserts, then the derived tables (user stats,
+review schedule) are rebuilt exactly as the CLI commands would, and cached on
+disk keyed by scale and seed so repeated runs skip generation.
+
+Usage (from backend/):
+    python -m benchmarks.datasets --scale 100k
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.core.config import Config
+from app.core.extensions import db
+from app.features.question.models import Question, Tag, question_tags, normalize_tags
+from app.features.submission.models import Submission
+from app.features.user.models import User
+from app.services.review_service import rebuild_reviews
+from app.services.stats_service import rebuild_user_stats
+
+# submissions: (questions, users)
+SCALES = {
+    '1k': (1_000, (200, 50)),
+    '10k': (10_000, (1_000, 500)),
+    '100k': (100_000, (5_000, 5_000)),
+    '1m': (1_000_000, (20_000, 50_000)),
+}
+DATA_DIR = os.path.join(os.path.dirname(__file__), '.data')
+PASSWORD = 'benchmark-password'
+TAGS = ('array', 'string', 'hashmap', 'graph', 'bfs', 'dfs', 'tree', 'dp', 'greedy', 'heap',
+        'stack', 'queue', 'linkedlist', 'matrix', 'math', 'sorting', 'binarysearch', 'trie')
+WORDS = (
+    'two sum array linked list reverse merge intervals binary tree graph path longest substring '
+    'palindrome matrix spiral rotate search sorted window maximum minimum subarray product climbing '
+    'stairs coin change word ladder course schedule island count clone cache design stack queue heap '
+    'kth largest element valid parentheses anagram group string decode ways jump game unique paths '
+    'edit distance trapping rain water median stream'
+).split()
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+BATCH = 10_000
+
+
+def database_path(scale, seed):
+    return os.path.join(DATA_DIR, f'{scale}-seed{seed}.db')
+
+
+def bench_config(url, **overrides):
+    """A Config subclass pointing at url (create_app takes a config object)."""
+    return type('BenchmarkConfig', (Config,), dict(SQLALCHEMY_DATABASE_URI=url, **overrides))
+
+
+def _insert(table, rows):
+    for start in range(0, len(rows), BATCH):
+        db.session.execute(table.insert(), rows[start:start + BATCH])
+
+
+def generate(scale, seed=42, path=None):
+    """Write the dataset for scale into a SQLite file and return its path (reused if present)."""
+    path = path or database_path(scale, seed)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    submissions, (questions, users) = SCALES[scale]
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    app = create_app(bench_config(f'sqlite:///{partial}'))
+    with app.app_context():
+        password_hash = generate_password_hash(PASSWORD)
+        _insert(User.__table__, [{'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+                                  'password_hash': password_hash} for i in range(1, users + 1)])
+        tag_ids = {name: i for i, name in enumerate(TAGS, start=1)}
+        _insert(Tag.__table__, [{'id': i, 'name': name} for name, i in tag_ids.items()])
+        question_rows, link_rows = [], []
+        for qid in range(1, questions + 1):
+            tags = ','.join(rng.sample(TAGS, rng.randint(0, 3)))
+            question_rows.append({
+                'id': qid,
+                'title': f"{' '.join(rng.sample(WORDS, rng.randint(2, 4))).title()} {qid}",
+                'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+                'difficulty': rng.choice(DIFFICULTIES),
+                'tags': tags
+            })
+            link_rows.extend({'question_id': qid, 'tag_id': tag_ids[name]} for name in normalize_tags(tags))
+        _insert(Question.__table__, question_rows)
+        _insert(question_tags, link_rows)
+        # Log-uniform ids: low ids (popular questions, heavy users) get most submissions
+        start = datetime.utcnow() - timedelta(days=180)
+        rows = []
+        for sid in range(1, submissions + 1):
+            rows.append({
+                'id': sid,
+                'user_id': int(users ** rng.random()),
+                'question_id': int(questions ** rng.random()),
+                'status': 'solved' if rng.random() < 0.4 else 'attempted',
+                'timestamp': start + timedelta(seconds=rng.randrange(180 * 86400))
+            })
+            if len(rows) == BATCH:
+                _insert(Submission.__table__, rows)
+                rows = []
+        _insert(Submission.__table__, rows)
+        db.session.commit()
+        rebuild_user_stats()
+        rebuild_reviews()
+        db.session.remove()
+        db.engine.dispose()
+    os.replace(partial, path)
+    print(f'Generated {scale} ({questions} questions, {users} users, {submissions} submissions) '
+          f'in {time.perf_counter() - started:.1f}s -> {path}')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    generate(args.scale, args.seed)
+
+
+if __name__ == '__main__':
+    main()
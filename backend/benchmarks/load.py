@@ -0,0 +1,318 @@
+"""Load generator covering every blueprint, with baseline regression checks.
+
+Runs a fixed, seeded mix of requests (auth, question list/filter/search/
+similar, recommendations and reviews, submission history/stats/record/bulk,
+leaderboard, code execution) against a synthetic dataset from
+benchmarks.datasets. It drives the app either in-process through the Flask
+test client or over HTTP against a real threaded WSGI server, then reports
+throughput and p50/p95/p99 latency per scenario as JSON.
+
+With --baseline, the run fails (exit code 1) when any scenario's p95 latency
+rises, or its throughput falls, by more than --max-regression percent.
+
+Usage (from backend/):
+    python -m benchmarks.load --scale 10k --driver test-client --output results.json
+    python -m benchmarks.load --scale 100k --driver server --concurrency 8 \\
+        --baseline benchmarks/baselines/100k-server.json --max-regression 15
+    python -m benchmarks.load --scale 10k --save-baseline benchmarks/baselines/10k-test-client.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from benchmarks.datasets import SCALES, PASSWORD, TAGS, WORDS, bench_config, generate
+
+# name -> (weight relative to --requests, request factory)
+SCENARIOS = {}
+
+
+def scenario(name, weight=1.0):
+    def register(fn):
+        SCENARIOS[name] = (weight, fn)
+        return fn
+    return register
+
+
+@scenario('auth.login', weight=0.05)
+def _login(ctx, rng):
+    return 'POST', '/api/auth/login', {'username': f'user{rng.randint(1, ctx.users)}', 'password': PASSWORD}
+
+
+@scenario('auth.register', weight=0.05)
+def _register(ctx, rng):
+    name = f'bench-{ctx.run_id}-{rng.getrandbits(48):x}'
+    return 'POST', '/api/auth/register', {'username': name, 'email': f'{name}@example.com', 'password': PASSWORD}
+
+
+@scenario('questions.page')
+def _question_page(ctx, rng):
+    return 'GET', f'/api/questions/?limit=50&after_id={rng.randint(0, ctx.questions)}', None
+
+
+@scenario('questions.page_titles')
+def _question_titles(ctx, rng):
+    return 'GET', f'/api/questions/?limit=200&fields=title,difficulty&after_id={rng.randint(0, ctx.questions)}', None
+
+
+@scenario('questions.filter')
+def _question_filter(ctx, rng):
+    tags = ','.join(rng.sample(TAGS, 2))
+    return 'GET', f"/api/questions/?tags={tags}&match={rng.choice(['all', 'any'])}&limit=50", None
+
+
+@scenario('questions.get')
+def _question_get(ctx, rng):
+    return 'GET', f'/api/questions/{rng.randint(1, ctx.questions)}', None
+
+
+@scenario('questions.search_prefix')
+def _search_prefix(ctx, rng):
+    return 'GET', f'/api/questions/search?q={rng.choice(WORDS)[:rng.randint(1, 4)]}', None
+
+
+@scenario('questions.search_text')
+def _search_text(ctx, rng):
+    return 'GET', f"/api/questions/search?mode=text&q={'+'.join(rng.sample(WORDS, 2))}", None
+
+
+@scenario('questions.similar')
+def _similar(ctx, rng):
+    return 'GET', f'/api/questions/{rng.randint(1, ctx.questions)}/similar', None
+
+
+@scenario('recommendations.content')
+def _recommend(ctx, rng):
+    return 'GET', f'/api/recommendations/?user_id={rng.randint(1, ctx.users)}', None
+
+
+@scenario('recommendations.review')
+def _review(ctx, rng):
+    return 'GET', f'/api/recommendations/review?user_id={rng.randint(1, ctx.users)}', None
+
+
+@scenario('submissions.history')
+def _history(ctx, rng):
+    return 'GET', f'/api/submissions/user/{rng.randint(1, ctx.users)}?limit=100', None
+
+
+@scenario('submissions.stats')
+def _stats(ctx, rng):
+    return 'GET', f'/api/submissions/user/{rng.randint(1, ctx.users)}/stats', None
+
+
+@scenario('submissions.record', weight=0.5)
+def _record(ctx, rng):
+    return 'POST', '/api/submissions/record', {'user_id': rng.randint(1, ctx.users),
+                                               'question_id': rng.randint(1, ctx.questions),
+                                               'status': rng.choice(['solved', 'attempted'])}
+
+
+@scenario('submissions.bulk', weight=0.05)
+def _bulk(ctx, rng):
+    return 'POST', '/api/submissions/bulk', [{'user_id': rng.randint(1, ctx.users),
+                                             'question_id': rng.randint(1, ctx.questions),
+                                             'status': rng.choice(['solved', 'attempted'])} for _ in range(100)]
+
+
+@scenario('submissions.execute', weight=0.2)
+def _execute(ctx, rng):
+    return 'POST', '/api/submissions/execute', {'code': f'print(sum(range({rng.randint(1, 10**5)})))',
+                                                'language': 'python'}
+
+
+@scenario('leaderboard.top')
+def _leaderboard(ctx, rng):
+    tag = rng.choice(('',) + TAGS)
+    return 'GET', f'/api/leaderboard/?tag={tag}&limit=20', None
+
+
+class Context:
+    def __init__(self, scale):
+        _, (self.questions, self.users) = SCALES[scale]
+        self.run_id = f'{os.getpid()}{int(time.time())}'
+
+
+class TestClientDriver:
+    """In-process: measures the app itself, without sockets or a server."""
+    name = 'test-client'
+    concurrency = 1
+
+    def __init__(self, app, concurrency=1):
+        self.client = app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ServerDriver:
+    """Over HTTP against a threaded werkzeug WSGI server on a local port."""
+    name = 'server'
+
+    def __init__(self, app, concurrency=4):
+        self.concurrency = concurrency
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, body):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.port, timeout=60)
+        try:
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    def close(self):
+        self.server.shutdown()
+
+
+DRIVERS = {'test-client': TestClientDriver, 'server': ServerDriver}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def run_scenario(driver, ctx, name, factory, count, seed, warmup):
+    rng = random.Random(f'{seed}:{name}')
+    specs = [factory(ctx, rng) for _ in range(count + warmup)]
+    for spec in specs[:warmup]:
+        driver.request(*spec)
+
+    def timed(spec):
+        started = time.perf_counter()
+        status = driver.request(*spec)
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    if driver.concurrency > 1:
+        with ThreadPoolExecutor(driver.concurrency) as executor:
+            samples = list(executor.map(timed, specs[warmup:]))
+    else:
+        samples = [timed(spec) for spec in specs[warmup:]]
+    elapsed = time.perf_counter() - started
+    latencies = sorted(ms for ms, _ in samples)
+    return {
+        'requests': count,
+        'errors': sum(1 for _, status in samples if status >= 500),
+        'rps': round(count / elapsed, 2),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+    }
+
+
+def compare(results, baseline, max_regression, noise_floor_ms):
+    """Regression messages for scenarios worse than baseline by more than max_regression percent."""
+    failures = []
+    limit = max_regression / 100
+    for name, current in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        # Sub-millisecond jitter is not a regression however large in relative terms
+        slower = current['p95_ms'] - before['p95_ms']
+        if slower > noise_floor_ms and slower > before['p95_ms'] * limit:
+            failures.append(f"{name}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if before['rps'] and current['rps'] < before['rps'] * (1 - limit) \
+                and 1000 / current['rps'] - 1000 / before['rps'] > noise_floor_ms:
+            failures.append(f"{name}: throughput {before['rps']:.1f} -> {current['rps']:.1f} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--driver', choices=DRIVERS, default='test-client')
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads (server driver only)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario of weight 1')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--scenario', action='append', help='only run these scenarios (repeatable)')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--baseline', help='compare against this results JSON')
+    parser.add_argument('--save-baseline', help='write results JSON here as the new baseline')
+    parser.add_argument('--max-regression', type=float,
+                        default=float(os.environ.get('BENCH_MAX_REGRESSION', 20)),
+                        help='allowed %% p95/throughput regression against --baseline')
+    parser.add_argument('--noise-floor-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Runs write submissions and users, so each one starts from a fresh copy of the dataset
+    source = generate(args.scale, args.seed)
+    work = source.replace('.db', f'-run{os.getpid()}.db')
+    shutil.copyfile(source, work)
+    app = create_app(bench_config(f'sqlite:///{work}', EXECUTION_CACHE_SIZE=0, CF_REFRESH_INTERVAL=0))
+    driver = DRIVERS[args.driver](app, concurrency=args.concurrency)
+    ctx = Context(args.scale)
+    results = {
+        'meta': {
+            'scale': args.scale, 'seed': args.seed, 'driver': args.driver,
+            'concurrency': driver.concurrency, 'requests': args.requests,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {}
+    }
+    try:
+        print(f'{"scenario":<26} {"reqs":>5} {"err":>4} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        for name, (weight, factory) in SCENARIOS.items():
+            if args.scenario and name not in args.scenario:
+                continue
+            count = max(int(args.requests * weight), 1)
+            stats = run_scenario(driver, ctx, name, factory, count, args.seed, min(args.warmup, count))
+            results['scenarios'][name] = stats
+            print(f"{name:<26} {stats['requests']:>5} {stats['errors']:>4} {stats['rps']:>9.1f} "
+                  f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    finally:
+        driver.close()
+        os.remove(work)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.max_regression, args.noise_floor_ms)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        if failures:
+            sys.exit(1)
+        print(f'No regressions beyond {args.max_regression:g}% against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
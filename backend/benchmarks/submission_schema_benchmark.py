@@ -0,0 +1,97 @@
+"""Throughput of submission serialization, before and after the bulk path.
+
+Serializes the same synthetic submission history with the original
+post_dump implementation (format, parse and re-format every timestamp,
+re-creating the timezone per row), with the current SubmissionSchema.dump,
+and with SubmissionSchema.dump_many in the chunks stream_json uses, then
+checks that all three produce identical output.
+
+Usage (from backend/):
+    python -m benchmarks.submission_schema_benchmark --rows 100000
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytz
+from marshmallow import Schema, fields, post_dump
+
+from app.core.pagination import STREAM_CHUNK_SIZE
+from app.features.submission.schemas import SubmissionSchema
+
+Row = namedtuple('Row', 'id user_id question_id status timestamp')
+
+
+class LegacySubmissionSchema(Schema):
+    id = fields.Int(dump_only=True)
+    user_id = fields.Int(required=True)
+    question_id = fields.Int(required=True)
+    status = fields.Str(required=True)
+    timestamp = fields.DateTime(format='iso', dump_only=True)
+
+    @post_dump
+    def convert_to_ist(self, data, **kwargs):
+        if 'timestamp' in data and data['timestamp']:
+            utc = pytz.utc
+            ist = pytz.timezone('Asia/Kolkata')
+            dt = datetime.fromisoformat(data['timestamp'])
+            if dt.tzinfo is None:
+                dt = utc.localize(dt)
+            dt_ist = dt.astimezone(ist)
+            data['timestamp'] = dt_ist.isoformat()
+        return data
+
+
+def synthetic_rows(n, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    stamps = sorted(start + timedelta(seconds=rng.randrange(2 * 365 * 86400), microseconds=rng.randrange(10**6))
+                    for _ in range(n))
+    return [Row(i + 1, 1, rng.randint(1, 500), rng.choice(('attempted', 'solved')), ts)
+            for i, ts in enumerate(stamps)]
+
+
+def chunked(dump, rows):
+    result = []
+    for start in range(0, len(rows), STREAM_CHUNK_SIZE):
+        result.extend(dump(rows[start:start + STREAM_CHUNK_SIZE]))
+    return result
+
+
+def timed(fn, rows):
+    started = time.perf_counter()
+    result = fn(rows)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--timezone', default='Asia/Kolkata',
+                        help='display timezone for the new paths (output is only compared for Asia/Kolkata)')
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    schema = SubmissionSchema(timezone=args.timezone)
+    runs = [
+        ('legacy post_dump', lambda r: LegacySubmissionSchema().dump(r, many=True)),
+        ('schema.dump', lambda r: schema.dump(r, many=True)),
+        (f'dump_many x{STREAM_CHUNK_SIZE}', lambda r: chunked(schema.dump_many, r)),
+    ]
+    print(f'{args.rows} submissions spanning two years, display timezone {args.timezone}')
+    print(f'{"path":<18} {"seconds":>8} {"rows/s":>12}')
+    outputs = []
+    for name, fn in runs:
+        output, elapsed = timed(fn, rows)
+        outputs.append(output)
+        print(f'{name:<18} {elapsed:>8.2f} {args.rows / elapsed:>12,.0f}')
+    if args.timezone == 'Asia/Kolkata':
+        assert all(output == outputs[0] for output in outputs[1:]), 'serializations differ'
+        print('outputs identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Memory and latency comparison of the title Trie implementations.
+
+Builds each structure from the same synthetic catalog (with ids, summary
+payloads and scores, as refresh_search_indexes does) and reports traced memory, build
+time and top-k / full autocomplete latency for random 1-4 character prefixes.
+
+Usage (from backend/):
+    python -m benchmarks.trie_benchmark --titles 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from app.services.dsa_service import Trie, RadixTrie
+
+WORDS = (
+    'two sum array linked list reverse merge intervals binary tree graph path '
+    'longest substring palindrome matrix spiral rotate search sorted window '
+    'maximum minimum subarray product climbing stairs coin change word ladder '
+    'course schedule island count clone lru cache design stack queue heap '
+    'kth largest element valid parentheses anagram group string decode ways '
+    'jump game unique paths edit distance trapping rain water median stream'
+).split()
+
+
+def synthetic_titles(n, seed=42):
+    rng = random.Random(seed)
+    titles = set()
+    while len(titles) < n:
+        words = rng.sample(WORDS, rng.randint(2, 5))
+        titles.add(' '.join(words).title() + f' {rng.randint(1, 999)}')
+    return sorted(titles)
+
+
+def build(cls, titles):
+    rows = [(title, i, {'id': i, 'title': title, 'difficulty': 'Easy', 'tags': ''}, i % 97)
+            for i, title in enumerate(titles)]
+    started = time.perf_counter()
+    trie = cls.build(rows)
+    elapsed = time.perf_counter() - started
+    del trie
+    # Rows are allocated before tracing starts, so only the structure is counted
+    tracemalloc.start()
+    trie = cls.build(rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return trie, size, elapsed
+
+
+def latency_us(fn, prefixes):
+    samples = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        fn(prefix)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=2_000)
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.titles)
+    rng = random.Random(7)
+    prefixes = [rng.choice(titles)[:rng.randint(1, 4)].lower() for _ in range(args.queries)]
+    full_prefixes = prefixes[:max(args.queries // 20, 1)]
+
+    print(f'{args.titles} titles, {args.queries} prefixes (1-4 chars)')
+    print(f'{"structure":<10} {"memory MB":>10} {"build s":>8} {"top10 p50/p95 us":>18} {"all p50/p95 us":>18}')
+    for cls in (Trie, RadixTrie):
+        trie, size, elapsed = build(cls, titles)
+        top = latency_us(trie.top, prefixes)
+        full = latency_us(trie.autocomplete, full_prefixes)
+        print(f'{cls.__name__:<10} {size / 2**20:>10.1f} {elapsed:>8.2f} '
+              f'{top[0]:>8.1f}/{top[1]:<9.1f} {full[0]:>8.0f}/{full[1]:<9.0f}')
+        del trie
+
+
+if __name__ == '__main__':
+    main()
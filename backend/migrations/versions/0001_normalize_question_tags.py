@@ -0,0 +1,67 @@
+"""Normalize question tags into tag and question_tag tables
+
+Revision ID: 0001_normalize_question_tags
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_normalize_question_tags'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _split(tags):
+    return list(dict.fromkeys(t.strip().lower() for t in (tags or '').split(',') if t.strip()))
+
+
+def upgrade():
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+    # The app's create_all() may already have created the (empty) tables on startup
+    if 'tag' not in existing:
+        op.create_table(
+            'tag',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=200), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+    if 'question_tag' not in existing:
+        op.create_table(
+            'question_tag',
+            sa.Column('question_id', sa.Integer(), nullable=False),
+            sa.Column('tag_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('question_id', 'tag_id')
+        )
+        op.create_index('ix_question_tag_tag_id', 'question_tag', ['tag_id'])
+
+    # Backfill from the comma-separated strings
+    question = sa.table('question', sa.column('id', sa.Integer), sa.column('tags', sa.String))
+    tag = sa.table('tag', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    question_tag = sa.table('question_tag', sa.column('question_id', sa.Integer), sa.column('tag_id', sa.Integer))
+    tagged = {row.id: _split(row.tags) for row in bind.execute(sa.select(question.c.id, question.c.tags))}
+    tag_ids = {row.name: row.id for row in bind.execute(sa.select(tag.c.id, tag.c.name))}
+    new_names = sorted({name for names in tagged.values() for name in names} - tag_ids.keys())
+    if new_names:
+        op.bulk_insert(tag, [{'name': name} for name in new_names])
+        tag_ids = {row.name: row.id for row in bind.execute(sa.select(tag.c.id, tag.c.name))}
+    linked = set(bind.execute(sa.select(question_tag.c.question_id, question_tag.c.tag_id)).tuples())
+    links = [{'question_id': question_id, 'tag_id': tag_ids[name]}
+             for question_id, names in tagged.items() for name in names
+             if (question_id, tag_ids[name]) not in linked]
+    if links:
+        op.bulk_insert(question_tag, links)
+
+
+def downgrade():
+    op.drop_index('ix_question_tag_tag_id', table_name='question_tag')
+    op.drop_table('question_tag')
+    op.drop_table('tag')
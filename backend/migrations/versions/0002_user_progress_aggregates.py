@@ -0,0 +1,66 @@
+"""Per-user progress aggregate tables
+
+Revision ID: 0002_user_progress_aggregates
+Revises: 0001_normalize_question_tags
+Create Date: 2026-10-18 11:00:00.000000
+
+Backfill with `flask submissions rebuild-stats` after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_user_progress_aggregates'
+down_revision = '0001_normalize_question_tags'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = sa.inspect(op.get_bind()).get_table_names()
+    # The app's create_all() may already have created the (empty) tables on startup
+    if 'user_stats' not in existing:
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('submissions', sa.Integer(), nullable=False),
+            sa.Column('solved_submissions', sa.Integer(), nullable=False),
+            sa.Column('attempted_questions', sa.Integer(), nullable=False),
+            sa.Column('solved_questions', sa.Integer(), nullable=False),
+            sa.Column('solved_by_difficulty', sa.JSON(), nullable=False),
+            sa.Column('solved_by_tag', sa.JSON(), nullable=False),
+            sa.Column('current_streak', sa.Integer(), nullable=False),
+            sa.Column('longest_streak', sa.Integer(), nullable=False),
+            sa.Column('last_active_date', sa.Date(), nullable=True),
+            sa.Column('last_activity', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    if 'user_question_progress' not in existing:
+        op.create_table(
+            'user_question_progress',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('question_id', sa.Integer(), nullable=False),
+            sa.Column('submissions', sa.Integer(), nullable=False),
+            sa.Column('solves', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id', 'question_id')
+        )
+    if 'user_activity_day' not in existing:
+        op.create_table(
+            'user_activity_day',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('submissions', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id', 'day')
+        )
+
+
+def downgrade():
+    op.drop_table('user_activity_day')
+    op.drop_table('user_question_progress')
+    op.drop_table('user_stats')
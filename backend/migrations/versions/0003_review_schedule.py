@@ -0,0 +1,38 @@
+"""Spaced-repetition review schedule
+
+Revision ID: 0003_review_schedule
+Revises: 0002_user_progress_aggregates
+Create Date: 2026-10-18 13:00:00.000000
+
+Backfill with `flask recommendations rebuild-reviews` after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_review_schedule'
+down_revision = '0002_user_progress_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app's create_all() may already have created the (empty) table on startup
+    if 'review_item' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'review_item',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.Column('due_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'question_id')
+    )
+
+
+def downgrade():
+    op.drop_table('review_item')
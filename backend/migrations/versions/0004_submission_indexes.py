@@ -0,0 +1,35 @@
+"""Composite indexes on submission
+
+Revision ID: 0004_submission_indexes
+Revises: 0003_review_schedule
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_submission_indexes'
+down_revision = '0003_review_schedule'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_submission_user_status': ['user_id', 'status'],
+    'ix_submission_question_status': ['question_id', 'status'],
+    'ix_submission_user_question_time': ['user_id', 'question_id', 'timestamp'],
+}
+
+
+def upgrade():
+    # A database created by the app's create_all() already has them
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('submission')}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'submission', columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='submission')
@@ -0,0 +1,32 @@
+"""Shared cache version table
+
+Revision ID: 0005_cache_version
+Revises: 0004_submission_indexes
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_cache_version'
+down_revision = '0004_submission_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app's create_all() may already have created the (empty) table on startup
+    if 'cache_version' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'cache_version',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_version')
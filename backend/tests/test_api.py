@@ -1,14 +1,32 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
 import pytest
 from app import create_app
-from app.extensions import db
-from app.models.user import User
-from app.models.question import Question
+from app.core.config import Config
+from app.core.extensions import db
+from app.features.user.models import User
+from app.features.question.models import Question, Tag, question_tags
+from app.features.submission.models import Submission
+from app.features.question import routes as question_routes
+from app.features.question.routes import refresh_search_indexes
+from app.services import execution_service
+from app.services.dedup_service import choose_bands
+from app.services.execution_service import InterpreterPool, PoolBusy
+
+class InMemoryConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    EXECUTION_POOL_SIZE = 1
+    EXECUTION_TIMEOUT = 2
+    EXECUTION_USER_MAX_JOBS = 1
+    EXECUTION_MAX_STDOUT = 64 * 1024
+    CF_REFRESH_INTERVAL = 0
 
 @pytest.fixture
 def client():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(InMemoryConfig)
     with app.app_context():
         db.create_all()
         yield app.test_client()
@@ -66,4 +84,691 @@ def test_question_crud(client):
     # Confirm deletion
     resp = client.get('/api/questions/')
     assert resp.status_code == 200
-    assert resp.get_json() == [] 
\ No newline at end of file
+    assert resp.get_json() == [] 
+def test_search_tracks_question_writes(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    resp = client.post('/api/questions/', json={
+        'title': 'Merge Intervals',
+        'description': 'Merge all overlapping intervals.',
+        'difficulty': 'Medium',
+        'tags': 'array,sorting'
+    }, headers=headers)
+    qid = resp.get_json()['id']
+    assert [q['id'] for q in client.get('/api/questions/search?q=merge').get_json()] == [qid]
+    client.put(f'/api/questions/{qid}', json={'title': 'Insert Interval'}, headers=headers)
+    assert client.get('/api/questions/search?q=merge').get_json() == []
+    assert [q['id'] for q in client.get('/api/questions/search?q=insert').get_json()] == [qid]
+    client.delete(f'/api/questions/{qid}', headers=headers)
+    assert client.get('/api/questions/search?q=insert').get_json() == []
+
+def test_search_ranks_by_solve_count(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = []
+    for title in ['Linked List Cycle', 'Linked List Reverse']:
+        resp = client.post('/api/questions/', json={
+            'title': title, 'description': 'Linked lists.', 'difficulty': 'Easy', 'tags': 'linkedlist'
+        }, headers=headers)
+        ids.append(resp.get_json()['id'])
+    client.post('/api/submissions/record', json={'user_id': 1, 'question_id': ids[1], 'status': 'solved'})
+    results = client.get('/api/questions/search?q=linked').get_json()
+    assert [q['id'] for q in results] == [ids[1], ids[0]]
+    assert results[0] == {'id': ids[1], 'title': 'Linked List Reverse', 'difficulty': 'Easy', 'tags': 'linkedlist'}
+    assert len(client.get('/api/questions/search?q=linked&limit=1').get_json()) == 1
+
+def test_full_text_search(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    for title, description, tags in [
+        ('Reverse Linked List', 'Reverse a singly linked list in place.', 'linkedlist'),
+        ('Two Sum', 'Use a hashmap to find two numbers adding up to target.', 'array,hashmap'),
+        ('Palindrome Linked List', 'Check whether a linked list reads the same both ways.', 'linkedlist'),
+    ]:
+        client.post('/api/questions/', json={
+            'title': title, 'description': description, 'difficulty': 'Easy', 'tags': tags
+        }, headers=headers)
+    results = client.get('/api/questions/search?q=linked list reverse&mode=text').get_json()
+    assert [q['title'] for q in results] == ['Reverse Linked List', 'Palindrome Linked List']
+    assert results[0]['score'] > results[1]['score']
+    qid = client.get('/api/questions/search?q=hashmap&mode=text').get_json()[0]['id']
+    client.put(f'/api/questions/{qid}', json={'description': 'Use a dictionary.', 'tags': 'array'}, headers=headers)
+    assert client.get('/api/questions/search?q=hashmap&mode=text').get_json() == []
+
+def test_execute_code_in_warm_pool(client):
+    resp = client.post('/api/submissions/execute', json={
+        'code': 'name = input()\nprint(f"hello {name}")', 'input': 'world\n'
+    })
+    assert resp.get_json() == {'stdout': 'hello world\n', 'stderr': '', 'exit_code': 0, 'truncated': False}
+    resp = client.post('/api/submissions/execute', json={'code': 'import sys\nsys.exit(3)'})
+    assert resp.get_json()['exit_code'] == 3
+    resp = client.post('/api/submissions/execute', json={'code': '1 / 0'})
+    data = resp.get_json()
+    assert data['exit_code'] == 1 and 'ZeroDivisionError' in data['stderr']
+    resp = client.post('/api/submissions/execute', json={'code': 'while True: pass'})
+    assert resp.status_code == 400
+    stats = client.get('/api/submissions/execute/stats').get_json()
+    assert stats['jobs'] >= 4 and stats['size'] == 1
+
+def test_pool_caps_concurrent_jobs_and_startup_time(monkeypatch):
+    pool = InterpreterPool(size=1, queue_timeout=0.2, start_timeout=0.5).start()
+    try:
+        busy = threading.Thread(target=pool.run, args=('import time\ntime.sleep(1)',))
+        busy.start()
+        time.sleep(0.2)
+        with pytest.raises(PoolBusy):
+            pool.run('print(1)')
+        busy.join()
+        assert pool.run('print(1)')['stdout'] == '1\n'
+        stats = pool.stats()
+        assert stats['rejected'] == 1 and stats['cold_starts'] == 0
+    finally:
+        pool.shutdown()
+    monkeypatch.setattr(execution_service, 'BOOTSTRAP', 'import time; time.sleep(30)')
+    hung = pool._spawn()
+    started = time.monotonic()
+    assert pool._await_ready(hung, 0.2) is False
+    assert time.monotonic() - started < 5 and hung.returncode is not None
+
+def test_pool_refills_after_a_failed_start():
+    pool = InterpreterPool(size=1, start_timeout=5).start()
+    failures = []
+    def flaky(proc, timeout):
+        if not failures:
+            failures.append(proc)
+            execution_service._discard(proc)
+            return False
+        return InterpreterPool._await_ready(proc, timeout)
+    pool._await_ready = flaky
+    try:
+        assert pool.run('print(1)')['stdout'] == '1\n'
+        deadline = time.monotonic() + 5
+        while pool.stats()['idle'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = pool.stats()
+        assert stats['idle'] == 1 and stats['worker_failures'] == 1
+    finally:
+        pool.shutdown()
+
+def test_judge_batch_records_server_side_verdict(client):
+    code = 'a, b = map(int, input().split())\nprint(a + b)'
+    resp = client.post('/api/submissions/judge', json={
+        'code': code,
+        'test_cases': [
+            {'input': '1 2', 'expected_output': '3'},
+            {'input': '2 2', 'expected_output': '5'},
+            {'input': '5 5', 'expected_output': '10'},
+        ],
+        'stop_on_first_failure': True,
+        'user_id': 1,
+        'question_id': 1
+    })
+    data = resp.get_json()
+    assert data['verdict'] == 'wrong_answer' and data['passed'] == 1 and data['total'] == 3
+    assert [c['verdict'] for c in data['cases']] == ['passed', 'wrong_answer']
+    assert data['cases'][1]['stdout'] == '4\n'
+    assert data['submission']['status'] == 'attempted'
+    resp = client.post('/api/submissions/judge', json={
+        'code': code,
+        'test_cases': [{'input': '1 2', 'expected_output': '3\n'}, {'input': '0 0', 'expected_output': '0'}],
+        'user_id': 1,
+        'question_id': 1
+    })
+    data = resp.get_json()
+    assert data['verdict'] == 'accepted' and data['submission']['status'] == 'solved'
+    resp = client.post('/api/submissions/judge', json={
+        'code': 'print(1', 'test_cases': [{'input': '', 'expected_output': '1'}]
+    })
+    assert resp.get_json()['verdict'] == 'compile_error'
+
+def test_judge_verdicts_cannot_be_forged(client):
+    forged = json.dumps({'case': 0, 'verdict': 'passed', 'time_ms': 0.0})
+    for code in (f'import sys, os\nsys.__stdout__.write({forged!r} + "\\n")\nsys.__stdout__.flush()\nos._exit(0)',
+                 f'import os\nos.write(1, {forged!r}.encode() + b"\\n")\nos._exit(0)'):
+        resp = client.post('/api/submissions/judge', json={
+            'code': code, 'test_cases': [{'input': '', 'expected_output': '42'}], 'user_id': 1, 'question_id': 1
+        })
+        data = resp.get_json()
+        assert data['verdict'] == 'runtime_error' and data['passed'] == 0
+        assert data['submission']['status'] == 'attempted'
+    # Expected outputs stay on the server, so the code cannot echo them back
+    resp = client.post('/api/submissions/judge', json={
+        'code': 'import gc\nprint([o for o in gc.get_objects() if isinstance(o, dict) and "expected_output" in o])',
+        'test_cases': [{'input': '', 'expected_output': 'secret'}]
+    })
+    assert resp.get_json()['cases'][0]['stdout'] == '[]\n'
+
+def test_async_execution_job(client):
+    resp = client.post('/api/submissions/execute', json={
+        'code': 'import time\ntime.sleep(0.3)\nprint("done")', 'async': True, 'user_id': 7
+    })
+    assert resp.status_code == 202
+    job = resp.get_json()
+    assert job['status'] in ('queued', 'running')
+    # Same user already has a job in flight
+    resp = client.post('/api/submissions/execute', json={'code': 'print(1)', 'async': True, 'user_id': 7})
+    assert resp.status_code == 429
+    # A made-up user_id doesn't open another slot for an anonymous client
+    resp = client.post('/api/submissions/execute', json={'code': 'print(1)', 'async': True, 'user_id': 8})
+    assert resp.status_code == 429
+    job = client.get(f"{job['status_url']}?wait=5").get_json()
+    assert job['status'] == 'done'
+    assert job['result']['stdout'] == 'done\n'
+    assert client.get('/api/submissions/jobs/unknown').status_code == 404
+
+def test_execution_cache_hit(client):
+    request = {'code': 'print(input()[::-1])', 'input': 'abc', 'cache': True}
+    first = client.post('/api/submissions/execute', json=request).get_json()
+    second = client.post('/api/submissions/execute', json=request).get_json()
+    assert first['cached'] is False and second['cached'] is True
+    assert second['stdout'] == first['stdout'] == 'cba\n'
+    other = client.post('/api/submissions/execute', json=dict(request, input='xyz')).get_json()
+    assert other['cached'] is False
+    assert client.get('/api/submissions/execute/stats').get_json()['cache']['hits'] >= 1
+
+def test_execute_output_is_capped_and_streamable(client):
+    resp = client.post('/api/submissions/execute', json={'code': 'while True: print("x" * 1000)'})
+    data = resp.get_json()
+    assert data['truncated'] is True
+    assert len(data['stdout']) == InMemoryConfig.EXECUTION_MAX_STDOUT
+    resp = client.post('/api/submissions/execute', json={'code': 'print("a")\nprint("b")', 'stream': True})
+    assert resp.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert ''.join(l['data'] for l in lines if l['stream'] == 'stdout') == 'a\nb\n'
+    assert lines[-1] == {'stream': 'exit', 'exit_code': 0, 'timed_out': False, 'truncated': False}
+
+def test_recommendations_prefer_unpracticed_tags(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = {}
+    for title, tags in [('Graph Basics', 'graph'), ('Graph Paths', 'graph,bfs'), ('Array Basics', 'array'),
+                        ('Array Pairs', 'array,hashmap'), ('Tree Depth', 'tree')]:
+        resp = client.post('/api/questions/', json={
+            'title': title, 'description': 'Practice.', 'difficulty': 'Easy', 'tags': tags
+        }, headers=headers)
+        ids[title] = resp.get_json()['id']
+    for title in ['Graph Basics', 'Array Basics', 'Array Pairs']:
+        client.post('/api/submissions/record', json={'user_id': 1, 'question_id': ids[title], 'status': 'solved'})
+    recommended = client.get('/api/recommendations/?user_id=1').get_json()
+    assert [q['title'] for q in recommended] == ['Tree Depth', 'Graph Paths']
+    assert len(client.get('/api/recommendations/').get_json()) == 5
+
+def test_collaborative_filtering_strategy(client, tmp_path):
+    app = client.application
+    app.config['CF_INDEX_PATH'] = str(tmp_path / 'cf_index')
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = [client.post('/api/questions/', json={
+        'title': f'Question {name}', 'description': 'Practice.', 'difficulty': 'Easy', 'tags': 'misc'
+    }, headers=headers).get_json()['id'] for name in 'ABCD']
+    a, b, c, d = ids
+    def solve(user_id, question_id):
+        client.post('/api/submissions/record', json={'user_id': user_id, 'question_id': question_id, 'status': 'solved'})
+    for user_id in (1, 2):
+        solve(user_id, a)
+        solve(user_id, b)
+    solve(3, a)
+    result = app.test_cli_runner().invoke(args=['recommendations', 'build-cf'])
+    assert 'Indexed 2 questions' in result.output
+    picks = client.get('/api/recommendations/?user_id=3&strategy=cf').get_json()
+    assert picks[0]['id'] == b and a not in [q['id'] for q in picks]
+    # Solves after the build are folded in without rebuilding
+    for user_id in (4, 5, 6):
+        solve(user_id, a)
+        solve(user_id, c)
+    picks = client.get('/api/recommendations/?user_id=3&strategy=cf').get_json()
+    assert [q['id'] for q in picks[:2]] == [c, b]
+    assert len(picks) == 3  # Padded with content-based picks (only D is left)
+
+def test_similar_questions(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = {}
+    for title, description, tags in [
+        ('Reverse Linked List', 'Reverse a singly linked list iteratively.', 'linkedlist'),
+        ('Reverse Linked List II', 'Reverse a linked list between two positions.', 'linkedlist'),
+        ('Two Sum', 'Find two numbers adding up to a target using a hashmap.', 'array,hashmap'),
+    ]:
+        ids[title] = client.post('/api/questions/', json={
+            'title': title, 'description': description, 'difficulty': 'Easy', 'tags': tags
+        }, headers=headers).get_json()['id']
+    similar = client.get(f"/api/questions/{ids['Reverse Linked List']}/similar").get_json()
+    assert similar[0]['id'] == ids['Reverse Linked List II'] and similar[0]['score'] > 0
+    assert ids['Two Sum'] not in [q['id'] for q in similar]
+    client.delete(f"/api/questions/{ids['Reverse Linked List II']}", headers=headers)
+    assert client.get(f"/api/questions/{ids['Reverse Linked List']}/similar").get_json() == []
+    assert client.get('/api/questions/999/similar').status_code == 404
+
+def test_similarity_refit_runs_in_background(client, monkeypatch):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    def add(title, description):
+        return client.post('/api/questions/', json={
+            'title': title, 'description': description, 'difficulty': 'Easy', 'tags': 'graph'
+        }, headers=headers).get_json()['id']
+    first = add('Course Schedule', 'Detect a cycle in a directed graph of courses.')
+    built, release = threading.Event(), threading.Event()
+    build = question_routes._build_similar_index
+    def slow_build():
+        index = build()
+        built.set()
+        release.wait(5)
+        return index
+    monkeypatch.setattr(question_routes, '_build_similar_index', slow_build)
+    old_index = question_routes.similar_index
+    question_routes._start_similar_refit()
+    assert built.wait(5)
+    # Written after the refit's snapshot: replayed onto the new index before the swap
+    second = add('Course Schedule II', 'Order courses in a directed graph without a cycle.')
+    release.set()
+    question_routes._similar_refit.join(5)
+    assert question_routes.similar_index is not old_index and second in question_routes.similar_index
+    assert client.get(f'/api/questions/{first}/similar').get_json()[0]['id'] == second
+
+def test_near_duplicate_questions_rejected(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    original = {
+        'title': 'Two Sum',
+        'description': 'Given an array of integers nums and an integer target, return indices of the '
+                       'two numbers such that they add up to target.',
+        'difficulty': 'Easy', 'tags': 'array,hashmap'
+    }
+    qid = client.post('/api/questions/', json=original, headers=headers).get_json()['id']
+    copy = dict(original, title='Pair Sum', description='Given an array of integers nums and an integer '
+                'target, return the indices of the two numbers such that they add up to the target.')
+    resp = client.post('/api/questions/', json=copy, headers=headers)
+    assert resp.status_code == 409
+    assert resp.get_json()['candidates'][0]['id'] == qid
+    assert client.post('/api/questions/?force=true', json=copy, headers=headers).status_code == 201
+    result = client.application.test_cli_runner().invoke(args=['questions', 'find-duplicates'])
+    assert '1 duplicate cluster(s) among 2 questions' in result.output
+
+def test_duplicate_index_configuration():
+    app = create_app(type('ColdConfig', (InMemoryConfig,), {'WARM_INDEXES': False, 'DUPLICATE_THRESHOLD': 0.5}))
+    assert question_routes.duplicate_index.threshold == 0.5
+    assert choose_bands(128, 0.001) == (128, 1)
+    with pytest.raises(ValueError):
+        choose_bands(128, 0)
+    result = app.test_cli_runner().invoke(args=['questions', 'find-duplicates', '--threshold', '1.5'])
+    assert result.exit_code == 2
+
+def test_filter_questions_by_tags_and_difficulty(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = {}
+    for title, difficulty, tags in [('Word Ladder', 'Hard', 'graph, BFS'), ('Course Schedule', 'Medium', 'graph'),
+                                    ('Rotting Oranges', 'Medium', 'bfs,matrix'), ('Valid Anagram', 'Easy', None)]:
+        payload = {'title': title, 'description': f'{title}.', 'difficulty': difficulty}
+        if tags:
+            payload['tags'] = tags
+        ids[title] = client.post('/api/questions/', json=payload, headers=headers).get_json()['id']
+    titles = lambda query: [q['title'] for q in client.get(f'/api/questions/?{query}').get_json()]
+    assert titles('tags=graph,bfs') == ['Word Ladder']
+    assert titles('tags=graph,bfs&match=any') == ['Word Ladder', 'Course Schedule', 'Rotting Oranges']
+    assert titles('tags=bfs&difficulty=medium') == ['Rotting Oranges']
+    assert titles('difficulty=Easy') == ['Valid Anagram']
+    assert client.get('/api/questions/?tags=graph&match=some').status_code == 400
+    client.put(f"/api/questions/{ids['Course Schedule']}", json={'tags': 'graph,bfs'}, headers=headers)
+    assert titles('tags=graph,bfs') == ['Word Ladder', 'Course Schedule']
+    client.delete(f"/api/questions/{ids['Word Ladder']}", headers=headers)
+    assert titles('tags=graph') == ['Course Schedule']
+    # The bitmaps rebuilt from the normalized tag table agree with the incremental updates
+    with client.application.app_context():
+        refresh_search_indexes()
+    assert titles('tags=graph,bfs&match=any') == ['Course Schedule', 'Rotting Oranges']
+
+def test_keyset_pagination_and_projection(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = [client.post('/api/questions/', json={
+        'title': f'Paged Question {i}', 'description': 'Paging.', 'difficulty': 'Easy', 'tags': 'paging'
+    }, headers=headers).get_json()['id'] for i in range(5)]
+    resp = client.get('/api/questions/?limit=2&fields=title')
+    assert resp.get_json() == [{'id': ids[0], 'title': 'Paged Question 0'}, {'id': ids[1], 'title': 'Paged Question 1'}]
+    assert resp.headers['X-Next-After-Id'] == str(ids[1])
+    seen = []
+    url = '/api/questions/?limit=2'
+    while url:
+        resp = client.get(url)
+        seen.extend(q['id'] for q in resp.get_json())
+        url = resp.headers.get('Link', '').partition('<')[2].partition('>')[0].replace('http://localhost', '')
+    assert seen == ids
+    assert client.get(f'/api/questions/?tags=paging&after_id={ids[3]}').get_json()[0]['id'] == ids[4]
+    assert client.get('/api/questions/?fields=secret').status_code == 400
+    for qid in ids:
+        client.post('/api/submissions/record', json={'user_id': 1, 'question_id': qid, 'status': 'solved'})
+    resp = client.get('/api/submissions/user/1?limit=3&fields=question_id,status')
+    assert [s['question_id'] for s in resp.get_json()] == ids[:3]
+    assert set(resp.get_json()[0]) == {'id', 'question_id', 'status'}
+    rest = client.get(f"/api/submissions/user/1?after_id={resp.headers['X-Next-After-Id']}").get_json()
+    assert [s['question_id'] for s in rest] == ids[3:]
+    assert client.get('/api/submissions/user/2').get_json() == []
+
+def test_submission_timestamps_in_requested_timezone(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    client.post('/api/submissions/record', json={'user_id': 1, 'question_id': 1, 'status': 'attempted'})
+    recorded = client.get('/api/submissions/user/1').get_json()[0]['timestamp']
+    assert recorded.endswith('+05:30')
+    utc = client.get('/api/submissions/user/1?tz=UTC').get_json()[0]['timestamp']
+    assert utc.endswith('+00:00')
+    assert datetime.fromisoformat(utc) == datetime.fromisoformat(recorded)
+    assert client.get('/api/submissions/user/1?tz=Mars/Olympus').status_code == 400
+
+def test_user_progress_stats(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    graph = client.post('/api/questions/', json={
+        'title': 'Number of Islands', 'description': 'Islands.', 'difficulty': 'Medium', 'tags': 'graph,bfs'
+    }, headers=headers).get_json()['id']
+    array = client.post('/api/questions/', json={
+        'title': 'Maximum Subarray', 'description': 'Subarrays.', 'difficulty': 'Easy', 'tags': 'array'
+    }, headers=headers).get_json()['id']
+    record = lambda qid, status: client.post('/api/submissions/record', json={
+        'user_id': 1, 'question_id': qid, 'status': status}).get_json()['id']
+    record(graph, 'attempted')
+    first_solve = record(graph, 'solved')
+    record(graph, 'solved')
+    record(array, 'attempted')
+    stats = client.get('/api/submissions/user/1/stats').get_json()
+    assert (stats['submissions'], stats['solved_questions'], stats['attempted_questions']) == (4, 1, 2)
+    assert stats['solved_by_difficulty'] == {'Medium': 1}
+    assert stats['solved_by_tag'] == {'graph': 1, 'bfs': 1}
+    assert (stats['current_streak'], stats['longest_streak']) == (1, 1)
+    # Deleting one of two solves keeps the question solved
+    client.delete(f'/api/submissions/{first_solve}')
+    stats = client.get('/api/submissions/user/1/stats').get_json()
+    assert (stats['submissions'], stats['solved_questions']) == (3, 1)
+    result = client.application.test_cli_runner().invoke(args=['submissions', 'rebuild-stats'])
+    assert 'Rebuilt stats for 1 user(s)' in result.output
+    assert client.get('/api/submissions/user/1/stats').get_json() == stats
+    client.delete('/api/submissions/user/1')
+    assert client.get('/api/submissions/user/1/stats').get_json()['submissions'] == 0
+
+@pytest.mark.parametrize('upsert', [True, False], ids=['on-conflict', 'savepoint'])
+def test_concurrent_first_submissions_share_the_stats_row(tmp_path, monkeypatch, upsert):
+    from app.services import stats_service
+    from app.services.stats_service import record_submission_stats, user_stats, _locked_stats
+    if not upsert:
+        # The generic path used for databases without ON CONFLICT support
+        monkeypatch.setattr(stats_service, 'UPSERT_INSERTS', {})
+    app = create_app(type('FileConfig', (InMemoryConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/iipp.db'}))
+    with app.app_context():
+        db.session.add(User(username='racer', email='racer@example.com', password_hash='x'))
+        db.session.add(Question(title='Race', description='Race.', difficulty='Easy', tags=''))
+        db.session.commit()
+    created = threading.Event()
+    def first_submission():
+        with app.app_context():
+            submission = Submission(user_id=1, question_id=1, status='attempted')
+            db.session.add(submission)
+            db.session.flush()
+            record_submission_stats(submission)
+            created.set()
+            time.sleep(0.3)  # Commit only after the other transaction went looking for the row
+            db.session.commit()
+    first = threading.Thread(target=first_submission)
+    first.start()
+    created.wait(5)
+    with app.app_context():
+        # Doesn't see the uncommitted row yet; must not insert a second one
+        _locked_stats(1)
+        db.session.commit()
+        first.join()
+        assert user_stats(1)['submissions'] == 1
+        db.session.remove()
+        db.engine.dispose()
+
+def test_leaderboard_ranks_by_distinct_solves(client):
+    headers = {}
+    for name in ['alice', 'bob', 'carol']:
+        register(client, name, f'{name}@example.com', 'password123')
+        headers = {'Authorization': f"Bearer {login(client, name, 'password123').get_json()['access_token']}"}
+    ids = [client.post('/api/questions/', json={
+        'title': f'Ranked Question {i}', 'description': 'Ranking.', 'difficulty': 'Easy',
+        'tags': 'graph' if i < 2 else 'array'
+    }, headers=headers).get_json()['id'] for i in range(3)]
+    solve = lambda user_id, qid: client.post('/api/submissions/record', json={
+        'user_id': user_id, 'question_id': qid, 'status': 'solved'}).get_json()['id']
+    for qid in ids:
+        solve(1, qid)
+    solve(2, ids[0])
+    repeat = solve(2, ids[0])
+    solve(3, ids[2])
+    board = client.get('/api/leaderboard/').get_json()
+    assert board['total'] == 3
+    assert [(e['rank'], e['username'], e['solved']) for e in board['entries']] == \
+        [(1, 'alice', 3), (2, 'bob', 1), (2, 'carol', 1)]
+    assert client.get('/api/leaderboard/rank/3').get_json()['rank'] == 2
+    graph = client.get('/api/leaderboard/?tag=graph').get_json()
+    assert [(e['user_id'], e['solved']) for e in graph['entries']] == [(1, 2), (2, 1)]
+    assert client.get('/api/leaderboard/rank/3?tag=graph').get_json()['rank'] is None
+    # A repeated solve does not count twice, and removing it keeps the question solved
+    client.delete(f'/api/submissions/{repeat}')
+    assert client.get('/api/leaderboard/rank/2').get_json() == \
+        {'tag': None, 'user_id': 2, 'rank': 2, 'solved': 1, 'total': 3}
+    client.delete('/api/submissions/user/1')
+    assert [e['user_id'] for e in client.get('/api/leaderboard/').get_json()['entries']] == [2, 3]
+
+def test_bulk_submission_import(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    graph = client.post('/api/questions/', json={
+        'title': 'Number of Islands', 'description': 'Islands.', 'difficulty': 'Medium', 'tags': 'graph,bfs'
+    }, headers=headers).get_json()['id']
+    array = client.post('/api/questions/', json={
+        'title': 'Maximum Subarray', 'description': 'Subarrays.', 'difficulty': 'Easy', 'tags': 'array'
+    }, headers=headers).get_json()['id']
+    client.application.config['BULK_CHUNK_SIZE'] = 2
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': 1, 'question_id': graph, 'status': 'solved', 'timestamp': (now - timedelta(days=3)).isoformat()},
+        {'user_id': 1, 'question_id': array, 'status': 'passed'},
+        {'user_id': 1, 'question_id': 999, 'status': 'solved'},
+        {'user_id': 1, 'question_id': array, 'status': 'attempted',
+         'timestamp': (now - timedelta(days=2)).isoformat() + '+00:00'},
+        {'user_id': 1, 'question_id': array, 'status': 'solved', 'timestamp': (now - timedelta(days=5)).isoformat()},
+    ]
+    result = client.post('/api/submissions/bulk', json=rows).get_json()
+    assert (result['received'], result['inserted'], result['failed']) == (5, 3, 2)
+    assert [e['index'] for e in result['errors']] == [1, 2]
+    assert 'status' in result['errors'][0]['messages']
+    assert result['errors'][1]['messages'] == {'question_id': ['Unknown question.']}
+    ndjson = '\n'.join([json.dumps({'user_id': 1, 'question_id': graph, 'status': 'attempted'}), '{oops', ''])
+    result = client.post('/api/submissions/bulk', data=ndjson, content_type='application/x-ndjson').get_json()
+    assert (result['inserted'], [e['index'] for e in result['errors']]) == (1, [1])
+    assert client.post('/api/submissions/bulk', json={'user_id': 1}).status_code == 400
+    # The per-batch aggregates agree with a rebuild from history
+    stats = client.get('/api/submissions/user/1/stats').get_json()
+    assert (stats['submissions'], stats['solved_questions'], stats['solved_by_tag']) == \
+        (4, 2, {'graph': 1, 'bfs': 1, 'array': 1})
+    client.application.test_cli_runner().invoke(args=['submissions', 'rebuild-stats'])
+    assert client.get('/api/submissions/user/1/stats').get_json() == stats
+    assert client.get('/api/leaderboard/rank/1').get_json()['solved'] == 2
+    # The fresh attempt on graph pushed its review back to tomorrow
+    due = client.get('/api/recommendations/review?user_id=1').get_json()['due']
+    assert [q['id'] for q in due] == [array]
+
+def test_bulk_import_offsets_next_to_invalid_rows(client):
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    qid = client.post('/api/questions/', json={
+        'title': 'Two Sum', 'description': 'Pairs.', 'difficulty': 'Easy', 'tags': 'array'
+    }, headers={'Authorization': f'Bearer {token}'}).get_json()['id']
+    rows = [
+        {'user_id': 1, 'question_id': qid, 'status': 'solved', 'timestamp': '2026-10-10T10:00:00+05:30'},
+        {'user_id': 1, 'question_id': qid, 'status': 'bogus'},
+        {'user_id': 1, 'question_id': qid, 'status': 'attempted', 'timestamp': '2026-10-09T10:00:00'},
+    ]
+    result = client.post('/api/submissions/bulk', json=rows).get_json()
+    assert (result['inserted'], result['failed']) == (2, 1)
+    stored = client.get('/api/submissions/user/1?tz=UTC').get_json()
+    assert sorted(s['timestamp'] for s in stored) == ['2026-10-09T10:00:00+00:00', '2026-10-10T04:30:00+00:00']
+    client.application.config['BULK_MAX_ERRORS'] = 2
+    result = client.post('/api/submissions/bulk', json=[{'user_id': 1}] * 5).get_json()
+    assert result['failed'] == 5 and [e['index'] for e in result['errors']] == [0, 1]
+
+def test_question_ndjson_import_export(client, tmp_path):
+    runner = client.application.test_cli_runner()
+    rows = [
+        {'title': 'Two Sum', 'description': 'Find two numbers.', 'difficulty': 'Easy', 'tags': 'array,hashmap'},
+        {'title': 'Word Ladder', 'description': 'Shortest transformation.', 'difficulty': 'Hard', 'tags': 'bfs'},
+        {'title': 'Bad', 'description': 'Title too short.', 'difficulty': 'Easy'},
+        {'title': 'Two Sum', 'description': 'Find two indices.', 'difficulty': 'Easy', 'tags': 'array'},
+    ]
+    source = tmp_path / 'questions.ndjson'
+    source.write_text('\n'.join(json.dumps(row) for row in rows) + '\n{oops\n')
+    result = runner.invoke(args=['questions', 'import', str(source), '--chunk-size', '2'])
+    assert '2 inserted, 1 updated, 0 skipped, 2 failed' in result.output
+    assert 'line 3:' in result.output and 'line 5: invalid JSON' in result.output
+    # Imported questions are searchable, filterable and tagged from the last row for each title
+    assert client.get('/api/questions/search?q=word').get_json()[0]['title'] == 'Word Ladder'
+    assert [q['title'] for q in client.get('/api/questions/?tags=hashmap').get_json()] == []
+    assert [q['title'] for q in client.get('/api/questions/?tags=array').get_json()] == ['Two Sum']
+    output = tmp_path / 'export.ndjson'
+    result = runner.invoke(args=['questions', 'export', str(output)])
+    exported = [json.loads(line) for line in output.read_text().splitlines()]
+    assert exported == [rows[3], rows[1]]
+    result = runner.invoke(args=['questions', 'import', str(output), '--skip-existing'])
+    assert '0 inserted, 0 updated, 2 skipped, 0 failed' in result.output
+
+def test_question_upsert_bounds_in_lists(client, monkeypatch):
+    monkeypatch.setattr(question_routes, 'FILTER_FETCH_CHUNK', 2)
+    rows = [{'title': f'Question {i}', 'description': 'Practice.', 'difficulty': 'Easy',
+             'tags': f'tag{i},tag{i + 1},shared'} for i in range(5)]
+    assert question_routes.upsert_questions(rows) == {'inserted': 5, 'updated': 0, 'skipped': 0}
+    assert question_routes.upsert_questions([dict(row, tags='shared') for row in rows]) == \
+        {'inserted': 0, 'updated': 5, 'skipped': 0}
+    links = db.session.query(question_tags.c.question_id).join(Tag).filter(Tag.name == 'shared').count()
+    assert links == 5 and db.session.query(question_tags).count() == 5
+
+def test_question_etags_and_response_cache(client):
+    from sqlalchemy import event
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    qid = client.post('/api/questions/', json={
+        'title': 'Cached Question', 'description': 'Caching.', 'difficulty': 'Easy', 'tags': 'array'
+    }, headers=headers).get_json()['id']
+    first = client.get('/api/questions/?limit=10')
+    body, etag = first.get_data(), first.headers['ETag']
+    assert 'must-revalidate' in first.headers['Cache-Control']
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        # A matching If-None-Match or a repeat only reads the shared version
+        assert client.get('/api/questions/?limit=10', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get(f'/api/questions/{qid}', headers={'If-None-Match': etag}).status_code == 304
+        second = client.get('/api/questions/?limit=10')
+        assert second.get_data() == body and second.headers['ETag'] == etag
+        assert len(statements) == 3 and all('cache_version' in statement for statement in statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    # A write changes the ETag and the cached body
+    client.put(f'/api/questions/{qid}', json={'difficulty': 'Hard'}, headers=headers)
+    stale = client.get(f'/api/questions/{qid}', headers={'If-None-Match': etag})
+    assert stale.status_code == 200 and stale.get_json()['difficulty'] == 'Hard'
+    assert stale.headers['ETag'] != etag
+    assert client.get('/api/questions/?limit=10').get_json()[0]['difficulty'] == 'Hard'
+    metrics = client.get('/api/metrics').get_data(as_text=True)
+    assert 'iipp_response_cache_requests_total{cache="questions",result="not_modified"} 2' in metrics
+
+def test_question_writes_invalidate_every_workers_cache(tmp_path):
+    # Two app instances on one database stand in for two gunicorn workers
+    config = type('FileConfig', (InMemoryConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/iipp.db'})
+    reader, writer = create_app(config), create_app(config)
+    with writer.app_context():
+        db.session.add(Question(title='Shared Question', description='Shared.', difficulty='Easy', tags='array'))
+        db.session.commit()
+        qid = Question.query.one().id
+    reader_client = reader.test_client()
+    first = reader_client.get(f'/api/questions/{qid}')
+    assert reader_client.get(f'/api/questions/{qid}').headers['ETag'] == first.headers['ETag']
+    writer_client = writer.test_client()
+    register(writer_client, 'testuser', 'test@example.com', 'password123')
+    token = login(writer_client, 'testuser', 'password123').get_json()['access_token']
+    writer_client.put(f'/api/questions/{qid}', json={'difficulty': 'Hard'}, headers={'Authorization': f'Bearer {token}'})
+    stale = reader_client.get(f'/api/questions/{qid}', headers={'If-None-Match': first.headers['ETag']})
+    assert stale.status_code == 200 and stale.get_json()['difficulty'] == 'Hard'
+    # The CLI import bumps the same version
+    source = tmp_path / 'questions.ndjson'
+    source.write_text(json.dumps({'title': 'Shared Question', 'description': 'Shared.', 'difficulty': 'Medium',
+                                  'tags': 'array'}) + '\n')
+    writer.test_cli_runner().invoke(args=['questions', 'import', str(source)])
+    assert reader_client.get(f'/api/questions/{qid}').get_json()['difficulty'] == 'Medium'
+    for app in (reader, writer):
+        with app.app_context():
+            db.engine.dispose()
+
+def test_review_schedule(client):
+    app = client.application
+    register(client, 'testuser', 'test@example.com', 'password123')
+    token = login(client, 'testuser', 'password123').get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = [client.post('/api/questions/', json={
+        'title': f'Review Question {i}', 'description': 'Review.', 'difficulty': 'Easy', 'tags': 'review'
+    }, headers=headers).get_json()['id'] for i in range(3)]
+    now = datetime.utcnow()
+    with app.app_context():
+        for days_ago, qid, status in [(10, ids[0], 'solved'), (5, ids[1], 'solved'), (4, ids[1], 'attempted'),
+                                      (0, ids[2], 'solved')]:
+            db.session.add(Submission(user_id=1, question_id=qid, status=status,
+                                      timestamp=now - timedelta(days=days_ago)))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['recommendations', 'rebuild-reviews'])
+    assert 'Scheduled 3 review(s)' in result.output
+    assert client.get('/api/recommendations/review').status_code == 400
+    review = client.get('/api/recommendations/review?user_id=1').get_json()
+    # Most overdue first; the fresh solve is not due until tomorrow
+    assert [q['id'] for q in review['due']] == [ids[0], ids[1]]
+    # Reviewing on time pushes the question back by the next interval
+    client.post('/api/submissions/record', json={'user_id': 1, 'question_id': ids[0], 'status': 'solved'})
+    review = client.get('/api/recommendations/review?user_id=1').get_json()
+    assert [q['id'] for q in review['due']] == [ids[1]]
+    assert review['next_due_at'] < (now + timedelta(days=2)).isoformat()
+
+def test_metrics_endpoint(client, tmp_path):
+    app = client.application
+    app.instance_path = str(tmp_path)
+    app.config.update(PROFILE_SAMPLE_RATE=1.0, PROFILE_SLOW_MS=0)
+    client.get('/api/questions/1')
+    client.get('/api/questions/search?q=two')
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert '# TYPE iipp_http_request_duration_seconds histogram' in text
+    assert 'iipp_http_requests_total{blueprint="questions",method="GET",route="/api/questions/<int:question_id>",' \
+           'status="404"} 1' in text
+    assert 'iipp_http_request_sql_statements_count{blueprint="questions",method="GET",' \
+           'route="/api/questions/<int:question_id>"} 1' in text
+    assert 'iipp_http_request_duration_seconds_quantile{' in text and 'quantile="0.99"' in text
+    assert 'iipp_trie_lookups_total{result="empty"} 1' in text
+    assert list((tmp_path / 'profiles').glob('*.prof'))
+
+def test_database_tuning(tmp_path):
+    from sqlalchemy import text
+    from app.core.database import engine_options
+    app = create_app(type('FileConfig', (InMemoryConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/iipp.db'}))
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('submission')}
+        assert {'ix_submission_user_status', 'ix_submission_question_status'} <= indexes
+        db.session.remove()
+        db.engine.dispose()
+    config = dict(app.config, SQLALCHEMY_DATABASE_URI='postgresql://iipp@localhost/iipp',
+                  SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 3})
+    options = engine_options(config)
+    assert options['pool_size'] == 3 and options['max_overflow'] == Config.DB_MAX_OVERFLOW
+    assert options['pool_pre_ping']
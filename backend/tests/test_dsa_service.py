@@ -0,0 +1,73 @@
+import pytest
+from app.services.dsa_service import Trie, RadixTrie, SkipList, IndexedPriorityQueue
+
+implementations = pytest.mark.parametrize('trie_class', [Trie, RadixTrie])
+
+def test_trie_delete_prunes_only_removed_title():
+    trie = Trie()
+    trie.insert('Two Sum')
+    trie.insert('Two Sum II')
+    assert sorted(trie.autocomplete('two')) == ['two sum', 'two sum ii']
+    assert trie.delete('Two Sum II')
+    assert trie.autocomplete('two') == ['two sum']
+    node = trie.root
+    for char in 'two sum':
+        node = node.children[char]
+    assert node.children == {}  # ' ii' branch was pruned
+    assert not trie.delete('Missing Title')
+
+@implementations
+def test_trie_rename(trie_class):
+    trie = trie_class.build(['Merge Intervals', 'Word Ladder'])
+    trie.rename('Merge Intervals', 'Insert Interval')
+    assert trie.autocomplete('merge') == []
+    assert trie.autocomplete('insert') == ['insert interval']
+    assert trie.autocomplete('word') == ['word ladder']
+
+@implementations
+def test_trie_top_k_ranks_by_score(trie_class):
+    trie = trie_class(top_k=2)
+    for item_id, title, score in [(1, 'Two Sum', 5), (2, 'Two Sum II', 9), (3, 'Trapping Rain Water', 1)]:
+        trie.insert(title, item_id=item_id, data={'id': item_id}, score=score)
+    assert [d['id'] for d in trie.top('t')] == [2, 1]
+    assert [d['id'] for d in trie.top('t', 3)] == [2, 1, 3]
+    trie.add_score(3, 10)
+    assert [d['id'] for d in trie.top('t')] == [3, 2]
+    trie.delete('Trapping Rain Water', item_id=3)
+    trie.update(2, score=0)
+    assert [d['id'] for d in trie.top('t')] == [1, 2]
+    trie.rename('Two Sum', 'Add Two Numbers', item_id=1, data={'id': 1})
+    assert [d['id'] for d in trie.top('a')] == [1]
+    assert [d['id'] for d in trie.top('t')] == [2]
+
+def test_radix_trie_splits_and_merges_edges():
+    trie = RadixTrie.build(['Two Sum', 'Two Sum II', 'Two'])
+    assert list(trie.root.children['t'].children) == [' ']
+    assert sorted(trie.autocomplete('two s')) == ['two sum', 'two sum ii']
+    trie.delete('Two')
+    trie.delete('Two Sum')
+    assert trie.root.children['t'].label == 'two sum ii'
+    assert trie.autocomplete('two sum i') == ['two sum ii']
+
+def test_skip_list_rank_and_positional_access():
+    skip_list = SkipList(seed=3)
+    keys = list(range(0, 200, 2))
+    for key in reversed(keys):
+        skip_list.insert(key, str(key))
+    assert skip_list.count_less(41) == 21
+    assert [k for k, _ in skip_list.items(10, 13)] == [20, 22, 24]
+    assert skip_list.remove(20) == '20'
+    assert skip_list.count_less(41) == 20 and len(skip_list) == 99
+    with pytest.raises(KeyError):
+        skip_list.insert(22)
+
+def test_indexed_priority_queue_update_and_remove():
+    queue = IndexedPriorityQueue()
+    for key, priority in [('a', 5), ('b', 3), ('c', 8), ('d', 1)]:
+        queue.push(key, priority)
+    queue.push('c', 0)
+    queue.push('d', 9)
+    assert queue.remove('b') == 3
+    assert queue.smallest(10, max_priority=5) == [('c', 0), ('a', 5)]
+    assert queue.pop() == ('c', 0)
+    assert queue.peek() == ('a', 5) and len(queue) == 2 and 'b' not in queue